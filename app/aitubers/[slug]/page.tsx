@@ -50,9 +50,10 @@ const tagFrequencies = aitubers.reduce<Map<string, number>>((frequencies, aitube
 const getTagWeight = (tag: string): number =>
   1 + Math.log((aitubers.length + 1) / ((tagFrequencies.get(tag) || 0) + 1))
 
-const getProfileTitle = (aituber: (typeof aitubers)[number]): string => {
+// 詳細ページの aituber は詳細ファイルから読み込んだ別のオブジェクトなので、一覧とは slug で突き合わせる
+const getProfileTitle = (aituber: (typeof aitubers)[number], slug: string): string => {
   const hasDuplicateName = aitubers.some(
-    (candidate) => candidate !== aituber && candidate.name === aituber.name
+    (candidate) => getAituberSlug(candidate) !== slug && candidate.name === aituber.name
   )
   const discriminator = aituber.youtubeChannelID
     ? `YouTube ${aituber.youtubeChannelID.slice(-6)}`
@@ -84,7 +85,7 @@ export function generateMetadata({ params }: PageProps): Metadata {
   }
 
   const description = getPageDescription(aituber)
-  const title = getProfileTitle(aituber)
+  const title = getProfileTitle(aituber, params.slug)
   const detailPath = getAituberDetailPath(aituber)
   const image = aituber.imageUrl ? absoluteUrl(getProfileImageUrl(aituber.imageUrl)) : absoluteUrl('/ogp.png')
 
@@ -125,7 +126,7 @@ export default function AituberProfilePage({ params }: PageProps) {
   const hasTwitch = Boolean(aituber.twitchLogin || aituber.twitchUserID)
   const platformName = hasYouTube && hasTwitch ? 'YouTube・Twitch' : hasYouTube ? 'YouTube' : 'Twitch'
   const relatedAitubers = aitubers
-    .filter((candidate) => candidate !== aituber)
+    .filter((candidate) => getAituberSlug(candidate) !== params.slug)
     .map((candidate) => {
       const sharedTags = candidate.tags
         .filter((tag) => aituber.tags.includes(tag) && !RELATED_TAG_EXCLUSIONS.has(tag))
@@ -150,7 +151,7 @@ export default function AituberProfilePage({ params }: PageProps) {
     aituber.twitterID ? `https://x.com/${aituber.twitterID}` : '',
   ].filter(Boolean)
   const pageDescription = getPageDescription(aituber)
-  const profileTitle = getProfileTitle(aituber)
+  const profileTitle = getProfileTitle(aituber, params.slug)
   const isPartialAituber = aituber.tags.includes('一部AITuber')
 
   const structuredData = {
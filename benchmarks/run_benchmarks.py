@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Benchmark the updater scripts against local stand-ins for YouTube, Twitch and RSS.
+
+update_aitubers.py, refresh_youtube_rss.py, update_pipeline.py and add_aitubers.py
+run in-process against benchmarks/stub_server.py. For each roster size, every script
+gets its own fresh workspace with a synthetic app/data/aitubers.json and runs twice:
+"cold" with an empty .cache, then "warm" with the .cache and Twitch token left by
+the cold run and the roster restored. The report covers wall time, requests per endpoint, injected
+errors, response bytes and YouTube quota units for each run.
+
+    python benchmarks/run_benchmarks.py                      # 300, 3k and 30k entries
+    python benchmarks/run_benchmarks.py --sizes 300 --latency 0.05 --error-rate 0.02
+    python benchmarks/run_benchmarks.py --output bench.json
+
+API rate limits are lifted by default (--rate), so the numbers reflect request
+volume and client overhead rather than the production throttles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from aituber_data import serialize_aitubers  # noqa: E402
+from http_client import close_http_client, set_client_defaults  # noqa: E402
+from stub_server import AsyncStubTransport, StubServer, StubTransport, channel_id, video_ids, video_timestamp  # noqa: E402
+from youtube_quota import LIST_COST, QUOTA_COSTS  # noqa: E402
+
+DEFAULT_SIZES = [300, 3000, 30000]
+SCRIPTS = ["update", "rss", "pipeline", "add"]
+RUNS = ["cold", "warm"]
+
+
+def synthetic_roster(size: int, stale_ratio: float = 0.1, twitch_ratio: float = 0.2, seed: int = 0) -> dict:
+    """Entries whose stored videos match the stub, except stale_ratio of them
+    that are one upload behind (so the RSS precheck finds new content)."""
+    rng = random.Random(seed)
+    aitubers = []
+    for index in range(size):
+        channel = channel_id(index)
+        ids = video_ids(channel, 4)
+        stored = ids[1:] if rng.random() < stale_ratio else ids[:3]
+        recent = [
+            {
+                "title": video_id,
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "thumbnail": f"https://i1.ytimg.com/vi/{video_id}/hqdefault.jpg",
+                "date": video_timestamp(video_id),
+            }
+            for video_id in stored
+        ]
+        aituber = {
+            "name": f"Stub {index}",
+            "description": "",
+            "tags": [],
+            "twitterID": "",
+            "youtubeChannelID": channel,
+            "youtubeURL": f"stub{index:06d}",
+            "imageUrl": "",
+            "youtubeSubscribers": 0,
+            "latestVideoTitle": recent[0]["title"],
+            "latestVideoThumbnail": recent[0]["thumbnail"],
+            "latestVideoUrl": recent[0]["url"],
+            "latestVideoDate": recent[0]["date"],
+            "isUpcoming": False,
+            "recentYoutubeVideos": recent,
+        }
+        if rng.random() < twitch_ratio:
+            aituber["twitchLogin"] = f"stub_{index}"
+        aitubers.append(aituber)
+    return {"lastUpdated": "2026-08-01T00:00:00+09:00", "aitubers": aitubers}
+
+
+def new_urls(count: int) -> list[str]:
+    """Handles and Twitch channels the roster does not contain yet."""
+    urls = [f"@bench-new-{n}" for n in range(count - count // 4)]
+    urls += [f"https://www.twitch.tv/bench_new_{n}" for n in range(count // 4)]
+    return urls
+
+
+def run_update(args) -> None:
+    import update_aitubers
+
+    update_aitubers.update_aituber_data(
+        workers=args.workers, youtube_rate=args.rate, twitch_rate=args.rate, rss_precheck=True
+    )
+
+
+def run_rss(args) -> None:
+    import refresh_youtube_rss
+
+    argv = ["refresh_youtube_rss.py", "--engine", args.rss_engine, "--workers", str(args.workers)]
+    argv += ["--concurrency", str(args.concurrency)]
+    with mock.patch.object(sys, "argv", argv):
+        refresh_youtube_rss.main()
+
+
+def run_pipeline(args) -> None:
+    import update_pipeline
+
+    update_pipeline.run_pipeline(
+        workers=args.workers, youtube_rate=args.rate, twitch_rate=args.rate, feed_concurrency=args.concurrency
+    )
+
+
+def run_add(args) -> None:
+    import add_aitubers
+
+    main = add_aitubers.Main(youtube_rate=args.rate)
+    main.run_batch(new_urls(args.add_count), args.workers)
+    # Saved the same way add_aitubers.main() does, so the warm run can reuse them
+    main.resolution_cache.save()
+    if main.youtube:
+        main.youtube.save()
+
+
+RUNNERS = {"update": run_update, "rss": run_rss, "pipeline": run_pipeline, "add": run_add}
+
+
+def quota_units(counts) -> int:
+    return sum(
+        count * QUOTA_COSTS.get(endpoint.split(".", 1)[1], LIST_COST)
+        for endpoint, count in counts.items()
+        if endpoint.startswith("youtube.")
+    )
+
+
+def benchmark(stub: StubServer, script: str, workspace: Path, args, env: dict, run: str = "cold") -> dict:
+    stub.reset()
+    close_http_client()
+    log = io.StringIO()
+    cwd = os.getcwd()
+    started = time.perf_counter()
+    error = None
+    try:
+        os.chdir(workspace)
+        with mock.patch.dict(os.environ, env), contextlib.redirect_stdout(log):
+            # Only the stub's key may be used, never real ones from the environment.
+            for name in [key for key in os.environ if key.startswith("YOUTUBE_API_KEY")]:
+                if name not in env:
+                    del os.environ[name]
+            RUNNERS[script](args)
+    except Exception as exc:  # a crash is a result worth reporting, not a harness failure
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        os.chdir(cwd)
+    elapsed = time.perf_counter() - started
+    return {
+        "script": script,
+        "run": run,
+        "seconds": round(elapsed, 3),
+        "requests": sum(stub.counts.values()),
+        "byEndpoint": dict(sorted(stub.counts.items())),
+        "injectedErrors": sum(stub.errors.values()),
+        "bytes": stub.bytes_sent,
+        "quotaUnits": quota_units(stub.counts),
+        "error": error,
+    }
+
+
+def benchmark_script(stub: StubServer, script: str, roster: bytes, args, env: dict) -> list[dict]:
+    """Cold and warm runs of one script in a workspace no other script has touched.
+
+    The roster is rewritten before each run, so the warm run differs from the
+    cold one only by the caches under .cache and the saved Twitch token.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        data_path = workspace / "app" / "data" / "aitubers.json"
+        data_path.parent.mkdir(parents=True)
+        for run in RUNS:
+            data_path.write_bytes(roster)
+            results.append(benchmark(stub, script, workspace, args, env, run))
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    print(
+        f"{'entries':>8} {'script':<8} {'run':<5} {'seconds':>9} {'requests':>9} "
+        f"{'errors':>7} {'quota':>7} {'KiB':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['size']:>8} {result['script']:<8} {result['run']:<5} {result['seconds']:>9.2f} "
+            f"{result['requests']:>9} {result['injectedErrors']:>7} {result['quotaUnits']:>7} "
+            f"{result['bytes'] / 1024:>9.1f}"
+            + (f"  FAILED {result['error']}" if result["error"] else "")
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Roster sizes to benchmark")
+    parser.add_argument("--scripts", nargs="+", choices=SCRIPTS, default=SCRIPTS)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rss-engine", choices=["async", "threads"], default="async")
+    parser.add_argument("--concurrency", type=int, default=200, help="Feeds in flight for the async RSS engine")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Requests per second allowed per API")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub responses that are 503s")
+    parser.add_argument("--add-count", type=int, default=40, help="URLs passed to add_aitubers.py per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with StubServer(args.latency, args.error_rate, args.seed) as stub:
+        transport = StubTransport(stub.url, limits=httpx.Limits(max_connections=64))
+        set_client_defaults(
+            transport=transport,
+            async_transport_factory=lambda limits: AsyncStubTransport(stub.url, limits=limits),
+        )
+        env = {
+            "TWITCH_CLIENT_ID": "bench",
+            "TWITCH_CLIENT_SECRET": "bench",
+            # Relative to the workspace, so the saved token lives and dies with it.
+            "TWITCH_TOKEN_DIR": "twitch-token",
+            "OPENAI_API_KEY": "bench",
+            "YOUTUBE_API_KEY": "bench",
+        }
+
+        try:
+            for size in args.sizes:
+                roster = serialize_aitubers(synthetic_roster(size, seed=args.seed))
+                for script in args.scripts:
+                    for result in benchmark_script(stub, script, roster, args, env):
+                        results.append({"size": size, **result})
+        finally:
+            set_client_defaults()
+            close_http_client()
+            transport.shutdown()
+
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 1 if any(result.get("error") for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+"""Local stand-ins for the YouTube Data API, Twitch Helix/OAuth and YouTube Atom feeds.
+
+StubServer answers the endpoints the updater scripts call with deterministic
+synthetic data, adding a configurable per-request latency and a random
+error rate. Every request is counted per endpoint so the benchmark harness
+can report request volume and YouTube quota units.
+
+All of the scripts' traffic (YouTube Data API, Twitch, RSS) goes through
+httpx and is redirected here by StubTransport (or AsyncStubTransport for the
+asyncio feed refresher), which rewrites the URL and keeps the original host
+in an X-Stub-Host header.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import httpx
+
+FEED_ENTRIES = 15
+PLAYLIST_ENTRIES = 2
+LIVE_TWITCH_RATIO = 10  # one in N Twitch users is live
+BASE_DATE = 1785888000  # 2026-08-05T00:00:00Z
+
+
+def channel_id(index: int) -> str:
+    return f"UC{index:022d}"
+
+
+def video_ids(channel: str, count: int = FEED_ENTRIES) -> list[str]:
+    """Newest first; eleven characters like real video IDs."""
+    return [f"{channel[-9:]}v{n}" for n in range(count)]
+
+
+def video_timestamp(video_id: str) -> str:
+    age_days = int(video_id.rsplit("v", 1)[1])
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(BASE_DATE - age_days * 86400))
+
+
+def twitch_user_id(login: str) -> str:
+    return str(int(hashlib.sha1(login.encode()).hexdigest()[:8], 16))
+
+
+class StubServer:
+    """Threaded HTTP server with request counters; use as a context manager."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.counts: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counts.clear()
+            self.errors.clear()
+            self.bytes_sent = 0
+
+    def _should_fail(self, endpoint: str) -> bool:
+        if endpoint == "twitch.token" or not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def respond(self, handler: "_Handler") -> None:
+        parsed = urlparse(handler.path)
+        query = parse_qs(parsed.query)
+        endpoint = _endpoint(handler.headers.get("X-Stub-Host", ""), parsed.path)
+        if handler.command == "POST":
+            length = int(handler.headers.get("Content-Length") or 0)
+            handler.rfile.read(length)
+
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.counts[endpoint] += 1
+
+        if endpoint is None:
+            status, headers, body = 404, {}, b"not found"
+        elif self._should_fail(endpoint):
+            with self.lock:
+                self.errors[endpoint] += 1
+            status, headers, body = 503, {"Content-Type": "application/json"}, b'{"error": "stub"}'
+        else:
+            status, headers, body = self._route(endpoint, query, handler.headers)
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self.lock:
+            self.bytes_sent += len(body)
+
+    def _route(self, endpoint: str, query: dict, headers) -> tuple[int, dict, bytes]:
+        if endpoint == "rss":
+            channel = query["channel_id"][0]
+            etag = f'"{channel}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"Content-Type": "application/atom+xml", "ETag": etag}, atom_feed(channel)
+        handler = _JSON_ROUTES.get(endpoint)
+        if handler is None:
+            return 404, {}, b"not found"
+        body = json.dumps(handler(query)).encode("utf-8")
+        return 200, {"Content-Type": "application/json"}, body
+
+
+def _endpoint(host: str, path: str) -> str | None:
+    if path.startswith("/youtube/v3/"):
+        return "youtube." + path.rsplit("/", 1)[1]
+    if path == "/oauth2/token":
+        return "twitch.token"
+    if path.startswith("/helix/"):
+        return "twitch." + path.rsplit("/", 1)[1]
+    if path == "/feeds/videos.xml":
+        return "rss"
+    return None
+
+
+def _ids(query: dict, name: str) -> list[str]:
+    return [value for item in query.get(name, []) for value in item.split(",") if value]
+
+
+def _thumbnail(name: str) -> dict:
+    url = f"https://i.ytimg.com/vi/{name}/hqdefault.jpg"
+    return {"default": {"url": url}, "high": {"url": url}}
+
+
+def _youtube_channels(query: dict) -> dict:
+    ids = _ids(query, "id")
+    if query.get("forHandle"):
+        handle = query["forHandle"][0].lstrip("@")
+        ids = [channel_id(10**9 + int(hashlib.sha1(handle.encode()).hexdigest()[:6], 16))]
+    return {
+        "items": [
+            {
+                "id": channel,
+                "snippet": {
+                    "title": f"Stub {channel[-6:]}",
+                    "description": "",
+                    "customUrl": f"@stub{channel[-6:]}",
+                    "thumbnails": _thumbnail(channel),
+                },
+                "statistics": {"subscriberCount": str(int(channel[-6:]) * 7)},
+                "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel[2:]}},
+            }
+            for channel in ids
+        ]
+    }
+
+
+def _youtube_playlist_items(query: dict) -> dict:
+    channel = "UC" + query["playlistId"][0][2:]
+    limit = int(query.get("maxResults", [PLAYLIST_ENTRIES])[0])
+    return {
+        "items": [
+            {
+                "snippet": {
+                    "title": video_id,
+                    "resourceId": {"videoId": video_id},
+                    "thumbnails": _thumbnail(video_id),
+                }
+            }
+            for video_id in video_ids(channel, limit)
+        ]
+    }
+
+
+def _youtube_videos(query: dict) -> dict:
+    return {
+        "items": [
+            {
+                "id": video_id,
+                "snippet": {
+                    "title": video_id,
+                    "publishedAt": video_timestamp(video_id),
+                    "liveBroadcastContent": "none",
+                    "thumbnails": _thumbnail(video_id),
+                },
+                "status": {"privacyStatus": "public"},
+            }
+            for video_id in _ids(query, "id")
+        ]
+    }
+
+
+def _youtube_search(query: dict) -> dict:
+    video_id = video_ids(query["channelId"][0], 1)[0]
+    return {
+        "items": [
+            {
+                "id": {"videoId": video_id},
+                "snippet": {
+                    "title": video_id,
+                    "publishedAt": video_timestamp(video_id),
+                    "thumbnails": _thumbnail(video_id),
+                },
+            }
+        ]
+    }
+
+
+def _twitch_token(query: dict) -> dict:
+    return {"access_token": "stub-token", "expires_in": 5000000, "token_type": "bearer"}
+
+
+def _twitch_users(query: dict) -> dict:
+    logins = query.get("login", [])
+    return {
+        "data": [
+            {
+                "id": twitch_user_id(login.lower()),
+                "login": login.lower(),
+                "display_name": login,
+                "description": "",
+                "profile_image_url": "",
+            }
+            for login in logins
+        ]
+    }
+
+
+def _twitch_streams(query: dict) -> dict:
+    return {
+        "data": [
+            {
+                "user_id": user_id,
+                "title": "stub stream",
+                "thumbnail_url": "https://static-cdn.jtvnw.net/{width}x{height}.jpg",
+                "started_at": "2026-08-05T00:00:00Z",
+            }
+            for user_id in query.get("user_id", [])
+            if int(user_id) % LIVE_TWITCH_RATIO == 0
+        ]
+    }
+
+
+def _twitch_videos(query: dict) -> dict:
+    user_id = query["user_id"][0]
+    return {
+        "data": [
+            {
+                "title": "stub archive",
+                "url": f"https://www.twitch.tv/videos/{user_id}",
+                "thumbnail_url": "https://static-cdn.jtvnw.net/%{width}x%{height}.jpg",
+                "created_at": "2026-08-04T00:00:00Z",
+            }
+        ]
+    }
+
+
+_JSON_ROUTES = {
+    "youtube.channels": _youtube_channels,
+    "youtube.playlistItems": _youtube_playlist_items,
+    "youtube.videos": _youtube_videos,
+    "youtube.search": _youtube_search,
+    "twitch.token": _twitch_token,
+    "twitch.users": _twitch_users,
+    "twitch.streams": _twitch_streams,
+    "twitch.videos": _twitch_videos,
+}
+
+
+def atom_feed(channel: str) -> bytes:
+    entries = "".join(
+        f"""<entry><yt:videoId>{video_id}</yt:videoId><title>{escape(video_id)}</title>
+<link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+<published>{video_timestamp(video_id)}</published>
+<media:group><media:thumbnail url="https://i1.ytimg.com/vi/{video_id}/hqdefault.jpg"/></media:group></entry>"""
+        for video_id in video_ids(channel)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+        'xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{channel}</title>{entries}</feed>"
+    ).encode("utf-8")
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when hundreds open at once.
+    request_queue_size = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY each
+    # response waits ~40 ms for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.server.stub.respond(self)
+
+    def do_POST(self) -> None:
+        self.server.stub.respond(self)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def _redirect(request: httpx.Request, stub_url: httpx.URL) -> None:
+    request.headers["X-Stub-Host"] = request.url.host
+    request.url = request.url.copy_with(scheme=stub_url.scheme, host=stub_url.host, port=stub_url.port)
+    request.headers["Host"] = f"{stub_url.host}:{stub_url.port}"
+
+
+class StubTransport(httpx.HTTPTransport):
+    """Send every httpx request to the stub server, remembering the real host."""
+
+    def __init__(self, stub_url: str, **options):
+        super().__init__(**options)
+        self.stub_url = httpx.URL(stub_url)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _redirect(request, self.stub_url)
+        return super().handle_request(request)
+
+    def close(self) -> None:
+        # Clients built by the scripts close their transport on reconfiguration;
+        # keep the pool alive until the harness calls shutdown().
+        pass
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+class AsyncStubTransport(httpx.AsyncHTTPTransport):
+    """StubTransport for httpx.AsyncClient; owned and closed by its client."""
+
+    def __init__(self, stub_url: str, **options):
+        super().__init__(**options)
+        self.stub_url = httpx.URL(stub_url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _redirect(request, self.stub_url)
+        return await super().handle_async_request(request)
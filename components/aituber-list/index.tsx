@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect, useCallback, useRef } from 'react'
+import { useState, useEffect, useCallback, useMemo, useRef } from 'react'
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { ChevronDown } from "lucide-react"
@@ -13,7 +13,7 @@ import {
   CollapsibleContent,
   CollapsibleTrigger,
 } from "@/components/ui/collapsible"
-import aituberData from '@/app/data/aitubers.json'
+import aituberData from '@/app/data/generated/aitubers-list.json'
 
 // Types
 import type { AITuber, DateFilter, PlatformFilter, SubscriberFilter, SortOrder, ViewMode, TagFilterMode } from './types'
@@ -29,6 +29,9 @@ import { useFavorites } from '@/hooks/useFavorites'
 import { useUrlState } from '@/hooks/useUrlState'
 import { useAituberFilters } from '@/hooks/useAituberFilters'
 import { useAituberSort } from '@/hooks/useAituberSort'
+import { useRosterSearch } from '@/hooks/useRosterSearch'
+import { useLiveStatus } from '@/hooks/useLiveStatus'
+import { applyLiveStatus } from '@/lib/liveStatus'
 
 // CSS for hiding scrollbar
 const styles = `
@@ -41,8 +44,11 @@ const styles = `
   }
 `
 
-// JSONからデータを取得し、YouTubeまたはTwitchが存在するものを日付でソート
-const aitubers: AITuber[] = aituberData.aitubers
+// 検索用の索引のエントリ位置は、この並び（aitubers-list.json の順）を指す
+const listEntries = aituberData.aitubers as AITuber[]
+
+// YouTubeまたはTwitchが存在するものを日付でソート
+const sortByLatestContent = (entries: AITuber[]): AITuber[] => entries
   .filter(aituber => aituber.youtubeChannelID !== '' || Boolean(aituber.twitchLogin))
   .sort((a, b) => {
     const dateA = new Date(getLatestContentDate(a))
@@ -50,6 +56,8 @@ const aitubers: AITuber[] = aituberData.aitubers
     return dateB.getTime() - dateA.getTime()
   })
 
+const aitubers: AITuber[] = sortByLatestContent(listEntries)
+
 // 全てのタグを抽出
 const allTags = Array.from(new Set(aitubers.flatMap(aituber => aituber.tags)))
   .filter(tag => tag !== PARTIAL_AITUBER_TAG)
@@ -188,8 +196,22 @@ export function AituberList() {
     updateUrl
   ])
 
+  // Live status (public/data/live-status.json, newer than the generated list data)
+  const liveStatus = useLiveStatus()
+  const liveEntries = useMemo(
+    () => (liveStatus ? applyLiveStatus(listEntries, liveStatus) : listEntries),
+    [liveStatus]
+  )
+  const liveAitubers = useMemo(
+    () => (liveEntries === listEntries ? aitubers : sortByLatestContent(liveEntries)),
+    [liveEntries]
+  )
+
+  // Search index (loaded on the first search)
+  const search = useRosterSearch(liveEntries, nameFilter !== '')
+
   // Filtering hook
-  const { filteredAITubers, activeFilterCount } = useAituberFilters(aitubers, {
+  const { filteredAITubers, activeFilterCount } = useAituberFilters(liveAitubers, {
     selectedTags,
     tagFilterMode,
     selectedDateFilter,
@@ -199,7 +221,8 @@ export function AituberList() {
     showMainAITubersOnly,
     showUpcomingOnly,
     showFavoritesOnly,
-    favorites
+    favorites,
+    search
   })
 
   // Sorting hook
@@ -359,7 +382,7 @@ export function AituberList() {
         filteredCount={filteredAITubers.length}
         totalCount={aitubers.length}
         allTags={allTags}
-        aitubers={aitubers}
+        aitubers={liveAitubers}
         onReset={resetAllFilters}
         locale={locale}
         t={t}
@@ -4,15 +4,18 @@ export type AITuber = {
   tags: string[]
   twitterID: string
   youtubeChannelID: string
-  youtubeURL: string
+  youtubeURL?: string
   imageUrl: string
   youtubeSubscribers: number
-  latestVideoTitle: string
-  latestVideoThumbnail: string
+  // 一覧用データでは recentYoutubeVideos がある場合は省かれる
+  latestVideoTitle?: string
+  latestVideoThumbnail?: string
   latestVideoUrl: string
-  latestVideoDate: string
+  latestVideoDate?: string
   recentYoutubeVideos?: RecentYoutubeVideo[]
   isUpcoming?: boolean
+  // 配信中のYouTubeの動画。生成データにはなく、ブラウザで live-status.json から設定する
+  youtubeLiveUrl?: string
   twitchLogin?: string
   twitchUserID?: string
   twitchURL?: string
@@ -96,16 +99,16 @@ export const getRecentContents = (aituber: AITuber, limit = 3): LatestContent[]
     ? aituber.recentYoutubeVideos
     : aituber.latestVideoUrl
       ? [{
-          title: aituber.latestVideoTitle,
-          thumbnail: aituber.latestVideoThumbnail,
+          title: aituber.latestVideoTitle || '',
+          thumbnail: aituber.latestVideoThumbnail || '',
           url: aituber.latestVideoUrl,
-          date: aituber.latestVideoDate,
+          date: aituber.latestVideoDate || '',
         }]
       : []
   ).map((content) => ({
     platform: 'youtube' as const,
     ...content,
-    isLive: false,
+    isLive: Boolean(aituber.youtubeLiveUrl) && content.url === aituber.youtubeLiveUrl,
   }))
   const twitchContent = aituber.twitchContentUrl ? {
     platform: 'twitch' as const,
@@ -2,6 +2,7 @@
 
 import { useMemo } from 'react'
 import type { AITuber, DateFilter, PlatformFilter, SubscriberFilter, TagFilterMode } from '@/components/aituber-list/types'
+import type { RosterSearch } from '@/lib/search'
 import {
   getAituberId,
   getAudienceCount,
@@ -22,6 +23,8 @@ export interface FilterOptions {
   showUpcomingOnly: boolean
   showFavoritesOnly: boolean
   favorites: string[]
+  // 検索用の索引。読み込むまでは名前・説明の部分一致とタグの配列で絞り込む
+  search?: RosterSearch | null
 }
 
 export interface UseAituberFiltersReturn {
@@ -43,26 +46,39 @@ export function useAituberFilters(
     showMainAITubersOnly,
     showUpcomingOnly,
     showFavoritesOnly,
-    favorites
+    favorites,
+    search = null
   } = options
 
   const filteredAITubers = useMemo(() => {
     const selectableTags = selectedTags.filter(tag => tag !== PARTIAL_AITUBER_TAG)
+    const tagPostings = search ? selectableTags.map(tag => search.withTag(tag)) : null
+    const queryMatches = search && nameFilter !== '' ? search.query(nameFilter) : null
+
+    const hasTag = (aituber: AITuber, tag: string, index: number): boolean =>
+      tagPostings ? tagPostings[index].has(aituber) : aituber.tags.includes(tag)
 
     const matchesTags = (aituber: AITuber): boolean => {
       if (selectableTags.length === 0) return true
 
       switch (tagFilterMode) {
         case 'and':
-          return selectableTags.every(tag => aituber.tags.includes(tag))
+          return selectableTags.every((tag, index) => hasTag(aituber, tag, index))
         case 'not':
-          return selectableTags.every(tag => !aituber.tags.includes(tag))
+          return selectableTags.every((tag, index) => !hasTag(aituber, tag, index))
         case 'or':
         default:
-          return selectableTags.some(tag => aituber.tags.includes(tag))
+          return selectableTags.some((tag, index) => hasTag(aituber, tag, index))
       }
     }
 
+    const matchesName = (aituber: AITuber): boolean => {
+      if (nameFilter === '') return true
+      if (queryMatches) return queryMatches.has(aituber)
+      return aituber.name.toLowerCase().includes(nameFilter.toLowerCase()) ||
+        aituber.description.toLowerCase().includes(nameFilter.toLowerCase())
+    }
+
     return aitubers.filter(aituber =>
       isWithinDateRange(getLatestContentDate(aituber), selectedDateFilter) &&
       matchesTags(aituber) &&
@@ -72,10 +88,8 @@ export function useAituberFilters(
       (!showMainAITubersOnly || !aituber.tags.includes(PARTIAL_AITUBER_TAG)) &&
       (!selectedSubscriberFilter ||
         getAudienceCount(aituber) >= SUBSCRIBER_FILTER_LABELS[selectedSubscriberFilter].threshold) &&
-      (nameFilter === '' ||
-        aituber.name.toLowerCase().includes(nameFilter.toLowerCase()) ||
-        aituber.description.toLowerCase().includes(nameFilter.toLowerCase())) &&
-      (!showUpcomingOnly || aituber.isUpcoming || aituber.twitchIsLive) &&
+      matchesName(aituber) &&
+      (!showUpcomingOnly || aituber.isUpcoming || aituber.twitchIsLive || Boolean(aituber.youtubeLiveUrl)) &&
       (!showFavoritesOnly || favorites.includes(getAituberId(aituber)))
     )
   }, [
@@ -89,7 +103,8 @@ export function useAituberFilters(
     showMainAITubersOnly,
     showUpcomingOnly,
     showFavoritesOnly,
-    favorites
+    favorites,
+    search
   ])
 
   const activeFilterCount = useMemo(() => {
@@ -0,0 +1,35 @@
+'use client'
+
+import { useEffect, useState } from 'react'
+import { loadLiveStatus, type LiveStatus } from '@/lib/liveStatus'
+
+// live-status.json は15分ごとに更新されるため、開いている間は5分ごとに読み直す
+const REFRESH_INTERVAL = 5 * 60 * 1000
+
+// 配信中・配信予定の一覧を読み込む。
+// 読み込むまで（または読み込めなかった場合）は null を返し、呼び出し側は一覧用データの配信状態を使う
+export function useLiveStatus(): LiveStatus | null {
+  const [status, setStatus] = useState<LiveStatus | null>(null)
+
+  useEffect(() => {
+    let cancelled = false
+    const load = () => {
+      loadLiveStatus()
+        .then(next => {
+          if (!cancelled) {
+            setStatus(prev => (prev?.lastUpdated === next.lastUpdated ? prev : next))
+          }
+        })
+        .catch(() => {})
+    }
+
+    load()
+    const timer = window.setInterval(load, REFRESH_INTERVAL)
+    return () => {
+      cancelled = true
+      window.clearInterval(timer)
+    }
+  }, [])
+
+  return status
+}
@@ -0,0 +1,32 @@
+'use client'
+
+import { useEffect, useMemo, useState } from 'react'
+import type { AITuber } from '@/components/aituber-list/types'
+import { createRosterSearch, loadSearchIndex, type RosterSearch, type SearchIndex } from '@/lib/search'
+
+// 検索語が入力されたときに検索用の索引を読み込む。
+// 読み込むまで（または読み込めなかった場合）は null を返し、呼び出し側は部分一致で絞り込む
+export function useRosterSearch(entries: AITuber[], enabled: boolean): RosterSearch | null {
+  const [index, setIndex] = useState<SearchIndex | null>(null)
+
+  useEffect(() => {
+    if (!enabled || index) return
+
+    let cancelled = false
+    loadSearchIndex()
+      .then(loaded => {
+        if (!cancelled) setIndex(loaded)
+      })
+      .catch(() => {})
+    return () => {
+      cancelled = true
+    }
+  }, [enabled, index])
+
+  // 配信状態の上書きなどで entries が作り直されたら、結果のオブジェクトも作り直す
+  return useMemo(() => {
+    // 一覧用データと索引の生成がずれている場合は使わない
+    if (!index || index.docs.length !== entries.length) return null
+    return createRosterSearch(index, entries)
+  }, [index, entries])
+}
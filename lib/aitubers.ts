@@ -1,12 +1,29 @@
-import aituberData from '@/app/data/aitubers.json'
+import fs from 'fs'
+import path from 'path'
+import aituberList from '@/app/data/generated/aitubers-list.json'
+import aituberIndex from '@/app/data/generated/index.json'
 import type { AITuber } from '@/components/aituber-list/types'
-import { getAituberSlug } from '@/components/aituber-list/types'
 
-export const aitubers = aituberData.aitubers as AITuber[]
-export const aituberLastUpdated = aituberData.lastUpdated
+// scripts/build_aituber_data.py が生成する一覧用データ（カード・リストで使う項目のみ）
+export const aitubers = aituberList.aitubers as AITuber[]
+export const aituberLastUpdated = aituberList.lastUpdated
 
-export const findAituberBySlug = (slug: string): AITuber | undefined =>
-  aitubers.find((aituber) => getAituberSlug(aituber) === slug)
+const GENERATED_DIR = path.join(process.cwd(), 'app/data/generated')
+const detailFiles: Record<string, string> = aituberIndex.entries
+const detailCache = new Map<string, AITuber>()
+
+// 詳細ページ用の全項目を、slug の索引から1件分のファイルだけ読み込む（ビルド時のみ）
+export const findAituberBySlug = (slug: string): AITuber | undefined => {
+  const cached = detailCache.get(slug)
+  if (cached) return cached
+
+  const file = detailFiles[slug]
+  if (!file) return undefined
+
+  const aituber = JSON.parse(fs.readFileSync(path.join(GENERATED_DIR, file), 'utf-8')) as AITuber
+  detailCache.set(slug, aituber)
+  return aituber
+}
 
 export const getMainAitubers = (): AITuber[] =>
   aitubers.filter((aituber) => !aituber.tags.includes('一部AITuber'))
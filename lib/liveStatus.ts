@@ -0,0 +1,82 @@
+import type { AITuber, RecentYoutubeVideo } from '@/components/aituber-list/types'
+import { extractYouTubeVideoId, getAituberSlug } from '@/components/aituber-list/types'
+
+// scripts/update_aitubers.py --live-only が15分ごとに書き出す配信中・配信予定の一覧。
+// key は getAituberSlug と同じ規則
+export type LiveStatusEntry = {
+  key: string
+  name: string
+  platform: 'youtube' | 'twitch'
+  state: 'live' | 'upcoming'
+  title: string
+  thumbnail?: string
+  url: string
+  startsAt: string
+}
+
+export type LiveStatus = {
+  lastUpdated: string
+  entries: LiveStatusEntry[]
+}
+
+export const LIVE_STATUS_URL = '/data/live-status.json'
+
+export const loadLiveStatus = async (): Promise<LiveStatus> => {
+  // 一覧用データより頻繁に更新されるため、ブラウザのキャッシュを使わない
+  const response = await fetch(LIVE_STATUS_URL, { cache: 'no-store' })
+  if (!response.ok) throw new Error(`live status: HTTP ${response.status}`)
+  return response.json() as Promise<LiveStatus>
+}
+
+const withLiveVideo = (aituber: AITuber, entry: LiveStatusEntry): RecentYoutubeVideo[] => {
+  const videoId = extractYouTubeVideoId(entry.url)
+  const others = (aituber.recentYoutubeVideos || []).filter(
+    (video) => extractYouTubeVideoId(video.url) !== videoId
+  )
+  return [{ title: entry.title, thumbnail: entry.thumbnail || '', url: entry.url, date: entry.startsAt }, ...others]
+}
+
+// 一覧用データの配信状態を live-status.json の内容で上書きする。
+// live-status.json の方が新しいため、載っていないエントリは配信中・配信予定ではないものとして扱う
+export const applyLiveStatus = (entries: AITuber[], status: LiveStatus): AITuber[] => {
+  const byKey = new Map<string, LiveStatusEntry[]>()
+  status.entries.forEach((entry) => {
+    byKey.set(entry.key, [...(byKey.get(entry.key) || []), entry])
+  })
+
+  return entries.map((aituber) => {
+    const live = byKey.get(getAituberSlug(aituber)) || []
+    const twitch = live.find((entry) => entry.platform === 'twitch')
+    const youtubeLive = live.find((entry) => entry.platform === 'youtube' && entry.state === 'live')
+    const isUpcoming = live.some((entry) => entry.platform === 'youtube' && entry.state === 'upcoming')
+
+    if (!twitch && !youtubeLive && !aituber.twitchIsLive && Boolean(aituber.isUpcoming) === isUpcoming) {
+      return aituber
+    }
+
+    const updated: AITuber = { ...aituber, isUpcoming }
+    if (twitch) {
+      Object.assign(updated, {
+        twitchIsLive: true,
+        twitchTitle: twitch.title,
+        twitchThumbnail: twitch.thumbnail || aituber.twitchThumbnail,
+        twitchContentUrl: twitch.url,
+        twitchContentDate: twitch.startsAt,
+      })
+    } else if (aituber.twitchIsLive) {
+      // 配信が終わっている。一覧用データの配信情報は古いので表示しない
+      Object.assign(updated, {
+        twitchIsLive: false,
+        twitchTitle: '',
+        twitchThumbnail: '',
+        twitchContentUrl: '',
+        twitchContentDate: '',
+      })
+    }
+    if (youtubeLive) {
+      updated.recentYoutubeVideos = withLiveVideo(aituber, youtubeLive)
+      updated.youtubeLiveUrl = youtubeLive.url
+    }
+    return updated
+  })
+}
@@ -0,0 +1,149 @@
+import type { AITuber } from '@/components/aituber-list/types'
+
+// scripts/search_index.py が生成する検索用の索引。
+// grams と tags の値は、一覧用データでのエントリの位置（昇順）
+export type SearchIndex = {
+  version: number
+  gramSize: number
+  romaji: Record<string, string>
+  docs: string[]
+  grams: Record<string, number[]>
+  tags: Record<string, number[]>
+}
+
+export const SEARCH_INDEX_URL = '/data/search-index.json'
+
+const KANA_OFFSET = 'ァ'.charCodeAt(0) - 'ぁ'.charCodeAt(0)
+// 単語の文字（search_index.py の is_word_char と同じ）
+const WORD_PATTERN = /[\p{L}\p{N}_]+/gu
+
+// 全角・半角、大文字・小文字、カタカナ・ひらがなの違いをなくす（search_index.py の fold と同じ）。
+// toLowerCase は語末の Σ を ς にするため、σ に揃える
+export const fold = (text: string): string =>
+  Array.from(text.normalize('NFKC').toLowerCase().replace(/ς/g, 'σ'), (char) =>
+    char >= 'ァ' && char <= 'ヶ' ? String.fromCharCode(char.charCodeAt(0) - KANA_OFFSET) : char
+  ).join('')
+
+// fold 済みの文字列のひらがなをローマ字にする（search_index.py の romanize と同じ）
+export const romanize = (folded: string, romaji: Record<string, string>): string => {
+  const result: string[] = []
+  let index = 0
+  while (index < folded.length) {
+    const pair = folded.slice(index, index + 2)
+    const char = folded[index]
+    if (pair.length === 2 && pair in romaji) {
+      result.push(romaji[pair])
+      index += 2
+      continue
+    }
+    if (char === 'っ') {
+      const following = romaji[folded.slice(index + 1, index + 3)] || romaji[folded.slice(index + 1, index + 2)]
+      if (following && !'aiueon'.includes(following[0])) {
+        result.push(following[0])
+      }
+    } else if (char !== 'ー') {
+      result.push(romaji[char] ?? char)
+    }
+    index += 1
+  }
+  return result.join('')
+}
+
+// 単語ごとの2-gram。search_index.py と同じく、UTF-16の単位ではなく文字（コードポイント）で区切る
+export const textGrams = (folded: string, gramSize: number): string[] => {
+  const grams = new Set<string>()
+  for (const word of folded.match(WORD_PATTERN) || []) {
+    const chars = Array.from(word)
+    for (let start = 0; start + gramSize <= chars.length; start++) {
+      grams.add(chars.slice(start, start + gramSize).join(''))
+    }
+  }
+  return Array.from(grams)
+}
+
+// 昇順のポスティング同士の積集合
+const intersect = (a: number[], b: number[]): number[] => {
+  const result: number[] = []
+  let i = 0
+  let j = 0
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      result.push(a[i])
+      i++
+      j++
+    } else if (a[i] < b[j]) {
+      i++
+    } else {
+      j++
+    }
+  }
+  return result
+}
+
+export type RosterSearch = {
+  // 名前・説明にクエリを含むエントリ
+  query: (query: string) => Set<AITuber>
+  // タグを持つエントリ
+  withTag: (tag: string) => Set<AITuber>
+}
+
+// entries は索引を生成したときと同じ並び（aitubers-list.json の順）で渡す
+export const createRosterSearch = (index: SearchIndex, entries: AITuber[]): RosterSearch => {
+  const foldedTexts = new Map<number, [string, string]>()
+
+  const foldedText = (ordinal: number): [string, string] => {
+    let texts = foldedTexts.get(ordinal)
+    if (!texts) {
+      const folded = fold(`${entries[ordinal].name}\n${entries[ordinal].description}`)
+      texts = [folded, romanize(folded, index.romaji)]
+      foldedTexts.set(ordinal, texts)
+    }
+    return texts
+  }
+
+  // 2-gramのポスティングを絞り込んだ候補。2文字に満たないクエリは全件を候補にする
+  const candidates = (folded: string): number[] => {
+    const grams = textGrams(folded, index.gramSize)
+    if (grams.length === 0) return entries.map((_, ordinal) => ordinal)
+    return grams
+      .map((gram) => index.grams[gram] || [])
+      .sort((a, b) => a.length - b.length)
+      .reduce(intersect)
+  }
+
+  return {
+    query: (query) => {
+      const folded = fold(query)
+      const romanized = romanize(folded, index.romaji)
+      const ordinals = new Set([...candidates(folded), ...candidates(romanized)])
+      const matches = new Set<AITuber>()
+      ordinals.forEach((ordinal) => {
+        // 2-gramがすべて含まれていても連続しているとは限らないため、候補だけ本文で確かめる
+        const [text, romanizedText] = foldedText(ordinal)
+        if (text.includes(folded) || romanizedText.includes(romanized)) {
+          matches.add(entries[ordinal])
+        }
+      })
+      return matches
+    },
+    withTag: (tag) => new Set((index.tags[tag] || []).map((ordinal) => entries[ordinal])),
+  }
+}
+
+let searchIndexPromise: Promise<SearchIndex> | null = null
+
+// 索引は最初に検索したときに1回だけ読み込む
+export const loadSearchIndex = (): Promise<SearchIndex> => {
+  if (!searchIndexPromise) {
+    searchIndexPromise = fetch(SEARCH_INDEX_URL)
+      .then((response) => {
+        if (!response.ok) throw new Error(`search index: HTTP ${response.status}`)
+        return response.json() as Promise<SearchIndex>
+      })
+      .catch((error) => {
+        searchIndexPromise = null
+        throw error
+      })
+  }
+  return searchIndexPromise
+}
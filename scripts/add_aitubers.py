@@ -1,17 +1,28 @@
-from openai import OpenAI
 import json
 import os
 import argparse
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from pathlib import Path
 from urllib.parse import urlparse
-from dotenv import load_dotenv
-from update_aitubers import get_twitch_app_access_token, update_twitch_info
-
-# .envファイルから環境変数を読み込む
-load_dotenv()
-
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+from aituber_data import AituberIndex, load_aitubers, save_aitubers
+from resolution_cache import ChannelResolutionCache
+from run_metrics import default_report_path, metrics
+from youtube_quota import (
+    PRIORITY_LOW,
+    QuotaExceeded,
+    YouTubeQuotaPool,
+    youtube_api_keys,
+)
+from update_aitubers import (
+    YOUTUBE_REQUESTS_PER_SECOND,
+    TokenBucket,
+    TwitchAppToken,
+    apply_twitch_info,
+    apply_youtube_info,
+    map_concurrently,
+    prefetch_twitch_data,
+    prefetch_youtube_data,
+    update_twitch_info,
+)
 
 SYSTEM_PROMPT = """
 Create JSON data based on the following format that can handle multiple YouTuber information. If any information is missing, set the value as an empty string for that item.
@@ -113,50 +124,87 @@ Please output the JSON data in the following format (must be in array format):
 """
 
 
-def load_aitubers():
-    """aitubers.jsonを読み込む"""
-    with open("app/data/aitubers.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+def empty_aituber():
+    """新規追加するAITuberの全項目を空で持つレコード"""
+    return {
+        "name": "",
+        "description": "",
+        "tags": [],
+        "twitterID": "",
+        "youtubeChannelID": "",
+        "youtubeURL": "",
+        "imageUrl": "",
+        "youtubeSubscribers": 0,
+        "latestVideoTitle": "",
+        "latestVideoThumbnail": "",
+        "latestVideoUrl": "",
+        "latestVideoDate": "",
+    }
+
+
+def extract_aitubers(content):
+    """テキスト形式のAITuber情報をOpenAIでレコードのリストに変換する。
+
+    応答が空かJSONとして読めない場合、data がない場合は空のリストを返す。
+    """
+    # openai はテキストを変換するときだけ必要なため、ここで読み込む
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ],
+        response_format={"type": "json_object"},
+    )
+    ai_response_content = response.choices[0].message.content
+    print("AIの応答:", ai_response_content)
 
+    if ai_response_content is None:
+        print("エラー: AIの応答内容がNoneです。")
+        return []
 
-def save_aitubers(data):
-    """aitubers.jsonを保存する"""
-    with open("app/data/aitubers.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    try:
+        new_data = json.loads(ai_response_content)
+    except json.JSONDecodeError as e:
+        print(f"AIの応答からのJSONデコードエラー: {e}")
+        print(f"問題のあるJSON文字列: {ai_response_content}")
+        return []
+    return new_data.get("data") or []
 
 
 class Main:
-    def __init__(self):
+    def __init__(self, youtube_rate=YOUTUBE_REQUESTS_PER_SECOND):
         self.existing_data = load_aitubers()
-        self.youtube_api_key1 = os.environ.get("YOUTUBE_API_KEY")
-        self.youtube_api_key2 = os.environ.get("YOUTUBE_API_KEY2")
-        self.current_youtube_api_key_name = "YOUTUBE_API_KEY"
+        self.identity_index = AituberIndex(self.existing_data["aitubers"])
+        # 一度解決したhandleは保存しておき、再投稿されたURLはAPIを呼ばずに解決する
+        self.resolution_cache = ChannelResolutionCache()
+        self.resolution_cache.seed(self.existing_data["aitubers"])
         self.twitch_client_id = os.environ.get("TWITCH_CLIENT_ID")
         self.twitch_client_secret = os.environ.get("TWITCH_CLIENT_SECRET")
         self.twitch_access_token = None
+        # YouTubeクライアントはスレッドセーフなため、一括追加で並列に使える
+        self.youtube_rate_limiter = TokenBucket(youtube_rate)
 
         if self.twitch_client_id and self.twitch_client_secret:
             try:
-                self.twitch_access_token = get_twitch_app_access_token(
+                self.twitch_access_token = TwitchAppToken(
                     self.twitch_client_id, self.twitch_client_secret
                 )
+                self.twitch_access_token.get()
             except Exception as error:
+                self.twitch_access_token = None
                 print(f"Twitch APIの認証に失敗しました: {type(error).__name__}")
 
-        if not self.youtube_api_key1:
-            print("警告: YOUTUBE_API_KEY が設定されていません。")
-            # YOUTUBE_API_KEY1がない場合、YOUTUBE_API_KEY2で初期化を試みる
-            if self.youtube_api_key2:
-                print("YOUTUBE_API_KEY2 を使用して初期化します。")
-                self.youtube = build(
-                    "youtube", "v3", developerKey=self.youtube_api_key2
-                )
-                self.current_youtube_api_key_name = "YOUTUBE_API_KEY2"
-            else:
-                print("エラー: 利用可能なYouTube APIキーがありません。")
-                self.youtube = None  # APIキーがない場合はNoneを設定
+        # YOUTUBE_API_KEY, YOUTUBE_API_KEY2, ... のクオータを update_aitubers.py と共有する
+        api_keys = youtube_api_keys()
+        if api_keys:
+            self.youtube = YouTubeQuotaPool(api_keys, self.youtube_rate_limiter)
         else:
-            self.youtube = build("youtube", "v3", developerKey=self.youtube_api_key1)
+            print("エラー: 利用可能なYouTube APIキーがありません。")
+            self.youtube = None  # APIキーがない場合はNoneを設定
 
         if not self.youtube:  # youtubeオブジェクトが初期化できなかった場合
             print(
@@ -165,7 +213,7 @@ class Main:
 
     def _try_youtube_api_call(self, api_function_lambda):
         """
-        YouTube API呼び出しを試行し、403エラー時にセカンダリキーで再試行します。
+        YouTube API呼び出しを実行します。キーの切り替えは YouTubeQuotaPool が行います。
         api_function_lambda は、実行するAPI呼び出しを含む引数なしの関数です。
         例: lambda: self.youtube.channels().list(part="id", forHandle=handle).execute()
         """
@@ -177,30 +225,11 @@ class Main:
 
         try:
             return api_function_lambda()
-        except HttpError as e:
-            if (
-                e.resp.status == 403
-                and self.current_youtube_api_key_name == "YOUTUBE_API_KEY"
-                and self.youtube_api_key2
-            ):
-                print(
-                    f"API呼び出しが {self.current_youtube_api_key_name} で失敗 (403エラー)。YOUTUBE_API_KEY2 に切り替えます。"
-                )
-                self.youtube = build(
-                    "youtube", "v3", developerKey=self.youtube_api_key2
-                )
-                self.current_youtube_api_key_name = "YOUTUBE_API_KEY2"
-                print("YOUTUBE_API_KEY2 に切り替えました。API呼び出しを再試行します...")
-                try:
-                    return api_function_lambda()  # 新しいキーで再試行
-                except HttpError as e2:
-                    print(f"YOUTUBE_API_KEY2 でのAPI呼び出しも失敗しました: {e2}")
-                    raise  # 2回目の試行のエラーを再発生させる
-            else:
-                # 403以外のエラー、または既にYOUTUBE_API_KEY2を使用中、またはYOUTUBE_API_KEY2がない場合
-                raise  # 元のエラーを再発生させる
-        except Exception as ex:  # HttpError以外の予期せぬエラー
-            print(f"YouTube API呼び出し中に予期せぬエラーが発生しました: {ex}")
+        except QuotaExceeded as e:
+            print(f"YouTube APIのクオータが不足しています: {e}")
+            raise
+        except Exception as ex:
+            print(f"YouTube API呼び出し中にエラーが発生しました: {ex}")
             raise
 
     def get_channel_info(self, channel_id):
@@ -220,7 +249,8 @@ class Main:
                 snippet = channel["snippet"]
                 stats = channel["statistics"]
 
-                # 最新動画の情報を取得
+                # 最新動画の情報を取得（search.listは100ユニット消費するため、
+                # クオータが少ないときは省略して update_aitubers.py に任せる）
                 api_call_search = (
                     lambda: self.youtube.search()
                     .list(
@@ -230,9 +260,12 @@ class Main:
                         type="video",
                         maxResults=1,
                     )
-                    .execute()
+                    .execute(priority=PRIORITY_LOW)
                 )
-                videos_response = self._try_youtube_api_call(api_call_search)
+                try:
+                    videos_response = self._try_youtube_api_call(api_call_search)
+                except QuotaExceeded:
+                    videos_response = None
 
                 latest_video = (
                     videos_response["items"][0]
@@ -272,7 +305,15 @@ class Main:
 
     def get_channel_id(self, url_or_name):
         """URLまたはチャンネル名からチャンネルIDを取得"""
-        if not self.youtube or not url_or_name:
+        if not url_or_name:
+            return None
+        if url_or_name.startswith("@"):
+            url_or_name = f"https://www.youtube.com/{url_or_name}"
+
+        cached, channel_id = self.resolution_cache.get(url_or_name)
+        if cached:
+            return channel_id
+        if not self.youtube:
             return None
 
         parsed_url = urlparse(url_or_name)
@@ -290,8 +331,13 @@ class Main:
                         .execute()
                     )
                     response = self._try_youtube_api_call(api_call)
-                    if response and response["items"]:
-                        return response["items"][0]["id"]
+                    channel_id = (
+                        response["items"][0]["id"]
+                        if response and response.get("items")
+                        else None
+                    )
+                    self.resolution_cache.put(url_or_name, channel_id)
+                    return channel_id
                 except Exception as e:
                     print(
                         f"ハンドル名 '{handle}' からチャンネルIDの取得中にエラー: {e}"
@@ -315,18 +361,7 @@ class Main:
         if not self.twitch_access_token:
             return None
         base = {
-            "name": "",
-            "description": "",
-            "tags": [],
-            "twitterID": "",
-            "youtubeChannelID": "",
-            "youtubeURL": "",
-            "imageUrl": "",
-            "youtubeSubscribers": 0,
-            "latestVideoTitle": "",
-            "latestVideoThumbnail": "",
-            "latestVideoUrl": "",
-            "latestVideoDate": "",
+            **empty_aituber(),
             "twitchLogin": login,
             "twitchURL": f"https://www.twitch.tv/{login}",
         }
@@ -336,36 +371,34 @@ class Main:
 
     def is_duplicate(self, new_aituber):
         """既存のAITuberと重複しているかチェック"""
-        for existing in self.existing_data["aitubers"]:
-            if (
-                existing["youtubeChannelID"]
-                and existing["youtubeChannelID"] == new_aituber["youtubeChannelID"]
-            ):
-                return True
-            if (
-                existing.get("twitchLogin")
-                and existing.get("twitchLogin") == new_aituber.get("twitchLogin")
-            ):
-                return True
+        return self.identity_index.find(new_aituber) is not None
+
+    def resolve_channel(self, aituber):
+        """チャンネルIDもTwitchログイン名もないレコードを、URLから補完する。
+
+        どちらも見つからなければ False を返す。
+        """
+        if aituber.get("youtubeChannelID") or aituber.get("twitchLogin"):
+            return True
+        channel_id = self.get_channel_id(aituber.get("youtubeURL", ""))
+        if channel_id:
+            aituber["youtubeChannelID"] = channel_id
+            return True
+        twitch_login = self.get_twitch_login(aituber.get("twitchURL", ""))
+        if twitch_login:
+            aituber["twitchLogin"] = twitch_login
+            return True
+        print(
+            f"YouTube/Twitchチャンネルが見つかりませんでした: {aituber.get('name', 'Unknown')}"
+        )
         return False
 
     def add_new_aitubers(self, new_aitubers):
         """新しいAITuberを追加"""
         added_count = 0
         for aituber in new_aitubers:
-            if not aituber.get("youtubeChannelID") and not aituber.get("twitchLogin"):
-                channel_id = self.get_channel_id(aituber.get("youtubeURL", ""))
-                if channel_id:
-                    aituber["youtubeChannelID"] = channel_id
-                else:
-                    twitch_login = self.get_twitch_login(aituber.get("twitchURL", ""))
-                    if twitch_login:
-                        aituber["twitchLogin"] = twitch_login
-                    else:
-                        print(
-                            f"YouTube/Twitchチャンネルが見つかりませんでした: {aituber.get('name', 'Unknown')}"
-                        )
-                        continue
+            if not self.resolve_channel(aituber):
+                continue
 
             # チャンネルIDが見つかった場合、または最初から存在する場合、詳細情報を取得して更新
             if aituber.get("youtubeChannelID"):
@@ -400,6 +433,7 @@ class Main:
                 #         print(f"'{aituber.get('name', 'Unknown')}' の最新情報の取得に失敗しました。")
 
                 self.existing_data["aitubers"].append(aituber)
+                self.identity_index.add(aituber)
                 added_count += 1
                 print(f"追加しました: {aituber.get('name', 'Unknown')}")
             else:
@@ -441,33 +475,159 @@ class Main:
                 print("YouTubeチャンネルIDが見つかりませんでした。")
                 return
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": content},
-            ],
-            response_format={"type": "json_object"},
-        )
-        ai_response_content = response.choices[0].message.content
-        print("AIの応答:", ai_response_content)
+        new_aitubers = extract_aitubers(content)
+        if new_aitubers:
+            added_count = self.add_new_aitubers(new_aitubers)
+            print(f"新規AITuberの総追加数: {added_count}")
+        else:
+            print(
+                "新規AITuberは追加されませんでした、または応答に 'data' キーがありません。"
+            )
 
-        if ai_response_content is None:
-            print("エラー: AIの応答内容がNoneです。")
-            return
+    def run_batch(self, urls, workers=8):
+        """URLの一覧をまとめて追加し、URLごとの結果を返す。
 
-        try:
-            new_data = json.loads(ai_response_content)
-            if new_data.get("data"):
-                added_count = self.add_new_aitubers(new_data["data"])
-                print(f"新規AITuberの総追加数: {added_count}")
+        handleの解決は並列に行い、チャンネル情報・最新動画は
+        update_aitubers.py と同じ50件単位のバッチで取得する。URLでない行は
+        run と同じくOpenAIでレコードに変換する。重複はバッチ内と既存データの
+        両方で除き、保存は最後に1回だけ行う。
+        """
+        results = {url: "pending" for url in urls}
+        youtube_refs = {}  # url -> チャンネルIDまたはhandle URL
+        twitch_logins = {}  # url -> login
+        text_lines = []
+
+        for url in urls:
+            if "twitch.tv" in url:
+                login = self.get_twitch_login(url)
+                if login:
+                    twitch_logins[url] = login
+                    continue
+            elif url.startswith("@"):
+                youtube_refs[url] = f"https://www.youtube.com/{url}"
+                continue
+            elif url.startswith("http"):
+                youtube_refs[url] = url
+                continue
+            text_lines.append(url)
+
+        # 既存データにあるものはAPIを呼ぶ前に除外する
+        for url, ref in list(youtube_refs.items()):
+            if self.identity_index.find({"youtubeURL": ref}):
+                results[url] = "duplicate"
+                del youtube_refs[url]
+        for url, login in list(twitch_logins.items()):
+            if self.identity_index.find({"twitchLogin": login}):
+                results[url] = "duplicate"
+                del twitch_logins[url]
+
+        # handleなどからチャンネルIDを並列に解決する
+        if youtube_refs and not self.youtube:
+            for url in youtube_refs:
+                results[url] = "youtube unavailable"
+            youtube_refs = {}
+        resolved = map_concurrently(self.get_channel_id, youtube_refs.values(), workers)
+        channel_ids = {}  # channel_id -> 最初のurl
+        for url, channel_id in zip(youtube_refs, resolved):
+            if not channel_id:
+                results[url] = "not found"
+            elif channel_id in channel_ids or self.identity_index.find(
+                {"youtubeChannelID": channel_id}
+            ):
+                results[url] = "duplicate"
             else:
-                print(
-                    "新規AITuberは追加されませんでした、または応答に 'data' キーがありません。"
+                channel_ids[channel_id] = url
+
+        new_aitubers = []
+        if channel_ids:
+            records = [
+                {**empty_aituber(), "youtubeChannelID": channel_id}
+                for channel_id in channel_ids
+            ]
+            channels, candidates, videos = prefetch_youtube_data(
+                self.youtube, records, workers
+            )
+            for record in records:
+                channel_id = record["youtubeChannelID"]
+                url = channel_ids[channel_id]
+                channel = channels.get(channel_id)
+                if not channel:
+                    results[url] = "not found"
+                    continue
+                record.update(
+                    {
+                        "name": channel["snippet"]["title"],
+                        "description": channel["snippet"]["description"],
+                        "youtubeURL": f"https://www.youtube.com/channel/{channel_id}",
+                        "imageUrl": channel["snippet"]["thumbnails"]["default"]["url"],
+                    }
                 )
-        except json.JSONDecodeError as e:
-            print(f"AIの応答からのJSONデコードエラー: {e}")
-            print(f"問題のあるJSON文字列: {ai_response_content}")
+                apply_youtube_info(record, channel, candidates.get(channel_id, []), videos)
+                new_aitubers.append((url, record))
+
+        if twitch_logins and not self.twitch_access_token:
+            for url in twitch_logins:
+                results[url] = "twitch unavailable"
+            twitch_logins = {}
+        unique_logins = {}
+        for url, login in twitch_logins.items():
+            if login in unique_logins:
+                results[url] = "duplicate"
+            else:
+                unique_logins[login] = url
+        if unique_logins:
+            records = [
+                {
+                    **empty_aituber(),
+                    "twitchLogin": login,
+                    "twitchURL": f"https://www.twitch.tv/{login}",
+                }
+                for login in unique_logins
+            ]
+            users, streams, twitch_videos = prefetch_twitch_data(
+                records,
+                self.twitch_client_id,
+                self.twitch_access_token,
+                workers=workers,
+            )
+            for record in records:
+                url = unique_logins[record["twitchLogin"]]
+                if record["twitchLogin"] not in users:
+                    results[url] = "not found"
+                    continue
+                apply_twitch_info(record, users, streams, twitch_videos)
+                new_aitubers.append((url, record))
+
+        # URLでない行は1行ずつOpenAIでレコードにする（1行から複数件になることもある）
+        for line in text_lines:
+            try:
+                records = extract_aitubers(line)
+            except Exception as error:
+                print(f"AITuber情報の変換に失敗しました: {type(error).__name__}: {error}")
+                results[line] = "extraction failed"
+                continue
+            records = [record for record in records if self.resolve_channel(record)]
+            if not records:
+                results[line] = "not found"
+            new_aitubers.extend((line, record) for record in records)
+
+        added_names = {}  # url -> 追加した名前
+        for url, aituber in new_aitubers:
+            if self.is_duplicate(aituber):
+                results[url] = "duplicate"
+                continue
+            self.existing_data["aitubers"].append(aituber)
+            self.identity_index.add(aituber)
+            added_names.setdefault(url, []).append(aituber.get("name", "Unknown"))
+        for url, names in added_names.items():
+            results[url] = f"added: {', '.join(names)}"
+
+        if any(result.startswith("added") for result in results.values()):
+            save_aitubers(self.existing_data)
+        for result in results.values():
+            if not result.startswith("added") and result != "duplicate":
+                metrics.record_error("add", result)
+        return results
 
 
 if __name__ == "__main__":
@@ -482,8 +642,33 @@ if __name__ == "__main__":
         action="store_true",
         help="contentをURLを含むファイルパスとして扱います",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="--file指定時にhandle解決などを並列に行うワーカー数",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=default_report_path("add_aitubers"),
+        help="実行ごとの計測結果（リクエスト数・レイテンシ・エラーなど）を書き出すJSONファイル",
+    )
+    parser.add_argument(
+        "--metrics-history",
+        type=Path,
+        default=None,
+        help="計測結果を1行ずつ追記するJSON Linesファイル",
+    )
 
     args = parser.parse_args()
+
+    # .envファイルから環境変数を読み込む
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    metrics.reset("add_aitubers")
     main = Main()
 
     if (
@@ -501,14 +686,28 @@ if __name__ == "__main__":
     if args.file:
         try:
             with open(args.content, "r", encoding="utf-8") as f:
-                for line in f:
-                    url = line.strip()
-                    if url:
-                        print(f"\nURLを処理中: {url}")
-                        main.run(url)
+                urls = list(dict.fromkeys(line.strip() for line in f if line.strip()))
         except FileNotFoundError:
             print(f"エラー: ファイル '{args.content}' が見つかりません。")
         except Exception as e:
             print(f"ファイル読み込みエラー: {e}")
+        else:
+            print(f"{len(urls)}件のURLをまとめて処理します")
+            results = main.run_batch(urls, args.workers)
+            for url, result in results.items():
+                print(f"{url}: {result}")
+            added_count = sum(result.startswith("added") for result in results.values())
+            print(f"新規AITuberの総追加数: {added_count}")
     else:
         main.run(args.content)
+
+    main.resolution_cache.save()
+    metrics.record_cache(
+        "channel-resolution",
+        hits=main.resolution_cache.hits,
+        misses=main.resolution_cache.misses,
+    )
+    if main.youtube:
+        main.youtube.save()
+        print(main.youtube.summary())
+    metrics.write(args.metrics, args.metrics_history)
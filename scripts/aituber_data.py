@@ -0,0 +1,335 @@
+"""AITuberデータの読み書きをまとめたモジュール
+
+既定では app/data/aitubers.json の1ファイルに保存する。環境変数
+AITUBERS_STORE=shards を指定すると、1件1ファイルのシャード（app/data/aitubers/<key>.json）
+と、並び順・ハッシュを持つ manifest（app/data/aitubers/manifest.json）に保存する。
+シャードは要素に初めてアクセスしたときに読み込み、保存時は読み込んで変化した
+シャードと manifest だけを書き換える。フロントエンド用のデータは、どちらの形式でも
+build_aituber_data.py が生成する。
+
+    python scripts/aituber_data.py split    # aitubers.json → シャード
+    python scripts/aituber_data.py combine  # シャード → aitubers.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections.abc import MutableSequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+
+DATA_PATH = Path("app/data/aitubers.json")
+SHARD_DIR = Path("app/data/aitubers")
+MANIFEST_NAME = "manifest.json"
+JST = timezone(timedelta(hours=9))
+CHANNEL_ID_PATTERN = re.compile(r"UC[\w-]{22}")
+
+
+def aituber_key(aituber: dict) -> str:
+    """1件を識別するキー。フロントエンドの getAituberSlug と同じ規則。"""
+    if aituber.get("youtubeChannelID"):
+        return f"youtube-{aituber['youtubeChannelID']}"
+    if aituber.get("twitchLogin"):
+        return f"twitch-{aituber['twitchLogin'].lower()}"
+    return f"twitch-id-{aituber.get('twitchUserID', '')}"
+
+
+def youtube_identity_key(value: str) -> tuple[str, str] | None:
+    """チャンネルID・@handle・youtubeURLの各形式を正規化したキーにする。
+
+    /channel/UC... とチャンネルIDは ("youtube", ID)、@handle・/c/・/user/・
+    保存済みの customUrl は大文字小文字を無視した ("handle", 名前) になる。
+    """
+    value = unquote(value.strip())
+    if not value:
+        return None
+    if "://" in value or value.startswith(("www.youtube.com", "youtube.com", "m.youtube.com")):
+        parsed = urlparse(value if "://" in value else f"https://{value}")
+        if not parsed.netloc.endswith("youtube.com"):
+            return None
+        parts = [part for part in parsed.path.split("/") if part]
+        if not parts:
+            return None
+        if parts[0] == "channel" and len(parts) > 1:
+            return ("youtube", parts[1])
+        if parts[0] in {"c", "user"} and len(parts) > 1:
+            return ("handle", parts[1].lstrip("@").casefold())
+        value = parts[0]
+    if CHANNEL_ID_PATTERN.fullmatch(value):
+        return ("youtube", value)
+    return ("handle", value.lstrip("@").casefold())
+
+
+def twitch_identity_key(value: str) -> tuple[str, str] | None:
+    """Twitchのログイン名・チャンネルURLを小文字のログイン名キーにする"""
+    value = value.strip()
+    if not value:
+        return None
+    if "://" in value or value.startswith(("www.twitch.tv", "twitch.tv")):
+        parsed = urlparse(value if "://" in value else f"https://{value}")
+        if not parsed.netloc.endswith("twitch.tv"):
+            return None
+        parts = [part for part in parsed.path.split("/") if part]
+        if not parts:
+            return None
+        value = parts[0]
+    return ("twitch", value.lower())
+
+
+class AituberIndex:
+    """チャンネルID・handle・Twitchログインなどから既存のエントリを引く索引。
+
+    1件につき正規化した複数のキーを登録するため、同じチャンネルが別の
+    URL形式で入力されても重複として見つけられる。
+    """
+
+    def __init__(self, aitubers=()):
+        self.entries: dict[tuple[str, str], dict] = {}
+        for aituber in aitubers:
+            self.add(aituber)
+
+    @staticmethod
+    def identity_keys(aituber: dict) -> set[tuple[str, str]]:
+        keys = {
+            youtube_identity_key(aituber.get("youtubeChannelID") or ""),
+            youtube_identity_key(aituber.get("youtubeURL") or ""),
+            twitch_identity_key(aituber.get("twitchLogin") or ""),
+            twitch_identity_key(aituber.get("twitchURL") or ""),
+        }
+        if aituber.get("twitchUserID"):
+            keys.add(("twitch_id", str(aituber["twitchUserID"])))
+        keys.discard(None)
+        return keys
+
+    def add(self, aituber: dict) -> None:
+        for key in self.identity_keys(aituber):
+            self.entries.setdefault(key, aituber)
+
+    def find(self, aituber: dict) -> dict | None:
+        """いずれかのキーが一致する既存エントリを返す"""
+        for key in self.identity_keys(aituber):
+            if key in self.entries:
+                return self.entries[key]
+        return None
+
+    def lookup(self, kind: str, value: str) -> dict | None:
+        """("youtube", チャンネルID) や ("twitch", ログイン名) で1件を引く"""
+        if kind == "youtube" or kind == "handle":
+            key = youtube_identity_key(value)
+        elif kind == "twitch":
+            key = twitch_identity_key(value)
+        else:
+            key = (kind, value)
+        return self.entries.get(key) if key else None
+
+
+def default_data_path() -> Path:
+    """環境変数 AITUBERS_STORE（json / shards）に応じた保存先"""
+    kind = os.environ.get("AITUBERS_STORE", "json")
+    if kind == "shards":
+        return SHARD_DIR
+    if kind == "json":
+        return DATA_PATH
+    raise ValueError(f"unknown AITUBERS_STORE: {kind}")
+
+
+def is_shard_dir(path: Path) -> bool:
+    return path.is_dir() or path == SHARD_DIR
+
+
+def load_aitubers(path: Path | None = None) -> dict:
+    """AITuberデータを読み込む。シャードのディレクトリならシャードは遅延して読み込む"""
+    path = path or default_data_path()
+    if is_shard_dir(path):
+        return ShardStore(path).load()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def serialize_aitubers(data: dict) -> bytes:
+    """保存時と同じ形式（2スペースインデント、末尾改行）でシリアライズする"""
+    return (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    """一時ファイルに書いてから置き換え、途中で止まっても壊れたファイルを残さない"""
+    mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def save_aitubers(data: dict, path: Path | None = None) -> bool:
+    """AITuberデータを保存する。
+
+    読み込んだときの lastUpdated のまま書き出した結果が既存ファイルと同じなら
+    何も書かずに False を返す。変化があった場合だけ lastUpdated を現在時刻に
+    更新し、アトミックに書き込んで True を返す。
+    """
+    path = path or default_data_path()
+    if is_shard_dir(path):
+        return ShardStore(path).save(data)
+
+    existing = path.read_bytes() if path.exists() else None
+    if existing is not None and serialize_aitubers(data) == existing:
+        return False
+
+    data["lastUpdated"] = datetime.now(JST).isoformat()
+    write_atomic(path, serialize_aitubers(data))
+    return True
+
+
+class _Unloaded:
+    """まだ読み込んでいないシャード"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+
+class LazyAitubers(MutableSequence):
+    """ShardStore.load が返す aitubers。要素に初めてアクセスしたときにシャードを読み込む"""
+
+    def __init__(self, store: "ShardStore", keys: list[str]):
+        self.store = store
+        self._items: list[dict | _Unloaded] = [_Unloaded(key) for key in keys]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, _Unloaded):
+            item = self._items[index] = self.store.get(item.key)
+        return item
+
+    def __setitem__(self, index, value) -> None:
+        self._items[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._items[index]
+
+    def insert(self, index: int, value: dict) -> None:
+        self._items.insert(index, value)
+
+    def slots(self) -> list[dict | _Unloaded]:
+        """読み込んだエントリと、読み込んでいないシャードをそのまま返す"""
+        return list(self._items)
+
+
+class ShardStore:
+    """1件1ファイルのシャードと、並び順・ハッシュを持つ manifest で保存するストア。
+
+    manifest は {"lastUpdated": ..., "entries": [{"key", "name", "hash"}, ...]}。
+    """
+
+    def __init__(self, root: Path = SHARD_DIR):
+        self.root = root
+        self.manifest_path = root / MANIFEST_NAME
+
+    def manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {"lastUpdated": "", "entries": []}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def shard_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> dict:
+        return json.loads(self.shard_path(key).read_text(encoding="utf-8"))
+
+    def load(self) -> dict:
+        """manifest だけを読み、シャードは LazyAitubers がアクセス時に読み込む"""
+        manifest = self.manifest()
+        keys = [entry["key"] for entry in manifest["entries"]]
+        return {"lastUpdated": manifest["lastUpdated"], "aitubers": LazyAitubers(self, keys)}
+
+    def save(self, data: dict, last_updated: str | None = None) -> bool:
+        """変化したシャードと manifest だけを書き換える。
+
+        読み込んでいないシャードは変化していないので、ハッシュの計算もしない。
+        last_updated を省略した場合、変化があれば現在時刻を lastUpdated にする。
+        """
+        manifest = self.manifest()
+        previous = {entry["key"]: entry for entry in manifest["entries"]}
+        aitubers = data["aitubers"]
+        items = aitubers.slots() if isinstance(aitubers, LazyAitubers) else aitubers
+
+        entries = []
+        changed_shards = {}
+        for item in items:
+            if isinstance(item, _Unloaded):
+                entries.append(previous[item.key])
+                continue
+            key = aituber_key(item)
+            content = serialize_aitubers(item)
+            digest = hashlib.sha1(content).hexdigest()[:16]
+            entries.append({"key": key, "name": item.get("name", ""), "hash": digest})
+            if previous.get(key, {}).get("hash") != digest:
+                changed_shards[key] = content
+
+        keys = [entry["key"] for entry in entries]
+        if len(set(keys)) != len(keys):
+            duplicates = sorted({key for key in keys if keys.count(key) > 1})
+            raise ValueError(f"duplicate AITuber key: {', '.join(duplicates)}")
+        removed = set(previous) - set(keys)
+        if not changed_shards and not removed and entries == manifest["entries"]:
+            return False
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        for key, content in changed_shards.items():
+            write_atomic(self.shard_path(key), content)
+        for key in removed:
+            self.shard_path(key).unlink(missing_ok=True)
+
+        data["lastUpdated"] = last_updated or datetime.now(JST).isoformat()
+        write_atomic(
+            self.manifest_path,
+            serialize_aitubers({"lastUpdated": data["lastUpdated"], "entries": entries}),
+        )
+        return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AITuberデータの保存形式を変換します")
+    parser.add_argument(
+        "command",
+        choices=["split", "combine"],
+        help="split: aitubers.json をシャードに分割 / combine: シャードから aitubers.json を生成",
+    )
+    args = parser.parse_args()
+
+    # 変換では lastUpdated を変換元の値のまま引き継ぐ
+    if args.command == "split":
+        data = load_aitubers(DATA_PATH)
+        changed = ShardStore().save(data, last_updated=data["lastUpdated"])
+    else:
+        data = ShardStore().load()
+        content = serialize_aitubers({"lastUpdated": data["lastUpdated"], "aitubers": list(data["aitubers"])})
+        changed = not DATA_PATH.exists() or DATA_PATH.read_bytes() != content
+        if changed:
+            write_atomic(DATA_PATH, content)
+    print(f"{args.command}: {'written' if changed else 'no changes'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""aitubers.json からフロントエンド用のデータを生成するビルドステップ
+
+app/data/generated/ に次の3つを書き出す。
+
+- aitubers-list.json: 一覧（カード・リスト・フィルター・並び替え）で使う項目だけを
+  残した軽量なデータ。recentYoutubeVideos は最新の1件だけにする
+- aitubers/<slug>.json: 詳細ページ用の1件1ファイルのデータ（全項目）
+- index.json: slug から詳細ファイルを引く索引
+
+あわせて、一覧の検索で使う索引（search_index.py）を public/data/search-index.json に
+書き出す。ブラウザは検索を始めたときにこのファイルを読み込む。
+
+内容が変わったファイルだけを書き換え、ロスターから消えたエントリの詳細ファイルは削除する。
+生成したファイルはコミットせず、npm run dev / npm run build（build:data）と
+デプロイのワークフローがビルドの前に毎回生成する。
+
+    python scripts/build_aituber_data.py
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from aituber_data import aituber_key, load_aitubers, serialize_aitubers, write_atomic
+from search_index import build_search_index, load_search_index, serialize_search_index
+
+
+GENERATED_DIR = Path("app/data/generated")
+LIST_NAME = "aitubers-list.json"
+INDEX_NAME = "index.json"
+DETAIL_DIR_NAME = "aitubers"
+SEARCH_INDEX_PATH = Path("public/data/search-index.json")
+
+# 一覧で表示・検索・並び替えに使う項目。slug の計算に必要な twitchUserID も含む
+LIST_FIELDS = (
+    "name",
+    "description",
+    "tags",
+    "twitterID",
+    "youtubeChannelID",
+    "imageUrl",
+    "youtubeSubscribers",
+    "latestVideoTitle",
+    "latestVideoThumbnail",
+    "latestVideoUrl",
+    "latestVideoDate",
+    "isUpcoming",
+    "twitchLogin",
+    "twitchUserID",
+    "twitchURL",
+    "twitchFollowers",
+    "twitchIsLive",
+    "twitchTitle",
+    "twitchThumbnail",
+    "twitchContentUrl",
+    "twitchContentDate",
+)
+# recentYoutubeVideos がない場合の最新動画。ある場合は一覧では使わない
+LATEST_VIDEO_FALLBACK_FIELDS = ("latestVideoTitle", "latestVideoThumbnail", "latestVideoDate")
+
+
+def content_timestamp(date: str) -> float:
+    """フロントエンドの new Date(date).getTime() || 0 に合わせ、読めない日付は0にする"""
+    try:
+        return datetime.fromisoformat((date or "").replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def latest_youtube_video(videos: list[dict]) -> dict | None:
+    """recentYoutubeVideos のうち最も新しい1件（同じ日時なら先の方）"""
+    latest = None
+    for video in videos:
+        if latest is None or content_timestamp(video.get("date", "")) > content_timestamp(latest.get("date", "")):
+            latest = video
+    return latest
+
+
+def list_entry(aituber: dict) -> dict:
+    """一覧用の1件。getLatestContent が全項目のときと同じ結果になるように、
+    最近の動画は最新の1件だけを残す。"""
+    entry = {field: aituber[field] for field in LIST_FIELDS if field in aituber}
+    latest = latest_youtube_video(aituber.get("recentYoutubeVideos") or [])
+    if latest is not None:
+        entry["recentYoutubeVideos"] = [latest]
+        for field in LATEST_VIDEO_FALLBACK_FIELDS:
+            entry.pop(field, None)
+    return entry
+
+
+def detail_file(slug: str) -> str:
+    return f"{DETAIL_DIR_NAME}/{slug}.json"
+
+
+def write_if_changed(path: Path, content: bytes) -> bool:
+    if path.exists() and path.read_bytes() == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, content)
+    return True
+
+
+def build(data: dict, output_dir: Path = GENERATED_DIR) -> dict[str, int]:
+    """一覧・詳細・索引を書き出し、書き換えたファイル数などを返す"""
+    entries = []
+    details = {}
+    for aituber in data["aitubers"]:
+        slug = aituber_key(aituber)
+        if slug in details:
+            raise ValueError(f"duplicate AITuber slug: {slug}")
+        details[slug] = serialize_aitubers(aituber)
+        entries.append(list_entry(aituber))
+
+    stats = {"entries": len(entries), "written": 0, "removed": 0}
+    outputs = {
+        output_dir / LIST_NAME: {"lastUpdated": data["lastUpdated"], "aitubers": entries},
+        output_dir / INDEX_NAME: {
+            "lastUpdated": data["lastUpdated"],
+            "entries": {slug: detail_file(slug) for slug in details},
+        },
+    }
+    for path, payload in outputs.items():
+        stats["written"] += write_if_changed(path, serialize_aitubers(payload))
+    for slug, content in details.items():
+        stats["written"] += write_if_changed(output_dir / detail_file(slug), content)
+
+    detail_dir = output_dir / DETAIL_DIR_NAME
+    expected = {Path(detail_file(slug)).name for slug in details}
+    for path in sorted(detail_dir.glob("*.json")):
+        if path.name not in expected:
+            path.unlink()
+            stats["removed"] += 1
+    return stats
+
+
+def build_search(data: dict, path: Path = SEARCH_INDEX_PATH) -> dict[str, int]:
+    """検索用の索引を書き出す。名前・説明が前回から変わっていないエントリは再利用する"""
+    index, reused = build_search_index(data["aitubers"], load_search_index(path))
+    written = write_if_changed(path, serialize_search_index(index))
+    return {"grams": len(index["grams"]), "reused": reused, "written": int(written)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="フロントエンド用の一覧・詳細データを生成します")
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=None,
+        help="読み込むaitubers.jsonまたはシャードのディレクトリ（省略時は AITUBERS_STORE に従う）",
+    )
+    parser.add_argument("--output", type=Path, default=GENERATED_DIR, help="出力先のディレクトリ")
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        default=SEARCH_INDEX_PATH,
+        help="検索用の索引を書き出すJSONファイル",
+    )
+    args = parser.parse_args()
+
+    data = load_aitubers(args.source)
+    stats = build(data, args.output)
+    print(
+        f"Built {stats['entries']} entries: "
+        f"{stats['written']} files written, {stats['removed']} removed"
+    )
+    search = build_search(data, args.search_index)
+    print(
+        f"Search index: {search['grams']} grams, {search['reused']}/{stats['entries']} entries reused, "
+        f"{'written' if search['written'] else 'no changes'}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
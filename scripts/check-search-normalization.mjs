@@ -0,0 +1,61 @@
+#!/usr/bin/env node
+
+// Check that lib/search.ts normalizes text exactly like scripts/search_index.py.
+// Both sides are tested against tests/fixtures/search_normalization.json
+// (the Python side in tests/test_search_index.py).
+
+import { mkdtemp, readFile, rm, writeFile } from 'fs/promises';
+import os from 'os';
+import path from 'path';
+import { pathToFileURL } from 'url';
+import ts from 'typescript';
+
+const SOURCE = 'lib/search.ts';
+const FIXTURE = 'tests/fixtures/search_normalization.json';
+
+async function loadSearchModule() {
+  // lib/search.ts has only type imports, so a plain transpile is enough to run it
+  const source = await readFile(SOURCE, 'utf8');
+  const { outputText } = ts.transpileModule(source, {
+    compilerOptions: { module: ts.ModuleKind.ESNext, target: ts.ScriptTarget.ES2020 },
+  });
+  const dir = await mkdtemp(path.join(os.tmpdir(), 'search-normalization-'));
+  const file = path.join(dir, 'search.mjs');
+  await writeFile(file, outputText);
+  try {
+    return await import(pathToFileURL(file).href);
+  } finally {
+    await rm(dir, { recursive: true, force: true });
+  }
+}
+
+async function main() {
+  const { fold, romanize, textGrams } = await loadSearchModule();
+  const fixture = JSON.parse(await readFile(FIXTURE, 'utf8'));
+
+  let failures = 0;
+  for (const testCase of fixture.cases) {
+    const folded = fold(testCase.input);
+    const actual = {
+      folded,
+      romanized: romanize(folded, fixture.romaji),
+      grams: textGrams(folded, fixture.gramSize).sort(),
+    };
+    // Compare the grams as sets; sort() orders by UTF-16 code unit, not by code point like Python
+    const expected = { ...testCase, grams: [...testCase.grams].sort() };
+    for (const key of Object.keys(actual)) {
+      if (JSON.stringify(actual[key]) !== JSON.stringify(expected[key])) {
+        failures++;
+        console.error(`${JSON.stringify(testCase.input)} ${key}: expected ${JSON.stringify(expected[key])}, got ${JSON.stringify(actual[key])}`);
+      }
+    }
+  }
+
+  console.log(`${fixture.cases.length} cases, ${failures} mismatches`);
+  process.exitCode = failures ? 1 : 0;
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exitCode = 1;
+});
@@ -0,0 +1,126 @@
+"""Shared keep-alive HTTP transport for the updater scripts.
+
+Every request made by update_aitubers.py, refresh_youtube_rss.py and
+add_aitubers.py goes through one httpx.Client, so connections to
+api.twitch.tv, id.twitch.tv and www.youtube.com are pooled per host and
+reused instead of paying a TCP+TLS handshake per call. httpx negotiates
+gzip/deflate and decodes the body transparently.
+
+Asyncio code (the RSS refresher) cannot share a sync client, so
+build_async_http_client() returns a new httpx.AsyncClient with the same
+timeouts, headers and metrics; the caller owns and closes it.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import httpx
+
+from run_metrics import MetricsAsyncTransport, MetricsTransport
+
+
+DEFAULT_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 10.0
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+
+_client: httpx.Client | None = None
+_options: dict = {}
+_defaults: dict = {}
+_lock = threading.Lock()
+
+
+def _build_client(
+    timeout: float = DEFAULT_TIMEOUT,
+    max_connections: int = MAX_CONNECTIONS,
+    transport: httpx.BaseTransport | None = None,
+    async_transport_factory=None,
+    **options,
+) -> httpx.Client:
+    if transport is None:
+        transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(MAX_KEEPALIVE_CONNECTIONS, max_connections),
+            )
+        )
+    return httpx.Client(
+        timeout=httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout)),
+        # Every request is timed and counted per endpoint for the run report.
+        transport=MetricsTransport(transport),
+        headers={"Accept-Encoding": "gzip, deflate"},
+        follow_redirects=True,
+        **options,
+    )
+
+
+def build_async_http_client(
+    timeout: float = DEFAULT_TIMEOUT,
+    max_connections: int = MAX_CONNECTIONS,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """Return a new AsyncClient; the caller closes it (async with ...).
+
+    set_client_defaults(async_transport_factory=...) supplies the transport as
+    factory(limits), since async callers may build several clients per run.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(MAX_KEEPALIVE_CONNECTIONS, max_connections),
+    )
+    if transport is None:
+        factory = _defaults.get("async_transport_factory")
+        transport = factory(limits) if factory else httpx.AsyncHTTPTransport(limits=limits)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout)),
+        transport=MetricsAsyncTransport(transport),
+        headers={"Accept-Encoding": "gzip, deflate"},
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _build_client(**{**_defaults, **_options})
+        return _client
+
+
+def configure_http_client(**options) -> None:
+    """Replace the shared client, e.g. configure_http_client(timeout=20, max_connections=16).
+
+    Extra keyword arguments are passed to httpx.Client (tests use transport=).
+    """
+    global _client, _options
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _options = options
+
+
+def set_client_defaults(**options) -> None:
+    """Set options applied to every client built from now on, including ones the
+    scripts create through configure_http_client (the benchmark harness uses this
+    to route all traffic through its stub server with transport= and
+    async_transport_factory=).
+    """
+    global _client, _defaults
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _defaults = options
+
+
+def close_http_client() -> None:
+    """Close the shared client and drop any configure_http_client options."""
+    global _client, _options
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _options = {}
@@ -0,0 +1,142 @@
+"""ロスターの各エントリを活動状況に応じた間隔で更新するためのスケジューラ
+
+配信中・配信予定のエントリは毎回、最近投稿があったエントリは短い間隔、
+長く動きのないエントリは長い間隔で更新する。次回の更新予定時刻は
+.cache/refresh-schedule.json に aituber_key ごとに保存する。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from aituber_data import aituber_key
+
+
+SCHEDULE_PATH = Path(".cache/refresh-schedule.json")
+HOUR = 60 * 60
+# (最後の投稿・配信からの日数の上限, 更新間隔の時間数)
+ACTIVITY_TIERS = [(7, 1), (30, 6), (180, 24)]
+# 上のどれにも当てはまらない（半年以上動きがない・日付が分からない）エントリ
+DORMANT_INTERVAL_HOURS = 72
+# 登録者数がこれ以上のチャンネルは更新間隔を半分にする
+POPULAR_SUBSCRIBERS = 100_000
+
+# 1回のAPI呼び出しでまとめて取得できる件数（update_aitubers.py と同じ）
+YOUTUBE_BATCH_SIZE = 50
+TWITCH_BATCH_SIZE = 100
+
+
+def parse_timestamp(value: str) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def last_activity(aituber: dict) -> datetime | None:
+    """最新動画・最近の動画・Twitchの最新コンテンツのうち最も新しい日時"""
+    dates = [aituber.get("latestVideoDate", ""), aituber.get("twitchContentDate", "")]
+    dates += [video.get("date", "") for video in aituber.get("recentYoutubeVideos", [])]
+    parsed = [date for date in map(parse_timestamp, dates) if date]
+    return max(parsed, default=None)
+
+
+def refresh_interval(aituber: dict, now: float | None = None) -> float:
+    """次の更新までの秒数。配信中・配信予定なら0（毎回更新）。"""
+    if aituber.get("twitchIsLive") or aituber.get("isUpcoming"):
+        return 0
+    now = time.time() if now is None else now
+    hours = DORMANT_INTERVAL_HOURS
+    activity = last_activity(aituber)
+    if activity:
+        idle_days = (now - activity.timestamp()) / (24 * HOUR)
+        for max_days, tier_hours in ACTIVITY_TIERS:
+            if idle_days <= max_days:
+                hours = tier_hours
+                break
+    if aituber.get("youtubeSubscribers", 0) >= POPULAR_SUBSCRIBERS:
+        hours /= 2
+    return hours * HOUR
+
+
+def estimate_requests(youtube_count: int, twitch_count: int) -> int:
+    """YouTube・Twitchのエントリ数から、1回の更新で発生するAPI呼び出し数の上限を見積もる。
+
+    YouTubeは channels / videos の一括取得と、チャンネルごとの playlistItems。
+    Twitchは users / streams の一括取得と、配信していないユーザーごとの videos。
+    """
+    youtube = (
+        math.ceil(youtube_count / YOUTUBE_BATCH_SIZE)
+        + youtube_count
+        + math.ceil(youtube_count * 2 / YOUTUBE_BATCH_SIZE)
+    )
+    twitch = 2 * math.ceil(twitch_count / TWITCH_BATCH_SIZE) + twitch_count
+    return youtube + twitch
+
+
+class RefreshSchedule:
+    """エントリごとの次回更新予定時刻（UNIX時刻）を保存するJSONサイドカー"""
+
+    def __init__(self, path: Path = SCHEDULE_PATH):
+        self.path = path
+        self.entries: dict[str, float] = {}
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.entries = {}
+
+    def next_due(self, aituber: dict) -> float:
+        """次回の更新予定時刻。まだ一度も更新していないエントリは0（すぐに更新）。"""
+        return self.entries.get(aituber_key(aituber), 0)
+
+    def is_due(self, aituber: dict, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return self.next_due(aituber) <= now
+
+    def select_due(self, aitubers, now=None, request_budget=None) -> list[dict]:
+        """更新予定時刻を過ぎたエントリを、配信中・配信予定、予定時刻の古い順に返す。
+
+        request_budget を指定した場合は、見積もったAPI呼び出し数がそれを
+        超えない範囲のエントリだけを返す。残りは次回以降に回す。
+        """
+        now = time.time() if now is None else now
+        keys = {aituber_key(aituber) for aituber in aitubers}
+        self.entries = {key: due for key, due in self.entries.items() if key in keys}
+
+        due = [aituber for aituber in aitubers if self.is_due(aituber, now)]
+        due.sort(
+            key=lambda aituber: (
+                not (aituber.get("twitchIsLive") or aituber.get("isUpcoming")),
+                self.next_due(aituber),
+            )
+        )
+        if request_budget is None:
+            return due
+
+        selected = []
+        youtube_count = twitch_count = 0
+        for aituber in due:
+            youtube = youtube_count + bool(aituber.get("youtubeChannelID"))
+            twitch = twitch_count + bool(aituber.get("twitchLogin"))
+            if estimate_requests(youtube, twitch) > request_budget:
+                break
+            selected.append(aituber)
+            youtube_count, twitch_count = youtube, twitch
+        return selected
+
+    def mark_refreshed(self, aituber: dict, now: float | None = None) -> None:
+        """更新後の状態から次回の更新予定時刻を決める"""
+        now = time.time() if now is None else now
+        self.entries[aituber_key(aituber)] = now + refresh_interval(aituber, now)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, sort_keys=True), encoding="utf-8")
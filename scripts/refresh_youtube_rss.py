@@ -1,58 +1,366 @@
 #!/usr/bin/env python3
-"""Refresh recent YouTube content from public RSS feeds without API credentials."""
+"""Refresh recent YouTube content from public RSS feeds without API credentials.
+
+Feeds are fetched on one asyncio event loop by default (--engine async), with
+hundreds in flight, jittered retries and a whole-run --deadline. Feeds still
+pending at the deadline are reported as deferred and keep their current data
+until the next run. --engine threads keeps the previous thread-pool fetcher.
+"""
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
+import copy
 import json
-import re
+import random
+import threading
 import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
-from urllib.request import Request, urlopen
+
+import httpx
+
+from aituber_data import load_aitubers, save_aitubers
+from http_client import build_async_http_client, configure_http_client, get_http_client
+from run_metrics import default_report_path, endpoint_name, metrics
+from tag_rules import TAG_RULES_PATH, TagMatcher, apply_tags
 
 
-DATA_PATH = Path("app/data/aitubers.json")
+FEED_CACHE_PATH = Path(".cache/youtube-feeds.json")
+FEED_URL = "https://www.youtube.com/feeds/videos.xml"
+FEED_HEADERS = {"User-Agent": "Mozilla/5.0 AITuberList RSS updater"}
+FEED_TIMEOUT = 20.0
+# asyncio engine: feeds in flight at once, whole-run deadline and retry policy
+FEED_CONCURRENCY = 200
+# httpcore scans its whole pool for every queued request, so large pools cost
+# O(n^2) CPU; in-flight feeds are spread over several small clients instead.
+POOL_SHARD_SIZE = 8
+FEED_DEADLINE = 300.0
+FEED_RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
 ATOM = {"atom": "http://www.w3.org/2005/Atom", "media": "http://search.yahoo.com/mrss/"}
-ASMR_PATTERN = re.compile(
-    r"(?:\bASMR\b|ＡＳＭＲ|耳かき|耳掃除|音フェチ|ear\s*(?:cleaning|massage))",
-    re.IGNORECASE,
-)
+ENTRY_TAG = f"{{{ATOM['atom']}}}entry"
 
 
-def fetch_feed(channel_id: str) -> list[dict[str, str]]:
-    request = Request(
-        f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}",
-        headers={"User-Agent": "Mozilla/5.0 AITuberList RSS updater"},
-    )
-    with urlopen(request, timeout=20) as response:
-        root = ET.fromstring(response.read())
+class FeedParser:
+    """Incremental Atom parser that stops after max_entries and drops finished entries."""
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries
+        self.contents: list[dict[str, str]] = []
+        self.complete = False
+        self._seen_urls: set[str] = set()
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: ET.Element | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.max_entries is not None and len(self.contents) >= self.max_entries
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse one chunk; return True once enough entries have been collected."""
+        self._parser.feed(chunk)
+        self._read_events()
+        return self.done
+
+    def close(self) -> list[dict[str, str]]:
+        """Finish a fully received document and return the parsed entries."""
+        if not self.done:
+            self._parser.close()
+            self._read_events()
+            self.complete = True
+        return self.contents
+
+    def _read_events(self) -> None:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            if element.tag != ENTRY_TAG or self.done:
+                continue
+            self._add_entry(element)
+            element.clear()
+            if self._root is not None:
+                self._root.remove(element)
 
-    contents: list[dict[str, str]] = []
-    seen_urls: set[str] = set()
-    for entry in root.findall("atom:entry", ATOM):
+    def _add_entry(self, entry: ET.Element) -> None:
         link = entry.find("atom:link", ATOM)
         thumbnail = entry.find("media:group/media:thumbnail", ATOM)
         url = link.get("href", "") if link is not None else ""
-        if not url or url in seen_urls:
-            continue
-        seen_urls.add(url)
-        contents.append({
+        if not url or url in self._seen_urls:
+            return
+        self._seen_urls.add(url)
+        self.contents.append({
             "title": entry.findtext("atom:title", default="", namespaces=ATOM),
             "url": url,
             "thumbnail": thumbnail.get("url", "") if thumbnail is not None else "",
             "date": entry.findtext("atom:published", default="", namespaces=ATOM),
         })
-    return contents
 
 
-def should_add_asmr(aituber: dict, contents: list[dict[str, str]]) -> tuple[bool, list[str]]:
-    title_hits = [item["title"] for item in contents if ASMR_PATTERN.search(item["title"])]
-    name_hit = bool(ASMR_PATTERN.search(aituber.get("name", "")))
-    description_hit = bool(ASMR_PATTERN.search(aituber.get("description", "")))
-    qualifies = name_hit or len(title_hits) >= 2 or (description_hit and len(title_hits) >= 1)
-    return qualifies, title_hits
+class FeedCache:
+    """On-disk ETag / Last-Modified validators and parsed entries, keyed by channel ID."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.entries = {}
+
+    def _usable(self, channel_id: str, max_entries: int | None) -> dict | None:
+        """Return the cached entry if it holds at least max_entries parsed entries."""
+        cached = self.entries.get(channel_id)
+        if cached is None:
+            return None
+        if cached.get("complete", True):
+            return cached
+        if max_entries is not None and len(cached["contents"]) >= max_entries:
+            return cached
+        return None
+
+    def validators(self, channel_id: str, max_entries: int | None = None) -> dict[str, str]:
+        cached = self._usable(channel_id, max_entries) or {}
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("lastModified"):
+            headers["If-Modified-Since"] = cached["lastModified"]
+        return headers
+
+    def hit(self, channel_id: str, max_entries: int | None = None) -> list[dict[str, str]] | None:
+        cached = self._usable(channel_id, max_entries)
+        if cached is None:
+            return None
+        with self.lock:
+            self.hits += 1
+        # Callers rewrite entries in place (apply_canonical_latest), so hand out copies
+        return copy.deepcopy(cached["contents"][:max_entries])
+
+    def store(self, channel_id: str, headers, contents: list[dict[str, str]], complete: bool = True) -> None:
+        with self.lock:
+            self.misses += 1
+            if headers.get("ETag") or headers.get("Last-Modified"):
+                self.entries[channel_id] = {
+                    "etag": headers.get("ETag", ""),
+                    "lastModified": headers.get("Last-Modified", ""),
+                    "contents": copy.deepcopy(contents),
+                    "complete": complete,
+                }
+            else:
+                self.entries.pop(channel_id, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, ensure_ascii=False), encoding="utf-8")
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def feed_headers(channel_id: str, cache: FeedCache | None, max_entries: int | None) -> dict[str, str]:
+    headers = dict(FEED_HEADERS)
+    if cache is not None:
+        headers.update(cache.validators(channel_id, max_entries))
+    return headers
+
+
+def fetch_feed(
+    channel_id: str, cache: FeedCache | None = None, max_entries: int | None = None
+) -> list[dict[str, str]]:
+    with get_http_client().stream(
+        "GET",
+        FEED_URL,
+        params={"channel_id": channel_id},
+        headers=feed_headers(channel_id, cache, max_entries),
+    ) as response:
+        if response.status_code == 304 and cache is not None:
+            cached = cache.hit(channel_id, max_entries)
+            if cached is not None:
+                return cached
+        response.raise_for_status()
+
+        chunks = response.iter_bytes()
+        parser = FeedParser(max_entries)
+        for chunk in chunks:
+            if parser.feed(chunk):
+                break
+        else:
+            parser.close()
+        # Read (without parsing) whatever is left so the connection returns to the pool.
+        for _ in chunks:
+            pass
+
+    if cache is not None:
+        cache.store(channel_id, response.headers, parser.contents, parser.complete)
+    return parser.contents
+
+
+async def fetch_feed_async(
+    client: httpx.AsyncClient,
+    channel_id: str,
+    cache: FeedCache | None = None,
+    max_entries: int | None = None,
+) -> list[dict[str, str]]:
+    """fetch_feed for the asyncio engine, on a caller-owned AsyncClient."""
+    async with client.stream(
+        "GET",
+        FEED_URL,
+        params={"channel_id": channel_id},
+        headers=feed_headers(channel_id, cache, max_entries),
+    ) as response:
+        if response.status_code == 304 and cache is not None:
+            cached = cache.hit(channel_id, max_entries)
+            if cached is not None:
+                return cached
+        response.raise_for_status()
+
+        chunks = response.aiter_bytes()
+        parser = FeedParser(max_entries)
+        async for chunk in chunks:
+            if parser.feed(chunk):
+                break
+        else:
+            parser.close()
+        async for _ in chunks:
+            pass
+
+    if cache is not None:
+        cache.store(channel_id, response.headers, parser.contents, parser.complete)
+    return parser.contents
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff, so retries after a shared hiccup spread out."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+async def fetch_feed_with_retry(
+    client: httpx.AsyncClient,
+    channel_id: str,
+    cache: FeedCache | None = None,
+    max_entries: int | None = None,
+    retries: int = FEED_RETRIES,
+    stop_at: float | None = None,
+) -> list[dict[str, str]]:
+    """Retry transport errors, 429 and 5xx; never sleep past the run deadline (loop time)."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        try:
+            return await fetch_feed_async(client, channel_id, cache, max_entries)
+        except Exception as error:
+            if attempt == retries or not is_retryable(error):
+                raise
+            delay = retry_delay(attempt)
+            if stop_at is not None and loop.time() + delay >= stop_at:
+                raise
+            request = getattr(error, "request", None)
+            metrics.add_retry(endpoint_name(request.url if request is not None else FEED_URL))
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def refresh_feeds_async(
+    channel_ids: list[str],
+    cache: FeedCache | None = None,
+    max_entries: int | None = None,
+    concurrency: int = FEED_CONCURRENCY,
+    deadline: float | None = FEED_DEADLINE,
+    retries: int = FEED_RETRIES,
+    timeout: float = FEED_TIMEOUT,
+) -> tuple[dict[str, list[dict[str, str]]], dict[str, str], list[str]]:
+    """Fetch every feed on one event loop with at most `concurrency` in flight.
+
+    Returns (feeds, errors, deferred). Feeds still pending when the deadline
+    passes are cancelled and listed as deferred; their entries keep the data
+    they already have and are retried on the next run.
+    """
+    feeds: dict[str, list[dict[str, str]]] = {}
+    errors: dict[str, str] = {}
+    if not channel_ids:
+        return feeds, errors, []
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline if deadline else None
+    shard_size = min(POOL_SHARD_SIZE, concurrency)
+    shard_count = -(-concurrency // shard_size)
+
+    async with contextlib.AsyncExitStack() as stack:
+        shards = [
+            (
+                await stack.enter_async_context(
+                    build_async_http_client(timeout=timeout, max_connections=shard_size)
+                ),
+                asyncio.Semaphore(shard_size),
+            )
+            for _ in range(shard_count)
+        ]
+
+        async def refresh(index: int, channel_id: str) -> None:
+            client, semaphore = shards[index % shard_count]
+            async with semaphore:
+                try:
+                    feeds[channel_id] = await fetch_feed_with_retry(
+                        client, channel_id, cache, max_entries, retries, stop_at
+                    )
+                except Exception as error:
+                    errors[channel_id] = f"{type(error).__name__}: {error}"
+                    metrics.record_error("rss", error)
+
+        tasks = [asyncio.create_task(refresh(index, channel_id)) for index, channel_id in enumerate(channel_ids)]
+        _, pending = await asyncio.wait(tasks, timeout=deadline or None)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    deferred = [channel_id for channel_id in channel_ids if channel_id not in feeds and channel_id not in errors]
+    for _ in deferred:
+        metrics.record_error("rss", "deferred")
+    return feeds, errors, deferred
+
+
+def refresh_feeds_threaded(
+    channel_ids: list[str],
+    cache: FeedCache | None = None,
+    max_entries: int | None = None,
+    workers: int = 12,
+) -> tuple[dict[str, list[dict[str, str]]], dict[str, str], list[str]]:
+    """The thread-pool engine: no deadline, so nothing is ever deferred."""
+    feeds: dict[str, list[dict[str, str]]] = {}
+    errors: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_feed, channel_id, cache, max_entries): channel_id for channel_id in channel_ids}
+        for future in as_completed(futures):
+            channel_id = futures[future]
+            try:
+                feeds[channel_id] = future.result()
+            except Exception as error:
+                errors[channel_id] = f"{type(error).__name__}: {error}"
+                metrics.record_error("rss", error)
+    return feeds, errors, []
+
+
+def parse_feed(document: bytes, max_entries: int | None = None) -> list[dict[str, str]]:
+    parser = FeedParser(max_entries)
+    if not parser.feed(document):
+        parser.close()
+    return parser.contents
 
 
 def extract_video_id(url: str) -> str:
@@ -83,27 +391,79 @@ def apply_canonical_latest(aituber: dict, contents: list[dict[str, str]]) -> Non
             return
 
 
+def tag_matcher(args) -> TagMatcher | None:
+    """The matcher selected by --apply-tags / --apply-asmr, or None when tagging is off."""
+    if args.apply_tags is None and not args.apply_asmr:
+        return None
+    if args.apply_tags == []:
+        return TagMatcher.from_file(args.tag_rules)
+    tags = set(args.apply_tags or [])
+    if args.apply_asmr:
+        tags.add("ASMR")
+    return TagMatcher.from_file(args.tag_rules, tags)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--apply-asmr", action="store_true", help="Add ASMR tags when evidence is strong")
+    parser.add_argument(
+        "--apply-tags",
+        nargs="*",
+        metavar="TAG",
+        help="Add tags from --tag-rules when evidence is strong (all rules if no TAG is given)",
+    )
+    parser.add_argument("--apply-asmr", action="store_true", help="Shorthand for --apply-tags ASMR")
+    parser.add_argument("--tag-rules", type=Path, default=TAG_RULES_PATH, help="Tag rule file")
     parser.add_argument("--dry-run", action="store_true", help="Inspect results without writing data")
-    parser.add_argument("--workers", type=int, default=12)
+    parser.add_argument("--engine", choices=["async", "threads"], default="async", help="Feed fetching engine")
+    parser.add_argument("--workers", type=int, default=12, help="Threads for --engine threads")
+    parser.add_argument(
+        "--concurrency", type=int, default=FEED_CONCURRENCY, help="Feeds in flight at once for --engine async"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=FEED_DEADLINE,
+        help="Seconds before unfinished feeds are deferred to the next run (async engine; 0 disables)",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=FEED_RETRIES, help="Retries per feed on 429, 5xx or network errors (async engine)"
+    )
+    parser.add_argument("--max-entries", type=int, help="Stop parsing each feed after this many entries")
+    parser.add_argument("--timeout", type=float, default=FEED_TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument("--cache", type=Path, default=FEED_CACHE_PATH, help="ETag / Last-Modified cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Always download full feeds")
+    parser.add_argument("--cache-stats", action="store_true", help="Report feed cache hit/miss counts")
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=default_report_path("refresh_youtube_rss"),
+        help="Write per-endpoint request, latency and error metrics for this run to this JSON file",
+    )
+    parser.add_argument("--metrics-history", type=Path, help="Also append the metrics as one line to this JSONL file")
     args = parser.parse_args()
+    metrics.reset("refresh_youtube_rss")
 
-    data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
-    records = [item for item in data["aitubers"] if item.get("youtubeChannelID")]
-    feeds: dict[str, list[dict[str, str]]] = {}
-    errors: dict[str, str] = {}
+    data = load_aitubers()
+    channel_ids = list(dict.fromkeys(item["youtubeChannelID"] for item in data["aitubers"] if item.get("youtubeChannelID")))
+    cache = None if args.no_cache else FeedCache(args.cache)
 
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = {executor.submit(fetch_feed, item["youtubeChannelID"]): item for item in records}
-        for future in as_completed(futures):
-            item = futures[future]
-            try:
-                feeds[item["youtubeChannelID"]] = future.result()
-            except Exception as error:
-                errors[item["youtubeChannelID"]] = f"{type(error).__name__}: {error}"
+    if args.engine == "async":
+        feeds, errors, deferred = asyncio.run(
+            refresh_feeds_async(
+                channel_ids,
+                cache,
+                args.max_entries,
+                concurrency=args.concurrency,
+                deadline=args.deadline,
+                retries=args.retries,
+                timeout=args.timeout,
+            )
+        )
+    else:
+        configure_http_client(timeout=args.timeout, max_connections=args.workers)
+        feeds, errors, deferred = refresh_feeds_threaded(channel_ids, cache, args.max_entries, args.workers)
 
+    matcher = tag_matcher(args)
     tagged: list[dict[str, object]] = []
     refreshed = 0
     for aituber in data["aitubers"]:
@@ -117,16 +477,33 @@ def main() -> int:
         apply_canonical_latest(aituber, contents)
         aituber["recentYoutubeVideos"] = contents[:3]
         refreshed += 1
-        if args.apply_asmr and "ASMR" not in aituber.get("tags", []):
-            qualifies, evidence = should_add_asmr(aituber, contents)
-            if qualifies:
-                aituber.setdefault("tags", []).append("ASMR")
-                tagged.append({"name": aituber["name"], "evidence": evidence[:5]})
+        if matcher:
+            added = apply_tags(aituber, matcher, contents)
+            if added:
+                tagged.append({"name": aituber["name"], "tags": {tag: evidence[:5] for tag, evidence in added.items()}})
 
-    if not args.dry_run:
-        DATA_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    written = False if args.dry_run else save_aitubers(data)
+    if cache is not None:
+        cache.save()
+        metrics.record_cache("youtube-feeds", **cache.stats())
+    metrics.write(args.metrics, args.metrics_history)
 
-    print(json.dumps({"refreshed": refreshed, "errors": errors, "asmrTagged": tagged}, ensure_ascii=False, indent=2))
+    summary: dict[str, object] = {
+        "refreshed": refreshed,
+        "written": written,
+        "errors": errors,
+        "deferred": deferred,
+        "tagged": tagged,
+        # The pre-rule-engine key, in its old shape, for readers of the ASMR-only summary
+        "asmrTagged": [
+            {"name": item["name"], "evidence": item["tags"]["ASMR"]}
+            for item in tagged
+            if "ASMR" in item["tags"]
+        ],
+    }
+    if args.cache_stats and cache is not None:
+        summary["cache"] = cache.stats()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
     return 0
 
 
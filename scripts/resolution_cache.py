@@ -0,0 +1,83 @@
+"""YouTubeの@handle・カスタムURL → チャンネルIDの解決結果を保存するキャッシュ"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from aituber_data import youtube_identity_key
+
+
+RESOLUTION_CACHE_PATH = Path(".cache/channel-resolution.json")
+# 解決できたhandleは30日、見つからなかったhandleは1日で期限切れにする
+RESOLUTION_TTL = 30 * 24 * 60 * 60
+NEGATIVE_RESOLUTION_TTL = 24 * 60 * 60
+
+
+def _cache_key(reference: str) -> str | None:
+    key = youtube_identity_key(reference)
+    return f"{key[0]}:{key[1]}" if key else None
+
+
+class ChannelResolutionCache:
+    """handle・カスタムURL・/channel/ URLをチャンネルIDに対応付けるJSONサイドカー。
+
+    見つからなかった結果もNoneとして記録し、同じ入力でAPIを呼び直さない。
+    """
+
+    def __init__(
+        self,
+        path: Path = RESOLUTION_CACHE_PATH,
+        ttl: float = RESOLUTION_TTL,
+        negative_ttl: float = NEGATIVE_RESOLUTION_TTL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.entries = {}
+
+    def get(self, reference: str) -> tuple[bool, str | None]:
+        """(キャッシュにあるか, チャンネルID) を返す。期限切れはキャッシュにない扱い。"""
+        key = _cache_key(reference)
+        if key is None:
+            return False, None
+        if key.startswith("youtube:"):
+            return True, key.removeprefix("youtube:")
+        entry = self.entries.get(key)
+        ttl = self.ttl if entry and entry["channelId"] else self.negative_ttl
+        if entry is None or time.time() - entry["resolvedAt"] > ttl:
+            with self.lock:
+                self.misses += 1
+            return False, None
+        with self.lock:
+            self.hits += 1
+        return True, entry["channelId"]
+
+    def put(self, reference: str, channel_id: str | None) -> None:
+        key = _cache_key(reference)
+        if key is None or key.startswith("youtube:"):
+            return
+        with self.lock:
+            self.entries[key] = {"channelId": channel_id, "resolvedAt": time.time()}
+
+    def seed(self, aitubers) -> None:
+        """既存データの youtubeURL（カスタムURL）とチャンネルIDの対応を登録する"""
+        for aituber in aitubers:
+            if aituber.get("youtubeChannelID") and aituber.get("youtubeURL"):
+                self.put(aituber["youtubeURL"], aituber["youtubeChannelID"])
+
+    def save(self) -> None:
+        with self.lock:
+            content = json.dumps(self.entries, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(content, encoding="utf-8")
@@ -0,0 +1,253 @@
+"""Per-run metrics shared by the updater scripts.
+
+Every HTTP request made through the shared httpx client, including the
+YouTube Data API calls, is timed by MetricsTransport (MetricsAsyncTransport
+for the asyncio feed refresher). YouTubeQuotaPool adds the quota units the
+YouTube calls cost. The scripts add cache hit/miss counts and
+per-entry error classes, then write one JSON report per run:
+
+    {"script": ..., "startedAt": ..., "seconds": ...,
+     "endpoints": {"api.twitch.tv/helix/streams": {"requests", "statusCodes",
+                   "errors", "latencyMs": {"p50", "p90", "p99", "max"},
+                   "bytes", "retries", "quotaUnits"}, ...},
+     "caches": {"youtube-feeds": {"hits", "misses", "hitRate"}, ...},
+     "errors": {"update": {"KeyError": 2}, ...}}
+
+With a history path, the report is also appended as one JSON line (keeping
+the last HISTORY_LIMIT runs), so latency or error-rate drift can be tracked
+across runs.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+
+METRICS_DIR = Path(".cache/metrics")
+PERCENTILES = (50, 90, 99)
+# The history file keeps only this many most recent runs
+HISTORY_LIMIT = 2000
+
+
+def default_report_path(script: str) -> Path:
+    return METRICS_DIR / f"{script}.json"
+
+
+def endpoint_name(url: httpx.URL | str) -> str:
+    url = httpx.URL(url)
+    return f"{url.host}{url.path}"
+
+
+def percentile(sorted_values: list[float], rank: int) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(rank / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.status_codes: Counter[int] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.bytes = 0
+        self.retries = 0
+        self.quota_units = 0
+
+    def report(self) -> dict:
+        latencies = sorted(self.latencies)
+        latency_ms = {f"p{rank}": round(percentile(latencies, rank) * 1000, 1) for rank in PERCENTILES}
+        latency_ms["max"] = round(latencies[-1] * 1000, 1) if latencies else 0.0
+        return {
+            "requests": len(self.latencies),
+            "statusCodes": {str(code): count for code, count in sorted(self.status_codes.items())},
+            "errors": dict(self.errors),
+            "latencyMs": latency_ms,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "quotaUnits": self.quota_units,
+        }
+
+
+class RunMetrics:
+    """Thread-safe recorder for one script run; use the module-level `metrics`."""
+
+    def __init__(self, script: str = ""):
+        self.lock = threading.Lock()
+        self.reset(script)
+
+    def reset(self, script: str = "") -> None:
+        with self.lock:
+            self.script = script
+            self.started_at = datetime.now(timezone.utc)
+            self.started = time.perf_counter()
+            self.endpoints: dict[str, _EndpointStats] = defaultdict(_EndpointStats)
+            self.caches: dict[str, Counter[str]] = defaultdict(Counter)
+            self.errors: dict[str, Counter[str]] = defaultdict(Counter)
+
+    def record_request(self, endpoint: str, seconds: float, status: int | None = None, error: str | None = None) -> None:
+        """One request and its time to response headers (or to failure)."""
+        with self.lock:
+            stats = self.endpoints[endpoint]
+            stats.latencies.append(seconds)
+            if status is not None:
+                stats.status_codes[status] += 1
+                if status >= 400:
+                    stats.errors[f"HTTP {status}"] += 1
+            if error:
+                stats.errors[error] += 1
+
+    def add_bytes(self, endpoint: str, count: int) -> None:
+        with self.lock:
+            self.endpoints[endpoint].bytes += count
+
+    def add_retry(self, endpoint: str) -> None:
+        with self.lock:
+            self.endpoints[endpoint].retries += 1
+
+    def add_quota(self, endpoint: str, units: int) -> None:
+        with self.lock:
+            self.endpoints[endpoint].quota_units += units
+
+    def record_cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        with self.lock:
+            self.caches[name]["hits"] += hits
+            self.caches[name]["misses"] += misses
+
+    def record_error(self, stage: str, error: BaseException | str) -> None:
+        """Count a per-entry failure by class name (or by an outcome label)."""
+        name = error if isinstance(error, str) else type(error).__name__
+        with self.lock:
+            self.errors[stage][name] += 1
+
+    def report(self) -> dict:
+        with self.lock:
+            caches = {}
+            for name, counts in sorted(self.caches.items()):
+                total = counts["hits"] + counts["misses"]
+                caches[name] = {
+                    "hits": counts["hits"],
+                    "misses": counts["misses"],
+                    "hitRate": round(counts["hits"] / total, 3) if total else None,
+                }
+            return {
+                "script": self.script,
+                "startedAt": self.started_at.isoformat(timespec="seconds"),
+                "seconds": round(time.perf_counter() - self.started, 3),
+                "endpoints": {name: stats.report() for name, stats in sorted(self.endpoints.items())},
+                "caches": caches,
+                "errors": {stage: dict(counts) for stage, counts in sorted(self.errors.items())},
+            }
+
+    def write(self, path: Path, history_path: Path | None = None) -> dict:
+        report = self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        if history_path is not None:
+            history_path.parent.mkdir(parents=True, exist_ok=True)
+            lines = history_path.read_text(encoding="utf-8").splitlines() if history_path.exists() else []
+            lines.append(json.dumps(report, ensure_ascii=False))
+            history_path.write_text("\n".join(lines[-HISTORY_LIMIT:]) + "\n", encoding="utf-8")
+        return report
+
+
+metrics = RunMetrics()
+
+
+class _CountingStream(httpx.SyncByteStream):
+    def __init__(self, stream, endpoint: str):
+        self.stream = stream
+        self.endpoint = endpoint
+        self.count = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.count += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            metrics.add_bytes(self.endpoint, self.count)
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+
+
+class MetricsTransport(httpx.BaseTransport):
+    """Wrap another transport and record latency, status and bytes per endpoint."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_name(request.url)
+        started = time.perf_counter()
+        try:
+            response = self.transport.handle_request(request)
+        except Exception as error:
+            metrics.record_request(endpoint, time.perf_counter() - started, error=type(error).__name__)
+            raise
+        metrics.record_request(endpoint, time.perf_counter() - started, status=response.status_code)
+        if response.is_stream_consumed:
+            # Already-buffered responses (e.g. from httpx.MockTransport)
+            metrics.add_bytes(endpoint, len(response.content))
+        else:
+            response.stream = _CountingStream(response.stream, endpoint)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _AsyncCountingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, endpoint: str):
+        self.stream = stream
+        self.endpoint = endpoint
+        self.count = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.count += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            metrics.add_bytes(self.endpoint, self.count)
+        if hasattr(self.stream, "aclose"):
+            await self.stream.aclose()
+
+
+class MetricsAsyncTransport(httpx.AsyncBaseTransport):
+    """The asyncio counterpart of MetricsTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_name(request.url)
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as error:
+            metrics.record_request(endpoint, time.perf_counter() - started, error=type(error).__name__)
+            raise
+        metrics.record_request(endpoint, time.perf_counter() - started, status=response.status_code)
+        if response.is_stream_consumed:
+            metrics.add_bytes(endpoint, len(response.content))
+        else:
+            response.stream = _AsyncCountingStream(response.stream, endpoint)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
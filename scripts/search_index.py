@@ -0,0 +1,206 @@
+"""AITuberの名前・説明・タグを検索するための索引
+
+名前と説明は次の正規化をしてから、連続する文字の2-gramに分ける。
+
+- NFKC（全角英数字・半角カナの統一）と lower（大文字小文字の統一）
+- カタカナをひらがなに揃える
+- ひらがなをローマ字にした形も同じ索引に入れる（「nike」で「ニケ」が見つかる）
+
+索引は {"version", "gramSize", "romaji", "docs", "grams", "tags"} の形で、
+grams と tags は 2-gram・タグごとに、一覧用データ（aitubers-list.json）での
+エントリの位置（ordinal）を昇順に並べたポスティングを持つ。検索側はクエリを
+同じ規則で正規化し、ポスティングの積集合を候補にする。ローマ字の変換表
+（romaji）は検索側でクエリを変換するために索引に含める。
+
+検索側（lib/search.ts）も同じ正規化・単語の区切りを実装している。両者が同じ結果に
+なることは tests/fixtures/search_normalization.json で確かめる。
+
+docs には各エントリの名前・説明のハッシュを持たせ、次回の生成時にハッシュが
+変わっていないエントリは前回のポスティングから2-gramを復元して再利用する。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import unicodedata
+from itertools import groupby
+from pathlib import Path
+
+
+SEARCH_INDEX_VERSION = 2
+GRAM_SIZE = 2
+
+# カタカナ（ァ〜ヶ）とひらがな（ぁ〜ゖ）のコードポイントの差
+KANA_OFFSET = ord("ァ") - ord("ぁ")
+SOKUON = "っ"
+LONG_VOWEL = "ー"
+# JavaScriptの toLowerCase は語末の Σ を ς にするため、どちらも σ に揃える
+FINAL_SIGMA = "ς"
+
+_ROWS = {
+    "": "あいうえお",
+    "k": "かきくけこ",
+    "s": "さしすせそ",
+    "t": "たちつてと",
+    "n": "なにぬねの",
+    "h": "はひふへほ",
+    "m": "まみむめも",
+    "y": "や ゆ よ",
+    "r": "らりるれろ",
+    "w": "わゐ ゑを",
+    "g": "がぎぐげご",
+    "z": "ざじずぜぞ",
+    "d": "だぢづでど",
+    "b": "ばびぶべぼ",
+    "p": "ぱぴぷぺぽ",
+}
+_IRREGULAR = {
+    "し": "shi", "ち": "chi", "つ": "tsu", "ふ": "fu", "じ": "ji", "ぢ": "ji", "づ": "zu",
+    "ゐ": "i", "ゑ": "e", "を": "o", "ん": "n", "ゔ": "vu",
+    "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o",
+    "ゃ": "ya", "ゅ": "yu", "ょ": "yo", "ゎ": "wa",
+}
+_DIGRAPH_BASES = {
+    "き": "ky", "ぎ": "gy", "し": "sh", "じ": "j", "ち": "ch", "に": "ny",
+    "ひ": "hy", "び": "by", "ぴ": "py", "み": "my", "り": "ry",
+}
+
+
+def _romaji_table() -> dict[str, str]:
+    table = {}
+    for consonant, row in _ROWS.items():
+        for kana, vowel in zip(row, "aiueo"):
+            if kana != " ":
+                table[kana] = consonant + vowel
+    table.update(_IRREGULAR)
+    for kana, base in _DIGRAPH_BASES.items():
+        for small, vowel in zip("ゃゅょ", "auo"):
+            table[kana + small] = base + vowel
+    return table
+
+
+# ひらがな（拗音は2文字）→ ローマ字（ヘボン式）
+ROMAJI = _romaji_table()
+
+
+def fold(text: str) -> str:
+    """全角・半角、大文字・小文字、カタカナ・ひらがなの違いをなくす。
+
+    lib/search.ts の fold（NFKC + toLowerCase）と同じ結果にするため、casefold
+    （ß → ss など）は使わない。
+    """
+    folded = unicodedata.normalize("NFKC", text or "").lower().replace(FINAL_SIGMA, "σ")
+    return "".join(
+        chr(ord(char) - KANA_OFFSET) if "ァ" <= char <= "ヶ" else char for char in folded
+    )
+
+
+def romanize(folded: str) -> str:
+    """fold 済みの文字列のひらがなをローマ字にする。促音は次の子音を重ね、長音符は落とす"""
+    result = []
+    index = 0
+    while index < len(folded):
+        pair = folded[index:index + 2]
+        char = folded[index]
+        if len(pair) == 2 and pair in ROMAJI:
+            result.append(ROMAJI[pair])
+            index += 2
+            continue
+        if char == SOKUON:
+            following = ROMAJI.get(folded[index + 1:index + 3]) or ROMAJI.get(folded[index + 1:index + 2])
+            if following and following[0] not in "aiueon":
+                result.append(following[0])
+        elif char != LONG_VOWEL:
+            result.append(ROMAJI.get(char, char))
+        index += 1
+    return "".join(result)
+
+
+def is_word_char(char: str) -> bool:
+    """lib/search.ts の [\\p{L}\\p{N}_] と同じ規則（文字・数字の一般カテゴリと _）"""
+    return char == "_" or unicodedata.category(char)[0] in "LN"
+
+
+def text_grams(folded: str) -> set[str]:
+    """単語（記号・空白で区切った文字列）ごとの2-gram。1文字の単語は含めない"""
+    grams = set()
+    for is_word, chars in groupby(folded, is_word_char):
+        if not is_word:
+            continue
+        word = "".join(chars)
+        for start in range(len(word) - GRAM_SIZE + 1):
+            grams.add(word[start:start + GRAM_SIZE])
+    return grams
+
+
+def entry_text(aituber: dict) -> str:
+    return f"{aituber.get('name', '')}\n{aituber.get('description', '')}"
+
+
+def entry_grams(aituber: dict) -> set[str]:
+    """名前・説明を正規化した形と、そのローマ字の形の2-gram"""
+    folded = fold(entry_text(aituber))
+    return text_grams(folded) | text_grams(romanize(folded))
+
+
+def text_hash(aituber: dict) -> str:
+    return hashlib.sha1(entry_text(aituber).encode("utf-8")).hexdigest()[:12]
+
+
+def previous_grams(index: dict | None) -> dict[str, set[str]]:
+    """前回の索引から、名前・説明のハッシュごとの2-gramを復元する"""
+    if not index or index.get("version") != SEARCH_INDEX_VERSION:
+        return {}
+    if index.get("gramSize") != GRAM_SIZE or index.get("romaji") != ROMAJI:
+        return {}
+    by_ordinal: list[set[str]] = [set() for _ in index["docs"]]
+    for gram, postings in index["grams"].items():
+        for ordinal in postings:
+            by_ordinal[ordinal].add(gram)
+    return dict(zip(index["docs"], by_ordinal))
+
+
+def build_search_index(aitubers: list[dict], previous: dict | None = None) -> tuple[dict, int]:
+    """索引を作り、(索引, 前回から再利用したエントリ数) を返す"""
+    reusable = previous_grams(previous)
+    reused = 0
+    docs = []
+    grams: dict[str, list[int]] = {}
+    tags: dict[str, list[int]] = {}
+    for ordinal, aituber in enumerate(aitubers):
+        digest = text_hash(aituber)
+        docs.append(digest)
+        if digest in reusable:
+            entry = reusable[digest]
+            reused += 1
+        else:
+            entry = entry_grams(aituber)
+        for gram in entry:
+            grams.setdefault(gram, []).append(ordinal)
+        for tag in dict.fromkeys(aituber.get("tags", [])):
+            tags.setdefault(tag, []).append(ordinal)
+
+    index = {
+        "version": SEARCH_INDEX_VERSION,
+        "gramSize": GRAM_SIZE,
+        "romaji": ROMAJI,
+        "docs": docs,
+        "grams": dict(sorted(grams.items())),
+        "tags": tags,
+    }
+    return index, reused
+
+
+def load_search_index(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def serialize_search_index(index: dict) -> bytes:
+    """ブラウザで読み込むため、空白を入れずにシリアライズする"""
+    return (json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
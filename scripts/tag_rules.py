@@ -0,0 +1,161 @@
+"""Declarative auto-tagging rules compiled into a single matcher.
+
+Rules are loaded from tag_rules.json, one object per tag:
+
+    "ASMR": {
+        "patterns": ["\\bASMR\\b", "耳かき", ...],  # any of these marks a hit
+        "exclude": [...],                  # a text matching these never counts
+        "minTitleHits": 2,                 # feed titles that alone qualify the tag
+        "nameQualifies": true,             # a hit in the channel name alone qualifies
+        "descriptionTitleHits": 1          # title hits needed with a description hit (null: off)
+    }
+
+Each rule's patterns and exclusions are compiled once into two
+case-insensitive alternations, and every rule's patterns together into one
+zero-width lookahead. scan() runs that lookahead over the text in a single
+pass to find the positions where some tag could start; only at those positions
+are the individual rules tried, and only the tags that hit have their
+exclusions checked. Since the lookahead stops at every start position rather
+than consuming a match, patterns of different tags that match at the same or
+overlapping positions, and one tag's exclusions, never hide another tag's hit.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+
+TAG_RULES_PATH = Path(__file__).with_name("tag_rules.json")
+
+
+class TagRule:
+    def __init__(
+        self,
+        tag: str,
+        patterns: list[str],
+        exclude: list[str] | None = None,
+        min_title_hits: int = 2,
+        name_qualifies: bool = True,
+        description_title_hits: int | None = 1,
+    ):
+        if not patterns:
+            raise ValueError(f"tag rule {tag!r} has no patterns")
+        self.tag = tag
+        self.patterns = list(patterns)
+        self.exclude = list(exclude or [])
+        self.min_title_hits = min_title_hits
+        self.name_qualifies = name_qualifies
+        self.description_title_hits = description_title_hits
+
+    @classmethod
+    def from_config(cls, tag: str, config: dict) -> "TagRule":
+        return cls(
+            tag,
+            config.get("patterns", []),
+            config.get("exclude"),
+            config.get("minTitleHits", 2),
+            config.get("nameQualifies", True),
+            config.get("descriptionTitleHits", 1),
+        )
+
+    def qualifies(self, title_hits: int, name_hit: bool, description_hit: bool) -> bool:
+        if self.name_qualifies and name_hit:
+            return True
+        if title_hits >= self.min_title_hits:
+            return True
+        return (
+            self.description_title_hits is not None
+            and description_hit
+            and title_hits >= self.description_title_hits
+        )
+
+
+def _alternation(patterns: list[str]) -> str:
+    return "|".join(f"(?:{pattern})" for pattern in patterns)
+
+
+def _compile(patterns: list[str]) -> re.Pattern[str] | None:
+    for pattern in patterns:
+        if re.compile(pattern).groupindex:
+            raise ValueError(f"tag patterns may not use named groups: {pattern!r}")
+    if not patterns:
+        return None
+    return re.compile(_alternation(patterns), re.IGNORECASE)
+
+
+class TagMatcher:
+    """Compiled rules; scan() reports which tags a text hits."""
+
+    def __init__(self, rules: list[TagRule]):
+        self.rules = list(rules)
+        # (tag, match, exclude) per rule, compiled once for every text scanned
+        self.compiled: list[tuple[str, re.Pattern[str], re.Pattern[str] | None]] = [
+            (rule.tag, _compile(rule.patterns), _compile(rule.exclude)) for rule in self.rules
+        ]
+        # Zero-width, so finditer stops at every position where any tag's pattern starts
+        self.candidates = re.compile(
+            f"(?={_alternation([pattern for rule in self.rules for pattern in rule.patterns])})",
+            re.IGNORECASE,
+        )
+
+    @classmethod
+    def from_file(cls, path: Path = TAG_RULES_PATH, tags=None) -> "TagMatcher":
+        """Load rules from a JSON file, optionally only for the given tags."""
+        config = json.loads(path.read_text(encoding="utf-8"))
+        unknown = set(tags or []) - set(config)
+        if unknown:
+            raise ValueError(f"no tag rules for: {', '.join(sorted(unknown))}")
+        return cls(
+            TagRule.from_config(tag, rule)
+            for tag, rule in config.items()
+            if tags is None or tag in tags
+        )
+
+    def scan(self, text: str) -> set[str]:
+        """Tags that text counts as a hit for (a match and no exclusion)."""
+        text = text or ""
+        remaining = self.compiled
+        hits = []
+        for candidate in self.candidates.finditer(text):
+            position = candidate.start()
+            matched = [rule for rule in remaining if rule[1].match(text, position)]
+            if matched:
+                hits.extend(matched)
+                remaining = [rule for rule in remaining if rule not in matched]
+                if not remaining:
+                    break
+        return {
+            tag for tag, match, exclude in hits if not (exclude and exclude.search(text))
+        }
+
+    def evaluate(self, aituber: dict, contents: list[dict[str, str]]) -> dict[str, list[str]]:
+        """Return {tag: evidence titles} for every rule the entry qualifies for.
+
+        Tags the entry already has are skipped.
+        """
+        title_hits: dict[str, list[str]] = {}
+        for item in contents:
+            for tag in self.scan(item["title"]):
+                title_hits.setdefault(tag, []).append(item["title"])
+        name_tags = self.scan(aituber.get("name", ""))
+        description_tags = self.scan(aituber.get("description", ""))
+
+        existing = set(aituber.get("tags", []))
+        qualified = {}
+        for rule in self.rules:
+            if rule.tag in existing:
+                continue
+            evidence = title_hits.get(rule.tag, [])
+            if rule.qualifies(len(evidence), rule.tag in name_tags, rule.tag in description_tags):
+                qualified[rule.tag] = evidence
+        return qualified
+
+
+def apply_tags(aituber: dict, matcher: TagMatcher, contents: list[dict[str, str]]) -> dict[str, list[str]]:
+    """Add every qualifying tag to the entry and return {tag: evidence}."""
+    qualified = matcher.evaluate(aituber, contents)
+    if qualified:
+        aituber.setdefault("tags", []).extend(qualified)
+    return qualified
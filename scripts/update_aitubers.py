@@ -1,35 +1,107 @@
+import argparse
+import hashlib
 import json
-from datetime import datetime, timezone, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import pytz
 import os
-from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from pathlib import Path
 
+import httpx
 
-def load_aitubers():
-    """aitubers.jsonを読み込む"""
-    with open("app/data/aitubers.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+from aituber_data import aituber_key, load_aitubers, save_aitubers, write_atomic
+from http_client import DEFAULT_TIMEOUT, configure_http_client, get_http_client
+from refresh_schedule import RefreshSchedule, parse_timestamp
+from refresh_youtube_rss import FEED_CACHE_PATH, FeedCache, extract_video_id, fetch_feed
+from run_metrics import default_report_path, endpoint_name, metrics
+from youtube_quota import (
+    DAILY_QUOTA,
+    PRIORITY_LOW,
+    QuotaExceeded,
+    YouTubeQuotaPool,
+    youtube_api_keys,
+)
 
 
-def save_aitubers(data):
-    """aitubers.jsonを保存する"""
-    with open("app/data/aitubers.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# channels.list / videos.list が1回で受け付けるIDの上限
+YOUTUBE_BATCH_SIZE = 50
 
+# RSSで新着を判定するときに見る最新エントリ数（playlistItemsのmaxResultsと揃える）
+RSS_CHANGE_DEPTH = 2
 
-def request_json(url, *, method="GET", headers=None, data=None):
+# Helixのusers / streamsが1回で受け付けるlogin・user_idの上限
+TWITCH_BATCH_SIZE = 100
+
+# 1秒あたりのリクエスト数の既定値（Twitch Helixのアプリトークンは800ポイント/分）
+YOUTUBE_REQUESTS_PER_SECOND = 10
+TWITCH_REQUESTS_PER_SECOND = 12
+
+# App Access Tokenを保存するディレクトリ。Actionsのキャッシュに含めないよう .cache の外に置く
+TWITCH_TOKEN_DIR = Path.home() / ".local" / "state" / "aituber-list"
+# 期限切れ直前のトークンを使わないよう、この秒数だけ早めに取り直す
+TWITCH_TOKEN_REFRESH_MARGIN = 600
+
+# --live-only で書き出す配信中・配信予定の一覧
+LIVE_STATUS_PATH = Path("public/data/live-status.json")
+# 保存済みの動画の日時がこの範囲内なら、配信中・配信予定の可能性があるとみなして確認する
+LIVE_CHECK_WINDOW = timedelta(hours=12)
+
+
+class TokenBucket:
+    """スレッド間で共有するトークンバケット方式のレート制限"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """トークンが1つ使えるようになるまで待つ"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def chunked(items, size):
+    """リストをsize件ずつに分割する"""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def map_concurrently(func, items, workers=1):
+    """funcを並列に適用し、入力と同じ順序で結果を返す"""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items))
+
+
+def request_json(url, *, method="GET", headers=None, data=None, params=None):
     """JSON APIを呼び出す。認証情報をログへ出さない。"""
-    encoded_data = urlencode(data).encode("utf-8") if data else None
-    request = Request(url, data=encoded_data, headers=headers or {}, method=method)
-    with urlopen(request, timeout=30) as response:
-        return json.loads(response.read().decode("utf-8"))
+    response = get_http_client().request(
+        method, url, headers=headers, data=data, params=params
+    )
+    response.raise_for_status()
+    return response.json()
 
 
-def get_twitch_app_access_token(client_id, client_secret):
-    """Client Credentials FlowでTwitch App Access Tokenを取得する。"""
-    response = request_json(
+def request_twitch_app_access_token(client_id, client_secret):
+    """Client Credentials FlowでTwitch App Access Tokenを発行し、レスポンスを返す。"""
+    return request_json(
         "https://id.twitch.tv/oauth2/token",
         method="POST",
         data={
@@ -38,18 +110,117 @@ def get_twitch_app_access_token(client_id, client_secret):
             "grant_type": "client_credentials",
         },
     )
-    return response["access_token"]
 
 
-def twitch_api_get(path, params, client_id, access_token):
-    query = urlencode(params)
-    return request_json(
-        f"https://api.twitch.tv/helix/{path}?{query}",
-        headers={
-            "Authorization": f"Bearer {access_token}",
-            "Client-Id": client_id,
-        },
-    )
+def get_twitch_app_access_token(client_id, client_secret):
+    """Client Credentials FlowでTwitch App Access Tokenを取得する。"""
+    return request_twitch_app_access_token(client_id, client_secret)["access_token"]
+
+
+def twitch_token_path(client_id):
+    """client_idごとのトークンの保存先。環境変数 TWITCH_TOKEN_DIR で変更できる"""
+    directory = Path(os.environ.get("TWITCH_TOKEN_DIR") or TWITCH_TOKEN_DIR)
+    digest = hashlib.sha256(client_id.encode("utf-8")).hexdigest()[:16]
+    return directory / f"twitch-token-{digest}.json"
+
+
+class TwitchAppToken:
+    """期限を記録し、実行やスクリプトをまたいで使い回すApp Access Token。
+
+    トークンは twitch_token_path のファイル（パーミッション0600）に保存し、
+    Actionsのキャッシュには含めない。期限の TWITCH_TOKEN_REFRESH_MARGIN 秒前に
+    なったら取り直す。twitch_api_get に渡すと、401を受けたときに取り直して
+    1回だけ再試行する。
+    """
+
+    def __init__(self, client_id, client_secret):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.path = twitch_token_path(client_id)
+        self.access_token = None
+        self.expires_at = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            self.access_token = saved["access_token"]
+            self.expires_at = float(saved["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.access_token = None
+            self.expires_at = 0
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # 新しく作るファイルも置き換えるファイルも、所有者だけが読めるようにする
+            if not self.path.exists():
+                self.path.touch(mode=0o600)
+            self.path.chmod(0o600)
+            content = json.dumps(
+                {"access_token": self.access_token, "expires_at": self.expires_at}
+            )
+            write_atomic(self.path, content.encode("utf-8"))
+        except OSError as error:
+            print(f"警告: Twitchトークンを保存できませんでした: {type(error).__name__}")
+
+    def _is_fresh(self):
+        return bool(self.access_token) and (
+            self.expires_at - TWITCH_TOKEN_REFRESH_MARGIN > time.time()
+        )
+
+    def get(self):
+        """有効なトークンを返す。期限が近いか未取得なら発行し直す。"""
+        with self.lock:
+            fresh = self._is_fresh()
+            metrics.record_cache("twitch-token", hits=int(fresh), misses=int(not fresh))
+            if not fresh:
+                response = request_twitch_app_access_token(
+                    self.client_id, self.client_secret
+                )
+                self.access_token = response["access_token"]
+                self.expires_at = time.time() + int(response.get("expires_in", 0))
+                self._save()
+            return self.access_token
+
+    def invalidate(self, access_token):
+        """401になったトークンを破棄する。他のスレッドが取り直し済みなら何もしない。"""
+        with self.lock:
+            if self.access_token == access_token:
+                self.access_token = None
+                self.expires_at = 0
+                self.path.unlink(missing_ok=True)
+
+
+def twitch_api_get(path, params, client_id, access_token, rate_limiter=None):
+    """Helix APIを呼び出す。access_tokenには文字列かTwitchAppTokenを渡す。"""
+    for attempt in range(2):
+        token = (
+            access_token.get()
+            if isinstance(access_token, TwitchAppToken)
+            else access_token
+        )
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            return request_json(
+                f"https://api.twitch.tv/helix/{path}",
+                params=params,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Client-Id": client_id,
+                },
+            )
+        except httpx.HTTPStatusError as error:
+            if (
+                error.response.status_code != 401
+                or attempt
+                or not isinstance(access_token, TwitchAppToken)
+            ):
+                raise
+            access_token.invalidate(token)
+            metrics.add_retry(endpoint_name(error.request.url))
 
 
 def normalize_twitch_thumbnail(url):
@@ -71,18 +242,157 @@ def get_youtube_content_time(video_info, jst):
     )
 
 
-def update_twitch_info(aituber, client_id, access_token):
-    """Twitchプロフィール、配信中状態、最新VODを更新する。"""
+def fetch_twitch_users(logins, client_id, access_token, rate_limiter=None, workers=1, checked=None):
+    """usersを100件ずつまとめて呼び出し、小文字のloginごとのユーザー情報を返す。
+
+    checked にセットを渡すと、取得に成功したバッチのloginを追加する。
+    戻り値にないユーザーが「存在しない」のか「取得失敗」なのかを区別するのに使う。
+    """
+    unique_logins = list(dict.fromkeys(login for login in logins if login))
+
+    def fetch_batch(batch):
+        try:
+            items = twitch_api_get(
+                "users", {"login": batch}, client_id, access_token, rate_limiter
+            ).get("data", [])
+        except Exception as e:
+            metrics.record_error("twitch.users", e)
+            print(f"Error fetching {len(batch)} Twitch users: {e}")
+            return []
+        if checked is not None:
+            checked.update(batch)
+        return items
+
+    users = {}
+    for items in map_concurrently(
+        fetch_batch, chunked(unique_logins, TWITCH_BATCH_SIZE), workers
+    ):
+        for user in items:
+            users[user["login"].lower()] = user
+    return users
+
+
+def fetch_twitch_streams(user_ids, client_id, access_token, rate_limiter=None, workers=1):
+    """streamsを100件ずつまとめて呼び出し、user_idごとの配信情報を返す。
+
+    確認できたユーザーは配信中なら配信情報、オフラインならNoneを値に持つ。
+    取得に失敗したバッチのユーザーは戻り値に含まれない。
+    """
+    unique_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+
+    def fetch_batch(batch):
+        try:
+            items = twitch_api_get(
+                "streams",
+                {"user_id": batch, "first": len(batch)},
+                client_id,
+                access_token,
+                rate_limiter,
+            ).get("data", [])
+        except Exception as e:
+            metrics.record_error("twitch.streams", e)
+            print(f"Error fetching {len(batch)} Twitch streams: {e}")
+            return {}
+        live = {stream["user_id"]: stream for stream in items}
+        return {user_id: live.get(user_id) for user_id in batch}
+
+    streams = {}
+    for statuses in map_concurrently(
+        fetch_batch, chunked(unique_ids, TWITCH_BATCH_SIZE), workers
+    ):
+        streams.update(statuses)
+    return streams
+
+
+def fetch_twitch_latest_videos(user_ids, client_id, access_token, rate_limiter=None, workers=1):
+    """ユーザーごとに最新のアーカイブを取得する。取得に失敗したユーザーは含まれない。"""
+    unique_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+
+    def fetch_latest(user_id):
+        try:
+            videos = twitch_api_get(
+                "videos",
+                {"user_id": user_id, "first": 1, "type": "archive"},
+                client_id,
+                access_token,
+                rate_limiter,
+            ).get("data", [])
+        except Exception as e:
+            metrics.record_error("twitch.videos", e)
+            print(f"Error fetching Twitch videos for {user_id}: {e}")
+            return None
+        return {"video": videos[0] if videos else None}
+
+    return {
+        user_id: result["video"]
+        for user_id, result in zip(
+            unique_ids, map_concurrently(fetch_latest, unique_ids, workers)
+        )
+        if result is not None
+    }
+
+
+def prefetch_twitch_data(
+    aitubers, client_id, access_token, rate_limiter=None, workers=1, checked_logins=None
+):
+    """ロスター全体のTwitchユーザー・配信状態・最新VODをまとめて取得する。
+
+    users と streams は100件ずつのバッチで取得し、videos はオフラインの
+    ユーザーだけ個別に取得する。戻り値は (users, streams, videos)。
+    checked_logins にセットを渡すと、usersで確認できたloginを追加する。
+    """
+    logins = [aituber.get("twitchLogin", "").strip().lower() for aituber in aitubers]
+    users = fetch_twitch_users(
+        logins, client_id, access_token, rate_limiter, workers, checked_logins
+    )
+    user_ids = [user["id"] for user in users.values()]
+    streams = fetch_twitch_streams(user_ids, client_id, access_token, rate_limiter, workers)
+    offline_ids = [
+        user_id for user_id in user_ids if user_id in streams and not streams[user_id]
+    ]
+    videos = fetch_twitch_latest_videos(
+        offline_ids, client_id, access_token, rate_limiter, workers
+    )
+    return users, streams, videos
+
+
+def apply_twitch_stream(aituber, stream):
+    """streamsの結果（配信中なら配信情報、オフラインならNone）で配信中状態を更新する。
+
+    配信が終わった場合は、配信のタイトル・サムネイル・URL・開始時刻を消す。
+    """
+    if not stream:
+        live_url = aituber.get("twitchURL") or f"https://www.twitch.tv/{aituber.get('twitchLogin', '')}"
+        if aituber.get("twitchIsLive") or aituber.get("twitchContentUrl") == live_url:
+            for field in ("twitchTitle", "twitchThumbnail", "twitchContentUrl", "twitchContentDate"):
+                aituber[field] = ""
+        aituber["twitchIsLive"] = False
+        return aituber
+
+    aituber.update(
+        {
+            "twitchIsLive": True,
+            "twitchTitle": stream.get("title", ""),
+            "twitchThumbnail": normalize_twitch_thumbnail(stream.get("thumbnail_url", "")),
+            "twitchContentUrl": aituber.get("twitchURL")
+            or f"https://www.twitch.tv/{aituber['twitchLogin']}",
+            "twitchContentDate": stream.get("started_at", ""),
+        }
+    )
+    return aituber
+
+
+def apply_twitch_info(aituber, users, streams, videos):
+    """事前取得したTwitchの情報でプロフィール、配信中状態、最新VODを更新する。"""
     login = aituber.get("twitchLogin", "").strip().lower()
     if not login:
         return aituber
 
-    users = twitch_api_get("users", {"login": login}, client_id, access_token).get("data", [])
-    if not users:
+    user = users.get(login)
+    if not user:
         print(f"Twitchユーザーが見つかりませんでした: {login}")
         return aituber
 
-    user = users[0]
     user_id = user["id"]
     aituber.update(
         {
@@ -99,29 +409,17 @@ def update_twitch_info(aituber, client_id, access_token):
     if not aituber.get("description"):
         aituber["description"] = user.get("description", "")
 
-    streams = twitch_api_get("streams", {"user_id": user_id}, client_id, access_token).get("data", [])
-    if streams:
-        stream = streams[0]
-        aituber.update(
-            {
-                "twitchIsLive": True,
-                "twitchTitle": stream.get("title", ""),
-                "twitchThumbnail": normalize_twitch_thumbnail(stream.get("thumbnail_url", "")),
-                "twitchContentUrl": aituber["twitchURL"],
-                "twitchContentDate": stream.get("started_at", ""),
-            }
-        )
+    # 配信状態を確認できなかった場合は前回の状態を残す
+    if user_id not in streams:
         return aituber
 
-    aituber["twitchIsLive"] = False
-    videos = twitch_api_get(
-        "videos",
-        {"user_id": user_id, "first": 1, "type": "archive"},
-        client_id,
-        access_token,
-    ).get("data", [])
-    if videos:
-        video = videos[0]
+    stream = streams[user_id]
+    apply_twitch_stream(aituber, stream)
+    if stream:
+        return aituber
+
+    video = videos.get(user_id)
+    if video:
         aituber.update(
             {
                 "twitchTitle": video.get("title", ""),
@@ -134,25 +432,221 @@ def update_twitch_info(aituber, client_id, access_token):
     return aituber
 
 
-def update_aituber_info(aituber, youtube):
-    """各AITuberの情報を更新する"""
-    channel_id = aituber["youtubeChannelID"]
+def update_twitch_info(aituber, client_id, access_token, rate_limiter=None):
+    """1件のTwitchプロフィール、配信中状態、最新VODを更新する。"""
+    users, streams, videos = prefetch_twitch_data(
+        [aituber], client_id, access_token, rate_limiter
+    )
+    return apply_twitch_info(aituber, users, streams, videos)
 
-    # チャンネルIDが空の場合はスキップ
-    if not channel_id:
-        return aituber
 
-    # チャンネル情報の取得（statisticsとsnippetの両方を取得）
-    channel_response = (
-        youtube.channels()
-        .list(part="statistics,snippet,contentDetails", id=channel_id)
-        .execute()
+def fetch_youtube_channels(youtube, channel_ids, workers=1, checked=None):
+    """channels.listを50件ずつまとめて呼び出し、チャンネルIDごとの情報を返す。
+
+    取得に失敗したバッチはログに残して読み飛ばすため、該当チャンネルは
+    戻り値に含まれない。checked にセットを渡すと、取得に成功したバッチの
+    チャンネルIDを追加する（削除されたチャンネルは checked にだけ含まれる）。
+    """
+    unique_ids = list(dict.fromkeys(channel_id for channel_id in channel_ids if channel_id))
+
+    def fetch_batch(batch):
+        try:
+            response = (
+                youtube.channels()
+                .list(part="statistics,snippet,contentDetails", id=",".join(batch))
+                .execute()
+            )
+        except QuotaExceeded:
+            return []
+        except Exception as e:
+            metrics.record_error("youtube.channels", e)
+            print(f"Error fetching {len(batch)} channels: {e}")
+            return []
+        if checked is not None:
+            checked.update(batch)
+        return response.get("items", [])
+
+    channels = {}
+    for items in map_concurrently(
+        fetch_batch, chunked(unique_ids, YOUTUBE_BATCH_SIZE), workers
+    ):
+        for item in items:
+            channels[item["id"]] = item
+    return channels
+
+
+def fetch_upload_candidates(youtube, channel_info):
+    """アップロード再生リストから最新動画の候補を取得する。
+
+    チャンネルごとに1回呼ぶため優先度を低くし、クオータが残り少ないときは
+    後回しにする（その場合は QuotaDeferred を送出し、前回の最新動画を残す）。
+    """
+    # search().list()の代わりにplaylistItems().list()を使用
+    uploads_playlist_id = channel_info["contentDetails"]["relatedPlaylists"]["uploads"]
+    latest_videos = (
+        youtube.playlistItems()
+        .list(part="snippet", playlistId=uploads_playlist_id, maxResults=2)
+        .execute(priority=PRIORITY_LOW)
     )
+    return latest_videos.get("items", [])
 
-    if not channel_response["items"]:
-        return aituber
 
-    channel_info = channel_response["items"][0]
+def fetch_youtube_videos(youtube, video_ids, workers=1, checked=None):
+    """videos.listを50件ずつまとめて呼び出し、動画IDごとの詳細情報を返す。
+
+    checked にセットを渡すと、取得に成功したバッチの動画IDを追加する。
+    戻り値にない動画が「削除・非公開」なのか「取得失敗」なのかを区別するのに使う。
+    """
+    unique_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+
+    def fetch_batch(batch):
+        try:
+            response = (
+                youtube.videos()
+                .list(part="snippet,status,liveStreamingDetails", id=",".join(batch))
+                .execute()
+            )
+        except QuotaExceeded:
+            return []
+        except Exception as e:
+            metrics.record_error("youtube.videos", e)
+            print(f"Error fetching {len(batch)} videos: {e}")
+            return []
+        if checked is not None:
+            checked.update(batch)
+        return response.get("items", [])
+
+    videos = {}
+    for items in map_concurrently(
+        fetch_batch, chunked(unique_ids, YOUTUBE_BATCH_SIZE), workers
+    ):
+        for item in items:
+            videos[item["id"]] = item
+    return videos
+
+
+def stored_video_ids(aituber):
+    """保存済みの最新動画・最近の動画の動画IDを返す"""
+    urls = [aituber.get("latestVideoUrl", "")] + [
+        video.get("url", "") for video in aituber.get("recentYoutubeVideos", [])
+    ]
+    return {extract_video_id(url) for url in urls if url} - {""}
+
+
+def has_new_youtube_content(aituber, contents):
+    """RSSの最新エントリに未知の動画があるか、配信予定枠を確認し直す必要があるか"""
+    if aituber.get("isUpcoming"):
+        return True
+    known_ids = stored_video_ids(aituber)
+    return any(
+        extract_video_id(content["url"]) not in known_ids
+        for content in contents[:RSS_CHANGE_DEPTH]
+    )
+
+
+def feed_upload_candidates(contents):
+    """RSSの最新エントリを playlistItems と同じ形の最新動画候補にする。
+
+    RSSで新着が分かったチャンネルは、これを候補にすれば playlistItems を呼ばずに済む。
+    """
+    candidates = []
+    for content in contents[:RSS_CHANGE_DEPTH]:
+        video_id = extract_video_id(content["url"])
+        if not video_id:
+            continue
+        candidates.append(
+            {
+                "snippet": {
+                    "title": content["title"],
+                    "resourceId": {"videoId": video_id},
+                    "thumbnails": {"high": {"url": content["thumbnail"]}},
+                }
+            }
+        )
+    return candidates
+
+
+def detect_changed_channels(aitubers, workers=1, cache=None):
+    """公開RSSと保存済みデータを比べ、動画情報の取得が必要なチャンネルIDを返す。
+
+    RSSの取得に失敗したチャンネルは変化の有無が分からないため対象に含める。
+    """
+    targets = [aituber for aituber in aitubers if aituber["youtubeChannelID"]]
+
+    def check(aituber):
+        try:
+            contents = fetch_feed(aituber["youtubeChannelID"], cache)
+        except Exception as e:
+            metrics.record_error("rss", e)
+            return True
+        return has_new_youtube_content(aituber, contents)
+
+    return {
+        aituber["youtubeChannelID"]
+        for aituber, is_changed in zip(targets, map_concurrently(check, targets, workers))
+        if is_changed
+    }
+
+
+def prefetch_youtube_data(
+    youtube, aitubers, workers=1, changed_channels=None, feed_candidates=None, checked_channels=None
+):
+    """ロスター全体のチャンネル情報・最新動画候補・動画詳細をまとめて取得する。
+
+    戻り値は (channels, candidates, videos) で、candidates はチャンネルIDごとの
+    playlistItems、videos は動画IDごとの videos.list の結果。
+    changed_channels を渡した場合、それ以外のチャンネルは channels.list の
+    統計情報だけを取得し、動画の候補は取得しない。
+    feed_candidates（チャンネルIDごとの feed_upload_candidates）にあるチャンネルは
+    playlistItems の代わりにその候補を使う。
+    checked_channels にセットを渡すと、channels.list で確認できたチャンネルIDを追加する。
+    """
+    feed_candidates = feed_candidates or {}
+    channels = fetch_youtube_channels(
+        youtube, [aituber["youtubeChannelID"] for aituber in aitubers], workers, checked_channels
+    )
+    candidate_channels = [
+        channel_info
+        for channel_id, channel_info in channels.items()
+        if (changed_channels is None or channel_id in changed_channels)
+        and channel_id not in feed_candidates
+    ]
+
+    def fetch_candidates(channel_info):
+        try:
+            return fetch_upload_candidates(youtube, channel_info)
+        except QuotaExceeded:
+            return None
+        except Exception as e:
+            metrics.record_error("youtube.playlistItems", e)
+            print(f"Error fetching uploads for {channel_info['id']}: {e}")
+            return None
+
+    candidates = {
+        channel_info["id"]: items
+        for channel_info, items in zip(
+            candidate_channels,
+            map_concurrently(fetch_candidates, candidate_channels, workers),
+        )
+        if items is not None
+    }
+    candidates.update(
+        (channel_id, items) for channel_id, items in feed_candidates.items() if channel_id in channels
+    )
+
+    video_ids = [
+        item["snippet"]["resourceId"]["videoId"]
+        for items in candidates.values()
+        for item in items
+    ]
+    videos = fetch_youtube_videos(youtube, video_ids, workers)
+    return channels, candidates, videos
+
+
+def apply_youtube_info(aituber, channel_info, candidates, videos):
+    """事前取得したチャンネル情報と動画詳細からAITuberの情報を更新する"""
+    if not channel_info:
+        return aituber
 
     # カスタムURLの取得と設定（youtubeURLが空の場合のみ）
     if not aituber["youtubeURL"] and "customUrl" in channel_info["snippet"]:
@@ -165,15 +659,12 @@ def update_aituber_info(aituber, youtube):
         profile_image_url = channel_info["snippet"]["thumbnails"]["high"]["url"]
         aituber["imageUrl"] = profile_image_url
 
-    # search().list()の代わりにplaylistItems().list()を使用
-    uploads_playlist_id = channel_info["contentDetails"]["relatedPlaylists"]["uploads"]
-    latest_videos = (
-        youtube.playlistItems()
-        .list(part="snippet", playlistId=uploads_playlist_id, maxResults=2)
-        .execute()
-    )
+    # 登録者数はチャンネル情報だけで更新できる（非公開の場合は含まれない）
+    subscriber_count = channel_info["statistics"].get("subscriberCount")
+    if subscriber_count is not None:
+        aituber["youtubeSubscribers"] = int(subscriber_count)
 
-    if not latest_videos.get("items"):
+    if not candidates:
         return aituber
 
     # 動画情報を取得して時間でソート
@@ -182,21 +673,14 @@ def update_aituber_info(aituber, youtube):
     current_time = datetime.now(jst)
     future_limit = current_time + timedelta(days=1)
 
-    for video_item in latest_videos["items"]:
+    for video_item in candidates:
         video_id = video_item["snippet"]["resourceId"]["videoId"]
 
-        # 動画の詳細情報を取得（liveStreamingDetailsを追加）
-        video_response = (
-            youtube.videos()
-            .list(part="snippet,status,liveStreamingDetails", id=video_id)
-            .execute()
-        )
-
-        if not video_response.get("items"):
+        # 動画の詳細情報（liveStreamingDetailsを含む）
+        video_info = videos.get(video_id)
+        if not video_info:
             continue
 
-        video_info = video_response["items"][0]
-
         # 非公開動画はスキップ
         if video_info["status"]["privacyStatus"] != "public":
             continue
@@ -235,7 +719,6 @@ def update_aituber_info(aituber, youtube):
     # AITuberの情報を更新
     aituber.update(
         {
-            "youtubeSubscribers": int(channel_info["statistics"]["subscriberCount"]),
             "latestVideoTitle": selected_video["title"],
             "latestVideoThumbnail": selected_video["thumbnail"],
             "latestVideoUrl": f"https://www.youtube.com/watch?v={selected_video['video_id']}",
@@ -247,59 +730,462 @@ def update_aituber_info(aituber, youtube):
     return aituber
 
 
-def update_aituber_data():
-    # YouTube Data API の認証情報
-    api_key = os.environ.get("YOUTUBE_API_KEY")
-    if api_key:
-        from googleapiclient.discovery import build
+def update_aituber_info(aituber, youtube):
+    """1件のAITuberの情報を更新する（ロスター全体は prefetch_youtube_data でまとめて取得する）"""
+    channel_id = aituber["youtubeChannelID"]
 
-        youtube = build("youtube", "v3", developerKey=api_key)
-    else:
-        youtube = None
+    # チャンネルIDが空の場合はスキップ
+    if not channel_id:
+        return aituber
 
+    channels, candidates, videos = prefetch_youtube_data(youtube, [aituber])
+    return apply_youtube_info(
+        aituber, channels.get(channel_id), candidates.get(channel_id, []), videos
+    )
+
+
+def create_youtube_client(youtube_rate=YOUTUBE_REQUESTS_PER_SECOND, youtube_daily_quota=DAILY_QUOTA):
+    """YOUTUBE_API_KEY, YOUTUBE_API_KEY2, ... をすべて使うクライアントを返す。
+
+    キーがないか、本日のクオータを使い切っている場合はNoneを返す。
+    """
+    api_keys = youtube_api_keys()
+    if not api_keys:
+        print("警告: YOUTUBE_API_KEYがないためYouTube更新をスキップします。")
+        return None
+    youtube = YouTubeQuotaPool(api_keys, TokenBucket(youtube_rate), daily_quota=youtube_daily_quota)
+    if not youtube.remaining():
+        print("警告: 本日のYouTube APIクオータを使い切っているためYouTube更新をスキップします。")
+        return None
+    return youtube
+
+
+def create_twitch_token():
+    """(client_id, TwitchAppToken) を返す。認証情報がないか認証に失敗した場合トークンはNone。"""
     twitch_client_id = os.environ.get("TWITCH_CLIENT_ID")
     twitch_client_secret = os.environ.get("TWITCH_CLIENT_SECRET")
-    twitch_access_token = None
-    if twitch_client_id and twitch_client_secret:
-        try:
-            twitch_access_token = get_twitch_app_access_token(
-                twitch_client_id, twitch_client_secret
-            )
-        except (HTTPError, URLError, KeyError, ValueError) as error:
-            print(f"Twitch APIの認証に失敗しました: {type(error).__name__}")
-    else:
+    if not (twitch_client_id and twitch_client_secret):
         print("警告: Twitch API認証情報がないためTwitch更新をスキップします。")
+        return twitch_client_id, None
+    try:
+        twitch_access_token = TwitchAppToken(twitch_client_id, twitch_client_secret)
+        twitch_access_token.get()
+    except (httpx.HTTPError, KeyError, ValueError) as error:
+        print(f"Twitch APIの認証に失敗しました: {type(error).__name__}")
+        return twitch_client_id, None
+    return twitch_client_id, twitch_access_token
 
-    if not youtube:
-        print("警告: YOUTUBE_API_KEYがないためYouTube更新をスキップします。")
+
+def has_fetched_api_data(
+    aituber,
+    channels,
+    candidates,
+    changed_channels,
+    twitch_users,
+    twitch_streams,
+    checked_channels=frozenset(),
+    checked_logins=frozenset(),
+):
+    """このエントリに必要なAPIのデータがすべて取得できたか。
+
+    channels.list の失敗・クオータ不足、playlistItems の後回し（PRIORITY_LOW）、
+    Twitchのユーザー・配信状態の取得失敗があった場合は False になる。
+    その場合は更新予定時刻を進めず、次回の実行でも対象に残す。
+    取得に成功したバッチに含まれなかった（削除されたチャンネルや変更された
+    ログイン名の）場合は、何度取得しても変わらないため取得できたものとして扱う。
+    """
+    channel_id = aituber.get("youtubeChannelID")
+    if channel_id:
+        if channel_id in channels:
+            needs_candidates = changed_channels is None or channel_id in changed_channels
+            if needs_candidates and channel_id not in candidates:
+                return False
+        elif channel_id not in checked_channels:
+            return False
+    login = aituber.get("twitchLogin", "").strip().lower()
+    if login:
+        user = twitch_users.get(login)
+        if user:
+            if user["id"] not in twitch_streams:
+                return False
+        elif login not in checked_logins:
+            return False
+    return True
+
+
+def select_targets(data, schedule=False, request_budget=None):
+    """更新対象のエントリと RefreshSchedule（スケジュールを使わない場合はNone）を返す。
+
+    スケジュールを使う場合は、更新予定時刻を過ぎたエントリだけを対象にする。
+    """
+    if not schedule:
+        return data["aitubers"], None
+    refresh_schedule = RefreshSchedule()
+    targets = refresh_schedule.select_due(data["aitubers"], request_budget=request_budget)
+    print(f"Refresh schedule: {len(targets)}/{len(data['aitubers'])} entries due")
+    return targets, refresh_schedule
+
+
+def update_aituber_data(
+    workers=1,
+    youtube_rate=YOUTUBE_REQUESTS_PER_SECOND,
+    twitch_rate=TWITCH_REQUESTS_PER_SECOND,
+    rss_precheck=False,
+    timeout=DEFAULT_TIMEOUT,
+    youtube_daily_quota=DAILY_QUOTA,
+    schedule=False,
+    request_budget=None,
+):
+    configure_http_client(timeout=timeout, max_connections=max(workers, 8))
+    youtube = create_youtube_client(youtube_rate, youtube_daily_quota)
+    twitch_client_id, twitch_access_token = create_twitch_token()
+    twitch_rate_limiter = TokenBucket(twitch_rate)
 
     # AITuberデータの読み込み
     data = load_aitubers()
+    targets, refresh_schedule = select_targets(data, schedule, request_budget)
+    target_ids = {id(aituber) for aituber in targets}
+
+    # RSSで新着がないチャンネルは登録者数などの統計情報だけを更新する
+    changed_channels = None
+    if youtube and rss_precheck:
+        feed_cache = FeedCache(FEED_CACHE_PATH)
+        changed_channels = detect_changed_channels(targets, workers, feed_cache)
+        feed_cache.save()
+        metrics.record_cache("youtube-feeds", **feed_cache.stats())
+        print(f"RSS precheck: {len(changed_channels)} channels have new content")
+
+    # チャンネル情報と動画詳細は50件ずつまとめて先に取得しておく
+    checked_channels, checked_logins = set(), set()
+    channels, candidates, videos = (
+        prefetch_youtube_data(
+            youtube, targets, workers, changed_channels, checked_channels=checked_channels
+        )
+        if youtube
+        else ({}, {}, {})
+    )
+    if youtube:
+        youtube.save()
+        print(youtube.summary())
+
+    # Twitchのユーザーと配信状態も100件ずつまとめて先に取得しておく
+    twitch_users, twitch_streams, twitch_videos = (
+        prefetch_twitch_data(
+            [aituber for aituber in targets if aituber.get("twitchLogin")],
+            twitch_client_id,
+            twitch_access_token,
+            twitch_rate_limiter,
+            workers,
+            checked_logins,
+        )
+        if twitch_access_token
+        else ({}, {}, {})
+    )
 
     # 各AITuberの情報を更新
+    updated_count = 0
     for i, aituber in enumerate(data["aitubers"]):
+        if id(aituber) not in target_ids:
+            continue
+        fetched = has_fetched_api_data(
+            aituber,
+            channels,
+            candidates,
+            changed_channels,
+            twitch_users,
+            twitch_streams,
+            checked_channels,
+            checked_logins,
+        )
         try:
-            updated = update_aituber_info(aituber, youtube) if youtube else aituber
+            channel_id = aituber["youtubeChannelID"]
+            updated = apply_youtube_info(
+                aituber,
+                channels.get(channel_id),
+                candidates.get(channel_id, []),
+                videos,
+            )
             if twitch_access_token and updated.get("twitchLogin"):
-                updated = update_twitch_info(
-                    updated, twitch_client_id, twitch_access_token
+                updated = apply_twitch_info(
+                    updated, twitch_users, twitch_streams, twitch_videos
                 )
             data["aitubers"][i] = updated
+            if not fetched:
+                metrics.record_error("update", "api data missing")
+                print(f"Not refreshed (API data missing): {updated['name']}")
+                continue
+            if refresh_schedule:
+                refresh_schedule.mark_refreshed(updated)
+            updated_count += 1
             print(f"Updated: {updated['name']}")
         except Exception as e:
+            metrics.record_error("update", e)
             print(f"Error updating {aituber['name']}: {e}")
 
-    # 日本のタイムゾーンで現在時刻を取得
-    jst = timezone(timedelta(hours=9))
-    current_time = datetime.now(jst)
+    if refresh_schedule:
+        refresh_schedule.save()
+    print(f"{updated_count}/{len(targets)} entries updated")
+
+    # 更新したデータを保存（変化がなければ書き込まず、lastUpdatedも据え置く）
+    if save_aitubers(data):
+        print("Update completed!")
+    else:
+        print("Update completed! (no changes)")
+
+
+def live_candidate_video_ids(aituber, now):
+    """保存済みの動画のうち、配信中・配信予定の可能性がある動画IDを返す"""
+    stored = [
+        {"url": aituber.get("latestVideoUrl", ""), "date": aituber.get("latestVideoDate", "")}
+    ] + aituber.get("recentYoutubeVideos", [])
+    video_ids = []
+    for index, video in enumerate(stored):
+        video_id = extract_video_id(video.get("url", "")) if video.get("url") else ""
+        if not video_id:
+            continue
+        date = parse_timestamp(video.get("date", ""))
+        is_upcoming = index == 0 and aituber.get("isUpcoming")
+        if is_upcoming or (date and date >= now - LIVE_CHECK_WINDOW):
+            video_ids.append(video_id)
+    return list(dict.fromkeys(video_ids))
+
+
+def youtube_live_entry(aituber, video_id, video_info):
+    """videos.list の結果が配信中・配信予定なら live-status.json の1件を返す"""
+    state = video_info["snippet"].get("liveBroadcastContent")
+    if state not in ("live", "upcoming"):
+        return None
+    details = video_info.get("liveStreamingDetails", {})
+    return {
+        "key": aituber_key(aituber),
+        "name": aituber.get("name", ""),
+        "platform": "youtube",
+        "state": state,
+        "title": video_info["snippet"].get("title", ""),
+        "thumbnail": video_info["snippet"].get("thumbnails", {}).get("high", {}).get("url", ""),
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "startsAt": details.get("actualStartTime") or details.get("scheduledStartTime", ""),
+    }
+
+
+def twitch_live_entry(aituber):
+    if not aituber.get("twitchIsLive"):
+        return None
+    return {
+        "key": aituber_key(aituber),
+        "name": aituber.get("name", ""),
+        "platform": "twitch",
+        "state": "live",
+        "title": aituber.get("twitchTitle", ""),
+        "thumbnail": aituber.get("twitchThumbnail", ""),
+        "url": aituber.get("twitchContentUrl") or aituber.get("twitchURL", ""),
+        "startsAt": aituber.get("twitchContentDate", ""),
+    }
+
+
+def update_live_status(
+    workers=1,
+    youtube_rate=YOUTUBE_REQUESTS_PER_SECOND,
+    twitch_rate=TWITCH_REQUESTS_PER_SECOND,
+    timeout=DEFAULT_TIMEOUT,
+    youtube_daily_quota=DAILY_QUOTA,
+    status_path=LIVE_STATUS_PATH,
+):
+    """配信中・配信予定の一覧を確認し、public/data/live-status.json に書き出す。
+
+    Twitchは streams をまとめて確認し、YouTubeは保存済みの最近の動画だけを
+    videos.list で確認する。チャンネル情報や新着動画の取得は行わない。
+    APIキーがない・クオータ不足・取得失敗などで確認できなかった動画やユーザーは、
+    「配信していない」とはみなさず、前回の一覧のエントリをそのまま残す。
+    aitubers.json は書き換えない（ロスターの配信状態は定期更新で反映する）。
+    ブラウザは一覧を表示したあとにこのファイルを読み込み、配信状態を上書きする。
+    """
+    configure_http_client(timeout=timeout, max_connections=max(workers, 8))
+    data = load_aitubers()
+    jst = pytz.timezone("Asia/Tokyo")
+    now = datetime.now(jst)
 
-    # データを更新
-    data = {"lastUpdated": current_time.isoformat(), "aitubers": data["aitubers"]}
+    # YouTube: 配信予定枠・直近の動画の配信状態を確認する
+    candidate_ids = {
+        id(aituber): live_candidate_video_ids(aituber, now)
+        for aituber in data["aitubers"]
+        if aituber.get("youtubeChannelID")
+    }
+    api_keys = youtube_api_keys()
+    youtube = (
+        YouTubeQuotaPool(api_keys, TokenBucket(youtube_rate), daily_quota=youtube_daily_quota)
+        if api_keys
+        else None
+    )
+    videos = {}
+    checked_videos = set()
+    if youtube:
+        video_ids = [video_id for ids in candidate_ids.values() for video_id in ids]
+        videos = fetch_youtube_videos(youtube, video_ids, workers, checked_videos)
+        youtube.save()
 
-    # 更新したデータを保存
-    save_aitubers(data)
-    print("Update completed!")
+    # Twitch: 保存済みのuser_idでstreamsをまとめて確認する（未取得のものだけusersを引く）
+    twitch_client_id = os.environ.get("TWITCH_CLIENT_ID")
+    twitch_client_secret = os.environ.get("TWITCH_CLIENT_SECRET")
+    twitch_entries = [aituber for aituber in data["aitubers"] if aituber.get("twitchLogin")]
+    streams = {}
+    user_ids = {}
+    if twitch_client_id and twitch_client_secret and twitch_entries:
+        rate_limiter = TokenBucket(twitch_rate)
+        try:
+            access_token = TwitchAppToken(twitch_client_id, twitch_client_secret)
+            access_token.get()
+        except (httpx.HTTPError, KeyError, ValueError) as error:
+            access_token = None
+            print(f"Twitch APIの認証に失敗しました: {type(error).__name__}")
+        if access_token:
+            missing = [
+                aituber["twitchLogin"].lower()
+                for aituber in twitch_entries
+                if not aituber.get("twitchUserID")
+            ]
+            users = fetch_twitch_users(
+                missing, twitch_client_id, access_token, rate_limiter, workers
+            )
+            for aituber in twitch_entries:
+                user = users.get(aituber["twitchLogin"].lower(), {})
+                user_ids[id(aituber)] = aituber.get("twitchUserID") or user.get("id")
+            streams = fetch_twitch_streams(
+                list(user_ids.values()), twitch_client_id, access_token, rate_limiter, workers
+            )
+
+    # 確認できなかったものは前回のエントリを引き継ぐ
+    previous = load_aitubers(status_path) if status_path.exists() else {"lastUpdated": "", "entries": []}
+    previous_twitch = {}
+    previous_youtube = {}
+    for entry in previous.get("entries", []):
+        if entry["platform"] == "twitch":
+            previous_twitch[entry["key"]] = entry
+        else:
+            previous_youtube[(entry["key"], extract_video_id(entry["url"]))] = entry
+
+    live_entries = []
+    kept = 0
+    for aituber in data["aitubers"]:
+        key = aituber_key(aituber)
+        user_id = user_ids.get(id(aituber))
+        if user_id in streams:
+            apply_twitch_stream(aituber, streams[user_id])
+            twitch_entry = twitch_live_entry(aituber)
+        else:
+            twitch_entry = previous_twitch.get(key)
+            kept += twitch_entry is not None
+        if twitch_entry:
+            live_entries.append(twitch_entry)
+
+        for video_id in candidate_ids.get(id(aituber), []):
+            if video_id not in checked_videos:
+                entry = previous_youtube.get((key, video_id))
+                kept += entry is not None
+            elif video_id in videos:
+                entry = youtube_live_entry(aituber, video_id, videos[video_id])
+            else:
+                entry = None
+            if entry:
+                live_entries.append(entry)
+
+    live_entries.sort(key=lambda entry: (entry["state"] != "live", entry["startsAt"]))
+    status = {"lastUpdated": previous["lastUpdated"], "entries": live_entries}
+    status_path.parent.mkdir(parents=True, exist_ok=True)
+    status_written = save_aitubers(status, status_path)
+
+    live_count = sum(entry["state"] == "live" for entry in live_entries)
+    print(
+        f"Live status: {live_count} live, {len(live_entries) - live_count} upcoming "
+        f"({len(checked_videos)} videos, {len(streams)} Twitch users checked, "
+        f"{kept} unchecked entries kept; "
+        f"status {'written' if status_written else 'unchanged'})"
+    )
 
 
 if __name__ == "__main__":
-    update_aituber_data()
+    parser = argparse.ArgumentParser(description="AITuberのYouTube/Twitch情報を更新します")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="並列に処理するワーカー数"
+    )
+    parser.add_argument(
+        "--youtube-rate",
+        type=float,
+        default=YOUTUBE_REQUESTS_PER_SECOND,
+        help="YouTube Data APIへの1秒あたりの最大リクエスト数",
+    )
+    parser.add_argument(
+        "--twitch-rate",
+        type=float,
+        default=TWITCH_REQUESTS_PER_SECOND,
+        help="Twitch Helix APIへの1秒あたりの最大リクエスト数",
+    )
+    parser.add_argument(
+        "--rss-precheck",
+        action="store_true",
+        help="公開RSSで新着があったチャンネルだけ動画情報をAPIで取得します",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="HTTPリクエスト1件あたりのタイムアウト秒数",
+    )
+    parser.add_argument(
+        "--youtube-daily-quota",
+        type=int,
+        default=DAILY_QUOTA,
+        help="YouTube APIキー1つあたりの1日のクオータ（ユニット）",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="活動状況に応じた更新間隔を使い、更新予定時刻を過ぎたエントリだけを更新します",
+    )
+    parser.add_argument(
+        "--request-budget",
+        type=int,
+        default=None,
+        help="--schedule指定時に、1回の実行で使うAPI呼び出し数の上限",
+    )
+    parser.add_argument(
+        "--live-only",
+        action="store_true",
+        help="配信中・配信予定の状態だけを確認し、public/data/live-status.json を書き出します",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=None,
+        help="実行ごとの計測結果（リクエスト数・レイテンシ・エラーなど）を書き出すJSONファイル"
+        "（既定: .cache/metrics/update_aitubers.json、--live-only では live_status.json）",
+    )
+    parser.add_argument(
+        "--metrics-history",
+        type=Path,
+        default=None,
+        help="計測結果を1行ずつ追記するJSON Linesファイル",
+    )
+    args = parser.parse_args()
+    run_name = "live_status" if args.live_only else "update_aitubers"
+    metrics.reset(run_name)
+    if args.live_only:
+        update_live_status(
+            args.workers,
+            args.youtube_rate,
+            args.twitch_rate,
+            args.timeout,
+            args.youtube_daily_quota,
+        )
+    else:
+        update_aituber_data(
+            args.workers,
+            args.youtube_rate,
+            args.twitch_rate,
+            args.rss_precheck,
+            args.timeout,
+            args.youtube_daily_quota,
+            args.schedule,
+            args.request_budget,
+        )
+    metrics.write(args.metrics or default_report_path(run_name), args.metrics_history)
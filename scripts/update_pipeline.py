@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""公開RSS・YouTube Data API・Twitch・タグ付けを1つのロスターで行う更新パイプライン
+
+update_aitubers.py と refresh_youtube_rss.py を順に実行すると、aitubers.json を
+2回読み書きし、RSSの結果がAPIで取得した最新動画と食い違う部分を
+apply_canonical_latest で後から戻す必要があった。このスクリプトは
+
+1. aitubers.json を1回だけ読み込む
+2. 全チャンネルの公開RSSを取得する（クオータを消費しない）
+3. 更新対象のうちRSSに新着があるチャンネルだけ、RSSのエントリを最新動画の候補として
+   videos.list で詳細を取得する（RSSを取得できなかったチャンネルは playlistItems で補う）
+4. Twitchのユーザー・配信状態・最新VODを取得する
+5. 同じロスターにYouTube・Twitch・最近の動画・タグを反映し、1回だけ書き込む
+
+の順に処理する。
+
+    python scripts/update_pipeline.py --workers 8 --schedule --request-budget 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+import pytz
+
+from aituber_data import load_aitubers, save_aitubers
+from http_client import DEFAULT_TIMEOUT, configure_http_client
+from refresh_youtube_rss import (
+    FEED_CACHE_PATH,
+    FEED_CONCURRENCY,
+    FEED_DEADLINE,
+    FeedCache,
+    extract_video_id,
+    refresh_feeds_async,
+    tag_matcher,
+)
+from run_metrics import default_report_path, metrics
+from tag_rules import TAG_RULES_PATH, apply_tags
+from update_aitubers import (
+    TWITCH_REQUESTS_PER_SECOND,
+    YOUTUBE_REQUESTS_PER_SECOND,
+    TokenBucket,
+    apply_twitch_info,
+    apply_youtube_info,
+    create_twitch_token,
+    create_youtube_client,
+    feed_upload_candidates,
+    get_youtube_content_time,
+    has_fetched_api_data,
+    has_new_youtube_content,
+    prefetch_twitch_data,
+    prefetch_youtube_data,
+    select_targets,
+)
+from youtube_quota import DAILY_QUOTA
+
+
+# recentYoutubeVideos に残す件数
+RECENT_VIDEO_COUNT = 3
+
+
+def select_api_candidates(targets, feeds):
+    """RSSの結果から、APIで動画情報を取得するチャンネルとその候補を決める。
+
+    戻り値は (changed_channels, feed_candidates)。RSSに新着があるチャンネルは
+    RSSのエントリを候補にする。RSSを取得できなかったチャンネルは新着の有無が
+    分からないため changed_channels にだけ含め、playlistItems で候補を取得させる。
+    """
+    changed_channels = set()
+    feed_candidates = {}
+    for aituber in targets:
+        channel_id = aituber.get("youtubeChannelID")
+        if not channel_id:
+            continue
+        contents = feeds.get(channel_id)
+        if contents is None:
+            changed_channels.add(channel_id)
+        elif has_new_youtube_content(aituber, contents):
+            changed_channels.add(channel_id)
+            candidates = feed_upload_candidates(contents)
+            if candidates:
+                feed_candidates[channel_id] = candidates
+    return changed_channels, feed_candidates
+
+
+def should_update_recent_videos(aituber, contents, enriched_channels):
+    """RSSのエントリで recentYoutubeVideos を書き換えてよいか。
+
+    recentYoutubeVideos の動画は「既知」として扱われるため、APIで最新動画を
+    反映していないのにRSSの新着を書き込むと、次回以降そのチャンネルが
+    新着ありと判定されなくなる。APIで反映できたチャンネルか、RSSに新着がない
+    チャンネルだけを書き換え、それ以外は次回のAPIの対象に残す。
+    """
+    return aituber.get("youtubeChannelID") in enriched_channels or not has_new_youtube_content(
+        aituber, contents
+    )
+
+
+def recent_youtube_videos(aituber, contents, videos, jst):
+    """RSSのエントリから recentYoutubeVideos を作る。
+
+    RSSの published は配信枠の作成日時なので、videos.list で取得した動画は
+    配信の開始（予定）時刻を使う。取得していない動画でも、反映済みの最新動画と
+    同じものはその情報を使う。
+    """
+    latest_id = extract_video_id(aituber.get("latestVideoUrl", ""))
+    recent = []
+    for content in contents[:RECENT_VIDEO_COUNT]:
+        item = dict(content)
+        video_id = extract_video_id(content["url"])
+        video_info = videos.get(video_id)
+        if video_info:
+            item["date"] = get_youtube_content_time(video_info, jst).isoformat()
+        elif video_id and video_id == latest_id:
+            item.update(
+                {
+                    "title": aituber.get("latestVideoTitle", item["title"]),
+                    "thumbnail": aituber.get("latestVideoThumbnail", item["thumbnail"]),
+                    "date": aituber.get("latestVideoDate", item["date"]),
+                }
+            )
+        recent.append(item)
+    return recent
+
+
+def run_pipeline(
+    workers=1,
+    youtube_rate=YOUTUBE_REQUESTS_PER_SECOND,
+    twitch_rate=TWITCH_REQUESTS_PER_SECOND,
+    timeout=DEFAULT_TIMEOUT,
+    youtube_daily_quota=DAILY_QUOTA,
+    schedule=False,
+    request_budget=None,
+    matcher=None,
+    feed_concurrency=FEED_CONCURRENCY,
+    feed_deadline=FEED_DEADLINE,
+    feed_cache_path=FEED_CACHE_PATH,
+):
+    configure_http_client(timeout=timeout, max_connections=max(workers, 8))
+    youtube = create_youtube_client(youtube_rate, youtube_daily_quota)
+    twitch_client_id, twitch_access_token = create_twitch_token()
+
+    data = load_aitubers()
+    targets, refresh_schedule = select_targets(data, schedule, request_budget)
+    target_ids = {id(aituber) for aituber in targets}
+
+    # 公開RSSは更新対象に関係なく全チャンネル分取得する
+    feed_cache = FeedCache(feed_cache_path)
+    channel_ids = list(
+        dict.fromkeys(
+            aituber["youtubeChannelID"]
+            for aituber in data["aitubers"]
+            if aituber.get("youtubeChannelID")
+        )
+    )
+    feeds, feed_errors, deferred = asyncio.run(
+        refresh_feeds_async(
+            channel_ids,
+            feed_cache,
+            concurrency=feed_concurrency,
+            deadline=feed_deadline,
+            timeout=timeout,
+        )
+    )
+    feed_cache.save()
+    metrics.record_cache("youtube-feeds", **feed_cache.stats())
+    print(
+        f"RSS: {len(feeds)}/{len(channel_ids)} feeds "
+        f"({len(feed_errors)} errors, {len(deferred)} deferred)"
+    )
+
+    # RSSに新着があるチャンネルは、RSSのエントリを最新動画の候補にする
+    channels, candidates, videos = {}, {}, {}
+    changed_channels = set()
+    checked_channels, checked_logins = set(), set()
+    if youtube:
+        changed_channels, feed_candidates = select_api_candidates(targets, feeds)
+        print(
+            f"YouTube API: {len(changed_channels)} channels have new content "
+            f"({len(feed_candidates)} candidates from RSS)"
+        )
+        channels, candidates, videos = prefetch_youtube_data(
+            youtube, targets, workers, changed_channels, feed_candidates, checked_channels
+        )
+        youtube.save()
+        print(youtube.summary())
+
+    twitch_users, twitch_streams, twitch_videos = (
+        prefetch_twitch_data(
+            [aituber for aituber in targets if aituber.get("twitchLogin")],
+            twitch_client_id,
+            twitch_access_token,
+            TokenBucket(twitch_rate),
+            workers,
+            checked_logins,
+        )
+        if twitch_access_token
+        else ({}, {}, {})
+    )
+
+    # 新着ありのうち、APIでチャンネル情報と最新動画の候補を取得できたチャンネル
+    enriched_channels = {
+        channel_id
+        for channel_id in changed_channels
+        if channel_id in channels and channel_id in candidates
+    }
+
+    jst = pytz.timezone("Asia/Tokyo")
+    updated = 0
+    tagged = []
+    for aituber in data["aitubers"]:
+        channel_id = aituber.get("youtubeChannelID", "")
+        if id(aituber) in target_ids:
+            fetched = has_fetched_api_data(
+                aituber,
+                channels,
+                candidates,
+                changed_channels,
+                twitch_users,
+                twitch_streams,
+                checked_channels,
+                checked_logins,
+            )
+            try:
+                apply_youtube_info(
+                    aituber, channels.get(channel_id), candidates.get(channel_id, []), videos
+                )
+                if twitch_access_token and aituber.get("twitchLogin"):
+                    apply_twitch_info(aituber, twitch_users, twitch_streams, twitch_videos)
+                # 取得できなかったエントリは更新予定時刻を進めず、次回も対象に残す
+                if fetched:
+                    if refresh_schedule:
+                        refresh_schedule.mark_refreshed(aituber)
+                    updated += 1
+                else:
+                    metrics.record_error("update", "api data missing")
+            except Exception as e:
+                metrics.record_error("update", e)
+                print(f"Error updating {aituber['name']}: {e}")
+
+        contents = feeds.get(channel_id)
+        if contents is None:
+            continue
+        if not contents:
+            if aituber.get("recentYoutubeVideos") == []:
+                aituber.pop("recentYoutubeVideos")
+            continue
+        if should_update_recent_videos(aituber, contents, enriched_channels):
+            aituber["recentYoutubeVideos"] = recent_youtube_videos(aituber, contents, videos, jst)
+        if matcher:
+            for tag, evidence in apply_tags(aituber, matcher, contents).items():
+                tagged.append((aituber["name"], tag))
+                print(f"Tagged {tag}: {aituber['name']} ({' / '.join(evidence[:5])})")
+
+    if refresh_schedule:
+        refresh_schedule.save()
+
+    # 変化がなければ書き込まず、lastUpdatedも据え置く
+    written = save_aitubers(data)
+    print(
+        f"Pipeline completed: {updated}/{len(targets)} due entries updated, "
+        f"{len(tagged)} tagged, {'written' if written else 'no changes'}"
+    )
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="公開RSS・YouTube・Twitchの情報を1回の読み込みと書き込みで更新します"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="APIを並列に呼び出すワーカー数")
+    parser.add_argument(
+        "--youtube-rate",
+        type=float,
+        default=YOUTUBE_REQUESTS_PER_SECOND,
+        help="YouTube Data APIへの1秒あたりの最大リクエスト数",
+    )
+    parser.add_argument(
+        "--twitch-rate",
+        type=float,
+        default=TWITCH_REQUESTS_PER_SECOND,
+        help="Twitch Helix APIへの1秒あたりの最大リクエスト数",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="HTTPリクエスト1件あたりのタイムアウト秒数",
+    )
+    parser.add_argument(
+        "--youtube-daily-quota",
+        type=int,
+        default=DAILY_QUOTA,
+        help="YouTube APIキー1つあたりの1日のクオータ（ユニット）",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="活動状況に応じた更新間隔を使い、更新予定時刻を過ぎたエントリだけをAPIで更新します",
+    )
+    parser.add_argument(
+        "--request-budget",
+        type=int,
+        default=None,
+        help="--schedule指定時に、1回の実行で使うAPI呼び出し数の上限",
+    )
+    parser.add_argument(
+        "--apply-tags",
+        nargs="*",
+        metavar="TAG",
+        help="RSSの動画タイトルなどから --tag-rules のタグを付けます（TAG省略時はすべてのルール）",
+    )
+    parser.add_argument("--apply-asmr", action="store_true", help="--apply-tags ASMR と同じ")
+    parser.add_argument(
+        "--tag-rules", type=Path, default=TAG_RULES_PATH, help="タグ付けルールのJSONファイル"
+    )
+    parser.add_argument(
+        "--feed-concurrency",
+        type=int,
+        default=FEED_CONCURRENCY,
+        help="同時に取得するRSSフィードの数",
+    )
+    parser.add_argument(
+        "--feed-deadline",
+        type=float,
+        default=FEED_DEADLINE,
+        help="RSSの取得を打ち切る秒数（残りは次回に回す。0で無制限）",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=default_report_path("update_pipeline"),
+        help="実行ごとの計測結果を書き出すJSONファイル",
+    )
+    parser.add_argument(
+        "--metrics-history",
+        type=Path,
+        default=None,
+        help="計測結果を1行ずつ追記するJSON Linesファイル",
+    )
+    args = parser.parse_args()
+    metrics.reset("update_pipeline")
+    run_pipeline(
+        args.workers,
+        args.youtube_rate,
+        args.twitch_rate,
+        args.timeout,
+        args.youtube_daily_quota,
+        args.schedule,
+        args.request_budget,
+        tag_matcher(args),
+        args.feed_concurrency,
+        args.feed_deadline,
+    )
+    metrics.write(args.metrics, args.metrics_history)
@@ -0,0 +1,100 @@
+"""YouTube Data API v3 を共有のhttpxクライアントで直接呼び出す軽量クライアント
+
+使うのは channels / playlistItems / videos / search の list だけなので、
+googleapiclient の import や discovery ドキュメントの読み込みを行わず、REST API を
+そのまま呼ぶ。呼び出し方とレスポンス（JSONのdict）は googleapiclient と同じ。
+
+    youtube = YouTubeClient(api_key)
+    youtube.channels().list(part="snippet", id="UC...").execute()
+
+APIキーはURLではなく X-Goog-Api-Key ヘッダーで送るため、エラーやログに残らない。
+接続先は YOUTUBE_API_ENDPOINT で差し替えられる。
+"""
+
+from __future__ import annotations
+
+import os
+
+import httpx
+
+from http_client import get_http_client
+
+
+YOUTUBE_API_ROOT = "https://youtube.googleapis.com/"
+YOUTUBE_API_PATH = "youtube/v3/"
+YOUTUBE_RESOURCES = ("channels", "playlistItems", "videos", "search")
+
+
+class YouTubeApiError(Exception):
+    """YouTube Data API がエラーを返した。status と、エラー理由（reasons）を持つ"""
+
+    def __init__(self, resource: str, status: int, reasons: list[str], message: str = ""):
+        super().__init__(
+            f"YouTube API {resource}.list returned {status}"
+            + (f" ({', '.join(reasons)})" if reasons else "")
+            + (f": {message}" if message else "")
+        )
+        self.resource = resource
+        self.status = status
+        self.reasons = reasons
+
+    @classmethod
+    def from_response(cls, resource: str, response: httpx.Response) -> "YouTubeApiError":
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            error = {}
+        if not isinstance(error, dict):
+            error = {}
+        reasons = [item.get("reason", "") for item in error.get("errors", []) if item.get("reason")]
+        return cls(resource, response.status_code, reasons, error.get("message", ""))
+
+
+def _query_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class YouTubeClient:
+    """APIキー1つ分のクライアント。状態を持たないため、スレッド間で共有できる。"""
+
+    def __init__(self, api_key: str, api_root: str | None = None):
+        self.api_key = api_key
+        root = api_root or os.environ.get("YOUTUBE_API_ENDPOINT") or YOUTUBE_API_ROOT
+        self.base_url = root.rstrip("/") + "/" + YOUTUBE_API_PATH
+
+    def __getattr__(self, resource_name):
+        if resource_name not in YOUTUBE_RESOURCES:
+            raise AttributeError(resource_name)
+        return lambda: _Resource(self, resource_name)
+
+    def list(self, resource_name: str, params: dict) -> dict:
+        query = {name: _query_value(value) for name, value in params.items() if value is not None}
+        response = get_http_client().get(
+            self.base_url + resource_name,
+            params=query,
+            headers={"X-Goog-Api-Key": self.api_key},
+        )
+        if response.is_error:
+            raise YouTubeApiError.from_response(resource_name, response)
+        return response.json()
+
+
+class _Resource:
+    def __init__(self, client, resource_name):
+        self.client = client
+        self.resource_name = resource_name
+
+    def list(self, **params):
+        return _Request(self.client, self.resource_name, params)
+
+
+class _Request:
+    def __init__(self, client, resource_name, params):
+        self.client = client
+        self.resource_name = resource_name
+        self.params = params
+
+    def execute(self):
+        return self.client.list(self.resource_name, self.params)
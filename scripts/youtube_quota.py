@@ -0,0 +1,239 @@
+"""複数のYouTube Data APIキーでクオータを分け合うクライアント
+
+YouTube Data API はキー（プロジェクト）ごとに1日10,000ユニットのクオータがあり、
+search.list は1回100ユニット、channels / playlistItems / videos の list は1ユニット
+消費する。YouTubeQuotaPool は呼び出しごとにこのコストを計上し、残りが最も多い
+キーに振り分ける。使用量は .cache/youtube-quota.json に太平洋時間の日付ごとに
+保存するため、同じ日の別の実行・別のスクリプトとも残量を共有できる。
+
+    youtube = YouTubeQuotaPool(youtube_api_keys(), TokenBucket(10))
+    youtube.channels().list(part="snippet", id=channel_id).execute()
+    youtube.search().list(...).execute(priority=PRIORITY_LOW)  # 残量が少なければ後回し
+    youtube.save()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytz
+
+from run_metrics import metrics
+from youtube_api import YouTubeApiError, YouTubeClient
+
+
+QUOTA_USAGE_PATH = Path(".cache/youtube-quota.json")
+# キー1つあたりの1日のクオータ（ユニット）
+DAILY_QUOTA = 10000
+# 呼び出し1回あたりのコスト。ここにないリソースの list は1ユニット
+QUOTA_COSTS = {"search": 100}
+LIST_COST = 1
+# 優先度の低い呼び出しは、全キーの残量がこの割合を下回ったら後回しにする
+LOW_PRIORITY_RESERVE = 0.1
+# クオータは太平洋時間の0時にリセットされる
+QUOTA_TIMEZONE = pytz.timezone("America/Los_Angeles")
+QUOTA_ERROR_REASONS = ("quotaExceeded", "dailyLimitExceeded")
+
+# 実行レポート（run_metrics）でのエンドポイント名。リクエスト数やレイテンシは
+# 共有のhttpxクライアントが同じ名前で記録し、ここではクオータと再試行を加える
+YOUTUBE_API_ENDPOINT_NAME = "youtube.googleapis.com/youtube/v3"
+
+PRIORITY_HIGH = "high"
+PRIORITY_LOW = "low"
+
+API_KEY_PATTERN = re.compile(r"YOUTUBE_API_KEY(\d*)")
+
+
+class QuotaExceeded(Exception):
+    """どのキーにも呼び出しに必要なクオータが残っていない"""
+
+
+class QuotaDeferred(QuotaExceeded):
+    """優先度の低い呼び出しを、残りのクオータを温存するために見送った"""
+
+
+def youtube_api_keys(environ=None) -> list[str]:
+    """YOUTUBE_API_KEY, YOUTUBE_API_KEY2, YOUTUBE_API_KEY3, ... の順にキーを返す"""
+    environ = os.environ if environ is None else environ
+    numbered = []
+    for name, value in environ.items():
+        match = API_KEY_PATTERN.fullmatch(name)
+        if match and value:
+            numbered.append((int(match.group(1) or 1), value))
+    return list(dict.fromkeys(value for _, value in sorted(numbered)))
+
+
+def is_quota_error(error: Exception) -> bool:
+    """YouTubeApiErrorが1日のクオータ超過によるものか"""
+    return (
+        isinstance(error, YouTubeApiError)
+        and error.status == 403
+        and any(reason in QUOTA_ERROR_REASONS for reason in error.reasons)
+    )
+
+
+def quota_date() -> str:
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+def key_fingerprint(api_key: str) -> str:
+    """キャッシュにキーそのものを残さないためのハッシュ"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def build_youtube_service(api_key: str):
+    """キーごとのクライアントを生成する。YOUTUBE_API_ENDPOINT で接続先を差し替えられる。"""
+    return YouTubeClient(api_key)
+
+
+class YouTubeQuotaPool:
+    """複数のAPIキーを束ね、クオータの残量に応じて呼び出しを振り分ける。
+
+    呼び出し方は通常のサービスと同じ youtube.channels().list(...).execute()。
+    サービスはキーごとに1つ生成し、スレッド間で共有する。
+    あるキーがクオータ超過（403 quotaExceeded）を返した場合は、そのキーを
+    使い切ったものとして次のキーで再試行する。
+    """
+
+    def __init__(
+        self,
+        api_keys,
+        rate_limiter=None,
+        path: Path = QUOTA_USAGE_PATH,
+        daily_quota: int = DAILY_QUOTA,
+        low_priority_reserve: float = LOW_PRIORITY_RESERVE,
+        service_factory=build_youtube_service,
+    ):
+        self.api_keys = list(dict.fromkeys(api_keys))
+        if not self.api_keys:
+            raise ValueError("YouTubeQuotaPool requires at least one API key")
+        self.rate_limiter = rate_limiter
+        self.path = path
+        self.daily_quota = daily_quota
+        self.low_priority_reserve = low_priority_reserve
+        self.service_factory = service_factory
+        self.fingerprints = {api_key: key_fingerprint(api_key) for api_key in self.api_keys}
+        self.lock = threading.Lock()
+        self.services = {}
+        self.date = quota_date()
+        self.usage: dict[str, int] = {}
+        self.spent = 0
+        self.deferred = 0
+        if path.exists():
+            try:
+                saved = json.loads(path.read_text(encoding="utf-8"))
+                if saved.get("date") == self.date:
+                    self.usage = saved.get("usage", {})
+            except ValueError:
+                pass
+
+    def __getattr__(self, resource_name):
+        if resource_name.startswith("_"):
+            raise AttributeError(resource_name)
+
+        def resource():
+            return _QuotaResource(self, resource_name)
+
+        return resource
+
+    def used(self, api_key: str) -> int:
+        return self.usage.get(self.fingerprints[api_key], 0)
+
+    def remaining(self, api_key: str | None = None) -> int:
+        """キーの残りユニット数。api_key を省略すると全キーの合計"""
+        keys = self.api_keys if api_key is None else [api_key]
+        return sum(max(0, self.daily_quota - self.used(key)) for key in keys)
+
+    def _reserve(self, cost: int, priority: str, exclude) -> str:
+        with self.lock:
+            today = quota_date()
+            if today != self.date:
+                self.date = today
+                self.usage = {}
+
+            available = [
+                key
+                for key in self.api_keys
+                if key not in exclude and self.remaining(key) >= cost
+            ]
+            if not available:
+                raise QuotaExceeded("YouTube API quota is exhausted on every key")
+            reserve = self.low_priority_reserve * self.daily_quota * len(self.api_keys)
+            if priority == PRIORITY_LOW and self.remaining() - cost < reserve:
+                self.deferred += 1
+                raise QuotaDeferred("YouTube API quota is reserved for high-priority calls")
+
+            api_key = max(available, key=self.remaining)
+            fingerprint = self.fingerprints[api_key]
+            self.usage[fingerprint] = self.usage.get(fingerprint, 0) + cost
+            self.spent += cost
+            return api_key
+
+    def _exhaust(self, api_key: str) -> None:
+        with self.lock:
+            self.usage[self.fingerprints[api_key]] = self.daily_quota
+        print(f"YouTube APIキー{self.api_keys.index(api_key) + 1}のクオータを使い切りました。")
+
+    def _service(self, api_key: str):
+        with self.lock:
+            if api_key not in self.services:
+                self.services[api_key] = self.service_factory(api_key)
+            return self.services[api_key]
+
+    def execute(self, resource_name: str, params: dict, priority: str = PRIORITY_HIGH):
+        """クオータを計上してからlistを呼び出す。クオータ超過なら次のキーで再試行する。"""
+        cost = QUOTA_COSTS.get(resource_name, LIST_COST)
+        endpoint = f"{YOUTUBE_API_ENDPOINT_NAME}/{resource_name}"
+        tried = set()
+        while True:
+            api_key = self._reserve(cost, priority, tried)
+            metrics.add_quota(endpoint, cost)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                service = self._service(api_key)
+                return getattr(service, resource_name)().list(**params).execute()
+            except Exception as error:
+                if not is_quota_error(error):
+                    raise
+                self._exhaust(api_key)
+                tried.add(api_key)
+                metrics.add_retry(endpoint)
+
+    def summary(self) -> str:
+        return (
+            f"YouTube quota: {self.spent} units used this run, "
+            f"{self.remaining()}/{self.daily_quota * len(self.api_keys)} remaining today "
+            f"({len(self.api_keys)} keys, {self.deferred} low-priority calls deferred)"
+        )
+
+    def save(self) -> None:
+        with self.lock:
+            content = json.dumps({"date": self.date, "usage": self.usage})
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(content, encoding="utf-8")
+
+
+class _QuotaResource:
+    def __init__(self, pool, resource_name):
+        self.pool = pool
+        self.resource_name = resource_name
+
+    def list(self, **params):
+        return _QuotaRequest(self.pool, self.resource_name, params)
+
+
+class _QuotaRequest:
+    def __init__(self, pool, resource_name, params):
+        self.pool = pool
+        self.resource_name = resource_name
+        self.params = params
+
+    def execute(self, priority=PRIORITY_HIGH):
+        return self.pool.execute(self.resource_name, self.params, priority)
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+# scripts/ と benchmarks/ 内のスクリプトは `python scripts/xxx.py` のように実行され、
+# 互いをモジュール名だけでimportするため、テストでも同じ検索パスを用意する。
+# 同じモジュールを scripts.xxx としてもimportすると別のモジュールとして二重に
+# 読み込まれるため、テストでもモジュール名だけでimportする。
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+
+class FakeRequest:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def execute(self, priority=None):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class FakeChannels:
+    def __init__(self, youtube):
+        self.youtube = youtube
+
+    def list(self, **params):
+        self.youtube.calls["channels"].append(params)
+        if "forHandle" in params:
+            handle = params["forHandle"].lstrip("@").lower()
+            if handle in self.youtube.broken_handles:
+                return FakeRequest(error=RuntimeError("backend error"))
+            channel_id = self.youtube.handles.get(handle)
+            return FakeRequest({"items": [{"id": channel_id}] if channel_id else []})
+        ids = params["id"].split(",")
+        items = [self.youtube.channel_items[i] for i in ids if i in self.youtube.channel_items]
+        return FakeRequest({"items": items})
+
+
+class FakePlaylistItems:
+    def __init__(self, youtube):
+        self.youtube = youtube
+
+    def list(self, **params):
+        self.youtube.calls["playlistItems"].append(params)
+        return FakeRequest({"items": self.youtube.playlist_items.get(params["playlistId"], [])})
+
+
+class FakeVideos:
+    def __init__(self, youtube):
+        self.youtube = youtube
+
+    def list(self, **params):
+        self.youtube.calls["videos"].append(params)
+        ids = params["id"].split(",")
+        items = [self.youtube.video_items[i] for i in ids if i in self.youtube.video_items]
+        return FakeRequest({"items": items})
+
+
+class FakeYouTube:
+    """channels / playlistItems / videos の呼び出しを記録する YouTubeQuotaPool の代わり"""
+
+    def __init__(self, channels=None, playlists=None, videos=None, handles=None, broken_handles=()):
+        self.calls = {"channels": [], "playlistItems": [], "videos": []}
+        self.channel_items = channels or {}
+        self.playlist_items = playlists or {}
+        self.video_items = videos or {}
+        self.handles = handles or {}
+        self.broken_handles = set(broken_handles)
+
+    def channels(self):
+        return FakeChannels(self)
+
+    def playlistItems(self):
+        return FakePlaylistItems(self)
+
+    def videos(self):
+        return FakeVideos(self)
+
+
+def make_channel(channel_id, title=None):
+    title = title or channel_id
+    return {
+        "id": channel_id,
+        "snippet": {
+            "title": title,
+            "description": f"{title}です",
+            "thumbnails": {
+                "default": {"url": f"https://yt3.ggpht.com/{channel_id}=s88"},
+                "high": {"url": f"https://yt3.ggpht.com/{channel_id}=s800"},
+            },
+        },
+        "statistics": {"subscriberCount": "1000"},
+        "contentDetails": {"relatedPlaylists": {"uploads": f"UU{channel_id}"}},
+    }
@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import add_aitubers
+import update_aitubers
+from conftest import FakeYouTube, make_channel
+
+
+def fake_helix(known_logins):
+    def twitch_api_get(path, params, client_id, access_token, rate_limiter=None):
+        if path == "users":
+            return {
+                "data": [
+                    {"id": f"id-{login}", "login": login, "display_name": login.title()}
+                    for login in params["login"]
+                    if login in known_logins
+                ]
+            }
+        return {"data": []}
+
+    return twitch_api_get
+
+
+EXISTING = {
+    "name": "ニケちゃん",
+    "description": "",
+    "tags": [],
+    "twitterID": "",
+    "youtubeChannelID": "UCnike",
+    "youtubeURL": "nikechan",
+    "imageUrl": "",
+    "youtubeSubscribers": 500,
+    "latestVideoTitle": "",
+    "latestVideoThumbnail": "",
+    "latestVideoUrl": "",
+    "latestVideoDate": "",
+}
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.data_path = Path("app/data/aitubers.json")
+        self.data_path.parent.mkdir(parents=True)
+        self.data_path.write_text(
+            json.dumps({"lastUpdated": "", "aitubers": [dict(EXISTING)]}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        # APIキーのない環境で作り、YouTube・Twitchはスタブに差し替える
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.main = add_aitubers.Main()
+        self.main.youtube = FakeYouTube(
+            {"UCnew": make_channel("UCnew", "New"), "UCother": make_channel("UCother", "Other")},
+            handles={"new": "UCnew", "nikechan": "UCnike", "gone": None},
+            broken_handles={"broken"},
+        )
+        self.main.twitch_client_id = "client"
+        self.main.twitch_access_token = "token"
+        patcher = mock.patch.object(
+            update_aitubers, "twitch_api_get", side_effect=fake_helix({"streamer"})
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def saved_names(self):
+        data = json.loads(self.data_path.read_text(encoding="utf-8"))
+        return [aituber["name"] for aituber in data["aitubers"]]
+
+    def test_each_url_gets_a_result_and_the_roster_is_saved_once(self):
+        urls = [
+            "https://www.youtube.com/@new",
+            "@New",
+            "https://www.youtube.com/channel/UCnew",
+            "https://www.youtube.com/@nikechan",
+            "https://www.youtube.com/channel/UCnike",
+            "https://www.youtube.com/@gone",
+            "https://www.youtube.com/@broken",
+            "https://www.twitch.tv/streamer",
+            "https://www.twitch.tv/Streamer/videos",
+            "https://www.twitch.tv/nobody",
+        ]
+        with mock.patch.object(add_aitubers, "save_aitubers", wraps=add_aitubers.save_aitubers) as save:
+            results = self.main.run_batch(urls, workers=2)
+
+        self.assertEqual(
+            results,
+            {
+                "https://www.youtube.com/@new": "added: New",
+                "@New": "duplicate",
+                "https://www.youtube.com/channel/UCnew": "duplicate",
+                "https://www.youtube.com/@nikechan": "duplicate",
+                "https://www.youtube.com/channel/UCnike": "duplicate",
+                "https://www.youtube.com/@gone": "not found",
+                "https://www.youtube.com/@broken": "not found",
+                "https://www.twitch.tv/streamer": "added: Streamer",
+                "https://www.twitch.tv/Streamer/videos": "duplicate",
+                "https://www.twitch.tv/nobody": "not found",
+            },
+        )
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(self.saved_names(), ["ニケちゃん", "New", "Streamer"])
+
+    def test_roster_duplicates_are_skipped_before_calling_the_api(self):
+        results = self.main.run_batch(["https://www.youtube.com/@NikeChan"])
+
+        self.assertEqual(results, {"https://www.youtube.com/@NikeChan": "duplicate"})
+        self.assertEqual(self.main.youtube.calls["channels"], [])
+        self.assertEqual(self.saved_names(), ["ニケちゃん"])
+
+    def test_text_lines_go_through_openai_extraction(self):
+        extracted = {
+            "ニケちゃんとOtherの紹介": [
+                {**add_aitubers.empty_aituber(), "name": "ニケちゃん", "youtubeChannelID": "UCnike"},
+                {**add_aitubers.empty_aituber(), "name": "Other", "youtubeChannelID": "UCother"},
+            ],
+            "見つからないAITuber": [{**add_aitubers.empty_aituber(), "name": "Unknown"}],
+        }
+
+        def extract(line):
+            if line not in extracted:
+                raise RuntimeError("OpenAI unavailable")
+            return extracted[line]
+
+        with mock.patch.object(add_aitubers, "extract_aitubers", side_effect=extract) as extract_mock:
+            results = self.main.run_batch(
+                ["ニケちゃんとOtherの紹介", "見つからないAITuber", "壊れた応答", "https://www.youtube.com/@new"]
+            )
+
+        self.assertEqual(
+            results,
+            {
+                "ニケちゃんとOtherの紹介": "added: Other",
+                "見つからないAITuber": "not found",
+                "壊れた応答": "extraction failed",
+                "https://www.youtube.com/@new": "added: New",
+            },
+        )
+        self.assertEqual(extract_mock.call_count, 3)
+        self.assertEqual(self.saved_names(), ["ニケちゃん", "New", "Other"])
+
+    def test_nothing_is_saved_when_nothing_is_added(self):
+        before = self.data_path.read_bytes()
+
+        results = self.main.run_batch(["https://www.youtube.com/@gone"])
+
+        self.assertEqual(results, {"https://www.youtube.com/@gone": "not found"})
+        self.assertEqual(self.data_path.read_bytes(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
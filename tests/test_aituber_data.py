@@ -0,0 +1,162 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from aituber_data import (
+    AituberIndex,
+    ShardStore,
+    aituber_key,
+    load_aitubers,
+    save_aitubers,
+    serialize_aitubers,
+)
+
+
+class SaveAitubersTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "aitubers.json"
+        self.data = {
+            "lastUpdated": "2026-08-01T09:00:00+09:00",
+            "aitubers": [{"name": "ニケちゃん", "youtubeSubscribers": 516}],
+        }
+        self.path.write_bytes(serialize_aitubers(self.data))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_roster_is_not_rewritten(self):
+        before = self.path.stat().st_mtime_ns
+        data = load_aitubers(self.path)
+
+        self.assertFalse(save_aitubers(data, self.path))
+        self.assertEqual(self.path.stat().st_mtime_ns, before)
+        self.assertEqual(load_aitubers(self.path)["lastUpdated"], "2026-08-01T09:00:00+09:00")
+
+    def test_changed_roster_bumps_last_updated(self):
+        data = load_aitubers(self.path)
+        data["aitubers"][0]["youtubeSubscribers"] = 517
+
+        self.assertTrue(save_aitubers(data, self.path))
+        saved = load_aitubers(self.path)
+        self.assertEqual(saved["aitubers"][0]["youtubeSubscribers"], 517)
+        self.assertNotEqual(saved["lastUpdated"], "2026-08-01T09:00:00+09:00")
+        self.assertEqual(list(saved), ["lastUpdated", "aitubers"])
+        self.assertEqual([p.name for p in Path(self.tmp.name).iterdir()], ["aitubers.json"])
+
+
+class ShardStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "aitubers"
+        self.store = ShardStore(self.root)
+        self.store.save(
+            {
+                "lastUpdated": "",
+                "aitubers": [
+                    {"name": "A", "youtubeChannelID": "UCa", "youtubeSubscribers": 1},
+                    {"name": "B", "youtubeChannelID": "UCb", "youtubeSubscribers": 2},
+                    {"name": "C", "twitchLogin": "Cee"},
+                ],
+            },
+            last_updated="2026-08-01T09:00:00+09:00",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def mtimes(self):
+        return {path.name: path.stat().st_mtime_ns for path in self.root.iterdir()}
+
+    def test_shards_are_read_only_when_accessed(self):
+        with mock.patch.object(ShardStore, "get", wraps=self.store.get) as get:
+            data = load_aitubers(self.root)
+            self.assertEqual(len(data["aitubers"]), 3)
+            get.assert_not_called()
+
+            self.assertEqual(data["aitubers"][1]["name"], "B")
+            self.assertEqual(data["aitubers"][1]["name"], "B")
+            get.assert_called_once_with("youtube-UCb")
+
+    def test_only_changed_shards_and_manifest_are_rewritten(self):
+        before = self.mtimes()
+        data = load_aitubers(self.root)
+        data["aitubers"][0]["youtubeSubscribers"] = 10
+        data["aitubers"][1]["name"]
+
+        self.assertTrue(save_aitubers(data, self.root))
+        after = self.mtimes()
+        changed = {name for name in after if after[name] != before[name]}
+        self.assertEqual(changed, {"youtube-UCa.json", "manifest.json"})
+        self.assertNotEqual(data["lastUpdated"], "2026-08-01T09:00:00+09:00")
+        self.assertEqual(load_aitubers(self.root)["aitubers"][0]["youtubeSubscribers"], 10)
+
+    def test_unchanged_store_is_not_rewritten(self):
+        before = self.mtimes()
+        data = load_aitubers(self.root)
+        list(data["aitubers"])
+
+        self.assertFalse(save_aitubers(data, self.root))
+        self.assertEqual(self.mtimes(), before)
+        self.assertEqual(data["lastUpdated"], "2026-08-01T09:00:00+09:00")
+
+    def test_added_and_removed_entries_update_the_shards(self):
+        data = load_aitubers(self.root)
+        del data["aitubers"][2]
+        data["aitubers"].append({"name": "D", "youtubeChannelID": "UCd"})
+
+        self.assertTrue(save_aitubers(data, self.root))
+        self.assertEqual(
+            sorted(path.name for path in self.root.iterdir()),
+            ["manifest.json", "youtube-UCa.json", "youtube-UCb.json", "youtube-UCd.json"],
+        )
+        self.assertEqual([a["name"] for a in load_aitubers(self.root)["aitubers"]], ["A", "B", "D"])
+
+    def test_duplicate_keys_are_rejected(self):
+        data = load_aitubers(self.root)
+        data["aitubers"].append({"name": "A2", "youtubeChannelID": "UCa"})
+
+        with self.assertRaises(ValueError):
+            save_aitubers(data, self.root)
+
+
+class AituberKeyTest(unittest.TestCase):
+    def test_keys_follow_frontend_slugs(self):
+        self.assertEqual(aituber_key({"youtubeChannelID": "UCa"}), "youtube-UCa")
+        self.assertEqual(aituber_key({"youtubeChannelID": "", "twitchLogin": "Bee"}), "twitch-bee")
+        self.assertEqual(aituber_key({"twitchUserID": "42"}), "twitch-id-42")
+
+
+class AituberIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.nike = {
+            "name": "ニケちゃん",
+            "youtubeChannelID": "UCj94TVhN0op8xZX9r-sTvSA",
+            "youtubeURL": "nikechan",
+        }
+        self.twitch = {"name": "T", "youtubeChannelID": "", "youtubeURL": "", "twitchLogin": "Streamer"}
+        self.index = AituberIndex([self.nike, self.twitch])
+
+    def test_same_channel_in_other_url_forms_is_found(self):
+        for candidate in [
+            {"youtubeChannelID": "UCj94TVhN0op8xZX9r-sTvSA"},
+            {"youtubeChannelID": "", "youtubeURL": "https://www.youtube.com/@NikeChan"},
+            {"youtubeChannelID": "", "youtubeURL": "https://www.youtube.com/channel/UCj94TVhN0op8xZX9r-sTvSA"},
+            {"youtubeChannelID": "", "twitchURL": "https://www.twitch.tv/streamer/videos"},
+        ]:
+            with self.subTest(candidate=candidate):
+                self.assertIsNotNone(self.index.find(candidate))
+
+    def test_new_entries_are_indexed_as_they_are_added(self):
+        newcomer = {"youtubeChannelID": "", "youtubeURL": "@newcomer"}
+        self.assertIsNone(self.index.find(newcomer))
+
+        self.index.add(newcomer)
+
+        self.assertIs(self.index.lookup("handle", "https://www.youtube.com/@Newcomer"), newcomer)
+        self.assertIs(self.index.lookup("twitch", "STREAMER"), self.twitch)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import argparse
+import tempfile
+import unittest
+from pathlib import Path
+
+from aituber_data import serialize_aitubers
+from http_client import close_http_client, configure_http_client, set_client_defaults
+from refresh_youtube_rss import FeedCache, extract_video_id, fetch_feed
+from run_benchmarks import benchmark_script, synthetic_roster
+from stub_server import AsyncStubTransport, StubServer, StubTransport, channel_id, video_ids
+from update_aitubers import fetch_twitch_streams, fetch_twitch_users
+
+
+class StubServerTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubServer().__enter__()
+        self.transport = StubTransport(self.stub.url)
+        configure_http_client(transport=self.transport)
+
+    def tearDown(self):
+        close_http_client()
+        self.transport.shutdown()
+        self.stub.__exit__(None, None, None)
+
+    def test_feeds_are_served_and_revalidated(self):
+        channel = channel_id(7)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FeedCache(Path(tmp) / "feeds.json")
+            first = fetch_feed(channel, cache)
+            second = fetch_feed(channel, cache)
+
+        self.assertEqual([extract_video_id(item["url"]) for item in first], video_ids(channel))
+        self.assertEqual(first, second)
+        self.assertEqual(self.stub.counts["rss"], 2)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_twitch_endpoints_are_counted(self):
+        users = fetch_twitch_users([f"user{i}" for i in range(150)], "client", "token")
+        streams = fetch_twitch_streams([user["id"] for user in users.values()], "client", "token")
+
+        self.assertEqual(len(streams), 150)
+        self.assertEqual(self.stub.counts["twitch.users"], 2)
+        self.assertEqual(self.stub.counts["twitch.streams"], 2)
+
+
+class BenchmarkScriptTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubServer().__enter__()
+        self.transport = StubTransport(self.stub.url)
+        set_client_defaults(
+            transport=self.transport,
+            async_transport_factory=lambda limits: AsyncStubTransport(self.stub.url, limits=limits),
+        )
+
+    def tearDown(self):
+        set_client_defaults()
+        close_http_client()
+        self.transport.shutdown()
+        self.stub.__exit__(None, None, None)
+
+    def test_each_script_starts_cold_and_reports_a_separate_warm_run(self):
+        args = argparse.Namespace(workers=2, rss_engine="threads", concurrency=4)
+        roster = serialize_aitubers(synthetic_roster(3))
+
+        first = benchmark_script(self.stub, "rss", roster, args, {})
+        second = benchmark_script(self.stub, "rss", roster, args, {})
+
+        self.assertEqual([result["run"] for result in first], ["cold", "warm"])
+        cold, warm = first
+        self.assertIsNone(cold["error"])
+        self.assertGreater(cold["bytes"], 0)
+        # The warm run revalidates the cached feeds and only gets 304s back.
+        self.assertEqual(warm["bytes"], 0)
+        # A new workspace does not inherit the previous run's cache.
+        self.assertEqual(second[0]["bytes"], cold["bytes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
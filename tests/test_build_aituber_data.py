@@ -0,0 +1,101 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_aituber_data import build, list_entry
+
+
+def roster():
+    return {
+        "lastUpdated": "2026-08-01T09:00:00+09:00",
+        "aitubers": [
+            {
+                "name": "ニケちゃん",
+                "description": "AITuberです",
+                "tags": ["雑談"],
+                "youtubeChannelID": "UCa",
+                "youtubeURL": "https://www.youtube.com/@nike",
+                "latestVideoTitle": "最新",
+                "latestVideoThumbnail": "thumb",
+                "latestVideoUrl": "https://www.youtube.com/watch?v=new",
+                "latestVideoDate": "2026-07-31T20:00:00+09:00",
+                "recentYoutubeVideos": [
+                    {"title": "古い", "thumbnail": "", "url": "u1", "date": "2026-07-01T20:00:00+09:00"},
+                    {"title": "最新", "thumbnail": "", "url": "u2", "date": "2026-07-31T20:00:00+09:00"},
+                    {"title": "中間", "thumbnail": "", "url": "u3", "date": "2026-07-15T20:00:00+09:00"},
+                ],
+            },
+            {"name": "B", "description": "", "tags": [], "youtubeChannelID": "", "twitchLogin": "Bee"},
+        ],
+    }
+
+
+class ListEntryTest(unittest.TestCase):
+    def test_keeps_only_the_newest_recent_video(self):
+        entry = list_entry(roster()["aitubers"][0])
+
+        self.assertEqual([video["title"] for video in entry["recentYoutubeVideos"]], ["最新"])
+        self.assertNotIn("youtubeURL", entry)
+        self.assertNotIn("latestVideoTitle", entry)
+        self.assertEqual(entry["latestVideoUrl"], "https://www.youtube.com/watch?v=new")
+
+    def test_latest_video_fields_are_kept_without_recent_videos(self):
+        aituber = roster()["aitubers"][0]
+        del aituber["recentYoutubeVideos"]
+
+        entry = list_entry(aituber)
+        self.assertNotIn("recentYoutubeVideos", entry)
+        self.assertEqual(entry["latestVideoTitle"], "最新")
+
+
+class BuildTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp.name) / "generated"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        return json.loads((self.output / name).read_text(encoding="utf-8"))
+
+    def test_writes_list_details_and_index(self):
+        data = roster()
+        stats = build(data, self.output)
+
+        self.assertEqual(stats, {"entries": 2, "written": 4, "removed": 0})
+        self.assertEqual(
+            self.read("index.json")["entries"],
+            {"youtube-UCa": "aitubers/youtube-UCa.json", "twitch-bee": "aitubers/twitch-bee.json"},
+        )
+        listed = self.read("aitubers-list.json")
+        self.assertEqual(listed["lastUpdated"], data["lastUpdated"])
+        self.assertEqual([entry["name"] for entry in listed["aitubers"]], ["ニケちゃん", "B"])
+        self.assertEqual(self.read("aitubers/youtube-UCa.json"), data["aitubers"][0])
+
+    def test_rebuild_rewrites_only_changed_files_and_removes_stale_details(self):
+        data = roster()
+        build(data, self.output)
+        unchanged = self.output / "aitubers" / "youtube-UCa.json"
+        before = unchanged.stat().st_mtime_ns
+
+        self.assertEqual(build(data, self.output)["written"], 0)
+
+        data["aitubers"][1]["twitchLogin"] = "Cee"
+        stats = build(data, self.output)
+        self.assertEqual(stats["written"], 3)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse((self.output / "aitubers" / "twitch-bee.json").exists())
+        self.assertEqual(unchanged.stat().st_mtime_ns, before)
+
+    def test_duplicate_slugs_are_rejected(self):
+        data = roster()
+        data["aitubers"].append({"name": "copy", "youtubeChannelID": "UCa"})
+
+        with self.assertRaises(ValueError):
+            build(data, self.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import pytz
+
+from update_aitubers import apply_twitch_stream, live_candidate_video_ids, update_live_status
+
+JST = pytz.timezone("Asia/Tokyo")
+
+
+def make_video(video_id, state, start="2026-08-12T10:00:00Z"):
+    return {
+        "id": video_id,
+        "snippet": {"title": video_id, "liveBroadcastContent": state, "publishedAt": start},
+        "status": {"privacyStatus": "public"},
+        "liveStreamingDetails": {"actualStartTime": start} if state == "live" else {},
+    }
+
+
+class LiveCandidateVideoIdsTest(unittest.TestCase):
+    def test_only_upcoming_and_recent_videos_are_checked(self):
+        now = datetime.now(JST)
+        aituber = {
+            "latestVideoUrl": "https://www.youtube.com/watch?v=upcoming",
+            "latestVideoDate": (now + timedelta(days=1)).isoformat(),
+            "isUpcoming": True,
+            "recentYoutubeVideos": [
+                {"url": "https://www.youtube.com/live/recent", "date": (now - timedelta(hours=2)).isoformat()},
+                {"url": "https://www.youtube.com/watch?v=old", "date": (now - timedelta(days=3)).isoformat()},
+            ],
+        }
+
+        self.assertEqual(live_candidate_video_ids(aituber, now), ["upcoming", "recent"])
+
+
+class UpdateLiveStatusTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.status_path = Path(self.tmp.name) / "live-status.json"
+        now = datetime.now(JST)
+        self.data = {
+            "lastUpdated": "",
+            "aitubers": [
+                {
+                    "name": "YouTube",
+                    "youtubeChannelID": "UCa",
+                    "latestVideoUrl": "https://www.youtube.com/watch?v=started",
+                    "latestVideoDate": (now - timedelta(minutes=5)).isoformat(),
+                    "isUpcoming": True,
+                },
+                {
+                    "name": "Twitch",
+                    "youtubeChannelID": "",
+                    "twitchLogin": "nike",
+                    "twitchUserID": "42",
+                    "twitchURL": "https://www.twitch.tv/nike",
+                    "twitchIsLive": False,
+                },
+            ],
+        }
+        self.saved = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_live_status(self, available=True, videos=None):
+        def load(path=None):
+            if path is None:
+                return self.data
+            return json.loads(Path(path).read_text(encoding="utf-8"))
+
+        def save(data, path=None):
+            if path is None:
+                self.saved.append(data)
+                return True
+            Path(path).write_text(json.dumps(data), encoding="utf-8")
+            return True
+
+        twitch_calls = []
+
+        def twitch_api_get(path, params, client_id, access_token, rate_limiter=None):
+            twitch_calls.append(path)
+            if not available:
+                raise RuntimeError("503 Service Unavailable")
+            return {"data": [{"user_id": "42", "title": "on air", "started_at": "2026-08-12T00:00:00Z"}]}
+
+        def fetch_youtube_videos(youtube, ids, workers=1, checked=None):
+            if not available:
+                return {}
+            checked.update(ids)
+            return {"started": make_video("started", "live")} if videos is None else videos
+
+        with mock.patch.multiple(
+            "update_aitubers",
+            load_aitubers=load,
+            save_aitubers=save,
+            youtube_api_keys=lambda: ["key"],
+            YouTubeQuotaPool=mock.MagicMock(),
+            TwitchAppToken=mock.MagicMock(),
+            twitch_api_get=twitch_api_get,
+            fetch_youtube_videos=fetch_youtube_videos,
+        ), mock.patch.dict(
+            "os.environ", {"TWITCH_CLIENT_ID": "client", "TWITCH_CLIENT_SECRET": "secret"}
+        ):
+            update_live_status(status_path=self.status_path)
+        return twitch_calls
+
+    def test_status_file_is_written_and_the_roster_is_left_alone(self):
+        twitch_calls = self.run_live_status()
+
+        self.assertEqual(twitch_calls, ["streams"])
+        self.assertEqual(self.saved, [])
+        status = json.loads(self.status_path.read_text(encoding="utf-8"))
+        self.assertEqual(
+            [(entry["platform"], entry["state"], entry["key"]) for entry in status["entries"]],
+            [("twitch", "live", "twitch-nike"), ("youtube", "live", "youtube-UCa")],
+        )
+        self.assertEqual(status["entries"][0]["title"], "on air")
+
+    def test_unchecked_videos_and_streams_keep_their_previous_entries(self):
+        previous = [
+            {"key": "twitch-nike", "name": "Twitch", "platform": "twitch", "state": "live",
+             "title": "on air", "url": "https://www.twitch.tv/nike", "startsAt": "2026-08-12T00:00:00Z"},
+            {"key": "youtube-UCa", "name": "YouTube", "platform": "youtube", "state": "upcoming",
+             "title": "started", "url": "https://www.youtube.com/watch?v=started",
+             "startsAt": "2026-08-12T10:00:00Z"},
+            {"key": "youtube-UCa", "name": "YouTube", "platform": "youtube", "state": "upcoming",
+             "title": "gone", "url": "https://www.youtube.com/watch?v=gone", "startsAt": "2026-08-13T10:00:00Z"},
+        ]
+        self.status_path.write_text(
+            json.dumps({"lastUpdated": "2026-08-12T09:00:00+09:00", "entries": previous}), encoding="utf-8"
+        )
+
+        self.run_live_status(available=False)
+
+        status = json.loads(self.status_path.read_text(encoding="utf-8"))
+        # 今回の候補でない動画（gone）は引き継がない
+        self.assertEqual(status["entries"], previous[:2])
+        self.assertEqual(status["lastUpdated"], "2026-08-12T09:00:00+09:00")
+
+    def test_checked_videos_that_are_no_longer_live_are_dropped(self):
+        self.status_path.write_text(
+            json.dumps({"lastUpdated": "", "entries": [
+                {"key": "youtube-UCa", "name": "YouTube", "platform": "youtube", "state": "live",
+                 "title": "old", "url": "https://www.youtube.com/watch?v=started", "startsAt": ""},
+            ]}),
+            encoding="utf-8",
+        )
+        self.data["aitubers"] = self.data["aitubers"][:1]
+
+        self.run_live_status(videos={})
+
+        status = json.loads(self.status_path.read_text(encoding="utf-8"))
+        self.assertEqual(status["entries"], [])
+
+
+class ApplyTwitchStreamTest(unittest.TestCase):
+    def test_ended_stream_clears_the_live_fields(self):
+        aituber = {"twitchLogin": "nike", "twitchURL": "https://www.twitch.tv/nike"}
+        apply_twitch_stream(
+            aituber,
+            {"title": "on air", "thumbnail_url": "https://example.com/{width}x{height}.jpg",
+             "started_at": "2026-08-12T00:00:00Z"},
+        )
+        self.assertEqual(aituber["twitchContentUrl"], "https://www.twitch.tv/nike")
+
+        apply_twitch_stream(aituber, None)
+
+        self.assertFalse(aituber["twitchIsLive"])
+        for field in ("twitchTitle", "twitchThumbnail", "twitchContentUrl", "twitchContentDate"):
+            self.assertEqual(aituber[field], "", field)
+
+    def test_offline_channel_keeps_its_latest_vod(self):
+        vod = {
+            "twitchLogin": "nike",
+            "twitchURL": "https://www.twitch.tv/nike",
+            "twitchIsLive": False,
+            "twitchTitle": "VOD",
+            "twitchContentUrl": "https://www.twitch.tv/videos/1",
+        }
+        aituber = dict(vod)
+
+        apply_twitch_stream(aituber, None)
+
+        self.assertEqual(aituber, vod)
+
+
+if __name__ == "__main__":
+    unittest.main()
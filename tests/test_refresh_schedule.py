@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from refresh_schedule import HOUR, RefreshSchedule, estimate_requests, refresh_interval
+
+NOW = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+
+def make_aituber(channel_id, days_idle=None, **fields):
+    aituber = {"name": channel_id, "youtubeChannelID": channel_id, "youtubeSubscribers": 0}
+    if days_idle is not None:
+        aituber["latestVideoDate"] = (NOW - timedelta(days=days_idle)).isoformat()
+    aituber.update(fields)
+    return aituber
+
+
+class RefreshIntervalTest(unittest.TestCase):
+    def test_intervals_follow_activity(self):
+        now = NOW.timestamp()
+        self.assertEqual(refresh_interval(make_aituber("UCa", 2), now), 1 * HOUR)
+        self.assertEqual(refresh_interval(make_aituber("UCa", 20), now), 6 * HOUR)
+        self.assertEqual(refresh_interval(make_aituber("UCa", 400), now), 72 * HOUR)
+        self.assertEqual(refresh_interval(make_aituber("UCa"), now), 72 * HOUR)
+
+    def test_live_and_popular_channels_refresh_sooner(self):
+        now = NOW.timestamp()
+        self.assertEqual(refresh_interval(make_aituber("UCa", 400, isUpcoming=True), now), 0)
+        self.assertEqual(refresh_interval(make_aituber("UCa", 400, twitchIsLive=True), now), 0)
+        self.assertEqual(
+            refresh_interval(make_aituber("UCa", 20, youtubeSubscribers=200_000), now), 3 * HOUR
+        )
+
+
+class RefreshScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "refresh-schedule.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_refreshed_entries_wait_for_their_interval(self):
+        now = NOW.timestamp()
+        active, dormant = make_aituber("UCactive", 1), make_aituber("UCdormant", 400)
+        schedule = RefreshSchedule(self.path)
+        for aituber in schedule.select_due([active, dormant], now):
+            schedule.mark_refreshed(aituber, now)
+        schedule.save()
+
+        reloaded = RefreshSchedule(self.path)
+
+        self.assertEqual(reloaded.select_due([active, dormant], now + 2 * HOUR), [active])
+        self.assertEqual(reloaded.select_due([active, dormant], now + 73 * HOUR), [active, dormant])
+
+    def test_live_entries_come_first_within_the_budget(self):
+        roster = [make_aituber(f"UC{i}", 1) for i in range(10)]
+        roster[7]["isUpcoming"] = True
+        schedule = RefreshSchedule(self.path)
+
+        selected = schedule.select_due(roster, NOW.timestamp(), request_budget=estimate_requests(3, 0))
+
+        self.assertEqual(selected, [roster[7], roster[0], roster[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
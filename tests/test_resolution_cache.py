@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from resolution_cache import ChannelResolutionCache
+
+
+class ChannelResolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "channel-resolution.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_handles_resolve_case_insensitively_across_runs(self):
+        cache = ChannelResolutionCache(self.path)
+        cache.put("https://www.youtube.com/@NikeChan", "UCj94TVhN0op8xZX9r-sTvSA")
+        cache.save()
+
+        reloaded = ChannelResolutionCache(self.path)
+
+        self.assertEqual(reloaded.get("https://youtube.com/@nikechan/videos"), (True, "UCj94TVhN0op8xZX9r-sTvSA"))
+        self.assertEqual(reloaded.get("https://www.youtube.com/@other"), (False, None))
+
+    def test_channel_urls_resolve_without_an_entry(self):
+        cache = ChannelResolutionCache(self.path)
+
+        self.assertEqual(
+            cache.get("https://www.youtube.com/channel/UCj94TVhN0op8xZX9r-sTvSA"),
+            (True, "UCj94TVhN0op8xZX9r-sTvSA"),
+        )
+
+    def test_misses_expire_sooner_than_hits(self):
+        cache = ChannelResolutionCache(self.path, ttl=100, negative_ttl=10)
+        with mock.patch("resolution_cache.time.time", return_value=1000):
+            cache.put("@found", "UCj94TVhN0op8xZX9r-sTvSA")
+            cache.put("@missing", None)
+
+        with mock.patch("resolution_cache.time.time", return_value=1050):
+            self.assertEqual(cache.get("@found"), (True, "UCj94TVhN0op8xZX9r-sTvSA"))
+            self.assertEqual(cache.get("@missing"), (False, None))
+
+    def test_seed_registers_existing_custom_urls(self):
+        cache = ChannelResolutionCache(self.path)
+        cache.seed([{"youtubeURL": "@nikechan", "youtubeChannelID": "UCj94TVhN0op8xZX9r-sTvSA"}])
+
+        self.assertEqual(cache.get("https://www.youtube.com/@NIKECHAN"), (True, "UCj94TVhN0op8xZX9r-sTvSA"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+from http_client import close_http_client, configure_http_client, set_client_defaults
+from refresh_youtube_rss import (
+    FeedCache,
+    FeedParser,
+    apply_canonical_latest,
+    fetch_feed,
+    refresh_feeds_async,
+)
+
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">
+  <entry>
+    <title>First</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v=aaaaaaaaaaa"/>
+    <published>2026-08-12T10:00:00+00:00</published>
+    <media:group><media:thumbnail url="https://i.ytimg.com/vi/aaaaaaaaaaa/hqdefault.jpg"/></media:group>
+  </entry>
+  <entry>
+    <title>Second</title>
+    <link rel="alternate" href="https://www.youtube.com/shorts/bbbbbbbbbbb"/>
+    <published>2026-08-11T10:00:00+00:00</published>
+  </entry>
+</feed>
+"""
+
+
+def serve(*responses):
+    """Install a mock transport that returns the given responses in order."""
+    requests = []
+    queue = list(responses)
+
+    def handler(request):
+        requests.append(request)
+        return queue.pop(0)
+
+    configure_http_client(transport=httpx.MockTransport(handler))
+    return requests
+
+
+class FeedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "feeds.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        close_http_client()
+
+    def test_not_modified_response_reuses_cached_entries(self):
+        requests = serve(
+            httpx.Response(200, content=FEED, headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        )
+        cache = FeedCache(self.path)
+        first = fetch_feed("UC1", cache)
+        cache.save()
+
+        reloaded = FeedCache(self.path)
+        second = fetch_feed("UC1", reloaded)
+
+        self.assertEqual([item["title"] for item in first], ["First", "Second"])
+        self.assertEqual(second, first)
+        self.assertEqual(requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(reloaded.stats(), {"hits": 1, "misses": 0})
+
+    def test_rewriting_fetched_entries_does_not_change_the_cache(self):
+        serve(
+            httpx.Response(200, content=FEED, headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        )
+        cache = FeedCache(self.path)
+        first = fetch_feed("UC1", cache)
+        apply_canonical_latest(
+            {
+                "latestVideoUrl": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+                "latestVideoTitle": "API title",
+                "latestVideoDate": "2026-08-12T21:00:00+09:00",
+            },
+            first,
+        )
+        second = fetch_feed("UC1", cache)
+        second[1]["title"] = "changed"
+
+        self.assertEqual(first[0]["title"], "API title")
+        self.assertEqual([item["title"] for item in cache.hit("UC1")], ["First", "Second"])
+        self.assertEqual(cache.hit("UC1")[0]["date"], "2026-08-12T10:00:00+00:00")
+
+    def test_responses_without_validators_are_not_cached(self):
+        serve(httpx.Response(200, content=FEED))
+        cache = FeedCache(self.path)
+        fetch_feed("UC1", cache)
+
+        self.assertEqual(cache.validators("UC1"), {})
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1})
+
+
+class FeedParserTest(unittest.TestCase):
+    def tearDown(self):
+        close_http_client()
+
+    def test_parser_stops_after_max_entries_across_chunks(self):
+        parser = FeedParser(max_entries=1)
+        done = [parser.feed(FEED[i : i + 64]) for i in range(0, len(FEED), 64)]
+
+        self.assertTrue(any(done))
+        self.assertFalse(parser.complete)
+        self.assertEqual([item["title"] for item in parser.contents], ["First"])
+        self.assertEqual(
+            parser.contents[0]["thumbnail"], "https://i.ytimg.com/vi/aaaaaaaaaaa/hqdefault.jpg"
+        )
+
+    def test_truncated_cache_entry_is_not_reused_for_a_longer_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            requests = serve(
+                httpx.Response(200, content=FEED, headers={"ETag": '"v1"'}),
+                httpx.Response(200, content=FEED, headers={"ETag": '"v1"'}),
+            )
+            cache = FeedCache(Path(tmp) / "feeds.json")
+
+            self.assertEqual(len(fetch_feed("UC1", cache, max_entries=1)), 1)
+            self.assertEqual(len(fetch_feed("UC1", cache)), 2)
+
+        self.assertNotIn("If-None-Match", requests[1].headers)
+
+
+class AsyncRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+    def tearDown(self):
+        set_client_defaults()
+
+    def serve_async(self, handler):
+        async def record(request):
+            self.requests.append(request.url.params["channel_id"])
+            return await handler(request)
+
+        set_client_defaults(async_transport_factory=lambda limits: httpx.MockTransport(record))
+
+    def test_feeds_left_at_the_deadline_are_deferred(self):
+        async def handler(request):
+            if request.url.params["channel_id"] == "UCslow":
+                await asyncio.sleep(5)
+            return httpx.Response(200, content=FEED)
+
+        self.serve_async(handler)
+        feeds, errors, deferred = asyncio.run(
+            refresh_feeds_async(["UC1", "UCslow", "UC2"], concurrency=4, deadline=0.2)
+        )
+
+        self.assertEqual(sorted(feeds), ["UC1", "UC2"])
+        self.assertEqual(errors, {})
+        self.assertEqual(deferred, ["UCslow"])
+
+    def test_server_errors_are_retried_but_client_errors_are_not(self):
+        failures = {"UC1": 2}
+
+        async def handler(request):
+            channel_id = request.url.params["channel_id"]
+            if channel_id == "UCgone":
+                return httpx.Response(404)
+            if failures.get(channel_id):
+                failures[channel_id] -= 1
+                return httpx.Response(503)
+            return httpx.Response(200, content=FEED)
+
+        self.serve_async(handler)
+        with mock.patch("refresh_youtube_rss.retry_delay", return_value=0):
+            feeds, errors, deferred = asyncio.run(
+                refresh_feeds_async(["UC1", "UCgone"], retries=2, deadline=None)
+            )
+
+        self.assertEqual([item["title"] for item in feeds["UC1"]], ["First", "Second"])
+        self.assertIn("HTTPStatusError", errors["UCgone"])
+        self.assertEqual(deferred, [])
+        self.assertEqual(self.requests.count("UC1"), 3)
+        self.assertEqual(self.requests.count("UCgone"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import httpx
+
+from http_client import close_http_client, configure_http_client, get_http_client
+from run_metrics import metrics, percentile
+
+
+class RunMetricsTest(unittest.TestCase):
+    def setUp(self):
+        metrics.reset("test")
+
+    def tearDown(self):
+        close_http_client()
+
+    def test_requests_are_recorded_per_endpoint(self):
+        def handler(request):
+            if request.url.path == "/helix/streams":
+                return httpx.Response(503)
+            return httpx.Response(200, content=b"<feed/>")
+
+        configure_http_client(transport=httpx.MockTransport(handler))
+        client = get_http_client()
+        client.get("https://www.youtube.com/feeds/videos.xml", params={"channel_id": "UCa"})
+        client.get("https://www.youtube.com/feeds/videos.xml", params={"channel_id": "UCb"})
+        client.get("https://api.twitch.tv/helix/streams")
+
+        endpoints = metrics.report()["endpoints"]
+        feeds = endpoints["www.youtube.com/feeds/videos.xml"]
+        self.assertEqual(feeds["requests"], 2)
+        self.assertEqual(feeds["bytes"], 14)
+        self.assertEqual(feeds["statusCodes"], {"200": 2})
+        self.assertEqual(endpoints["api.twitch.tv/helix/streams"]["errors"], {"HTTP 503": 1})
+
+    def test_report_includes_caches_errors_and_history(self):
+        metrics.record_cache("youtube-feeds", hits=3, misses=1)
+        metrics.record_error("update", KeyError("x"))
+        metrics.record_error("add", "not found")
+        metrics.add_quota("youtube.googleapis.com/youtube/v3/search", 100)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = Path(tmp) / "metrics" / "run.json"
+            history_path = Path(tmp) / "metrics" / "history.jsonl"
+            metrics.write(report_path, history_path)
+            metrics.write(report_path, history_path)
+
+            report = json.loads(report_path.read_text(encoding="utf-8"))
+            history = history_path.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(report["caches"]["youtube-feeds"]["hitRate"], 0.75)
+        self.assertEqual(report["errors"], {"add": {"not found": 1}, "update": {"KeyError": 1}})
+        self.assertEqual(report["endpoints"]["youtube.googleapis.com/youtube/v3/search"]["quotaUnits"], 100)
+        self.assertEqual(len(history), 2)
+
+    def test_percentiles_use_nearest_rank(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 90), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
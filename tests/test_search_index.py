@@ -0,0 +1,129 @@
+import json
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_aituber_data import build_search
+from search_index import (
+    GRAM_SIZE,
+    ROMAJI,
+    build_search_index,
+    fold,
+    load_search_index,
+    romanize,
+    text_grams,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+# lib/search.ts と共有する正規化のケース（scripts/check-search-normalization.mjs も使う）
+NORMALIZATION_FIXTURE = ROOT / "tests" / "fixtures" / "search_normalization.json"
+
+
+def roster():
+    return [
+        {"name": "ニケちゃん", "description": "AIキャラクターです", "tags": ["雑談", "ASMR"]},
+        {"name": "ＡＩ Tuber", "description": "ｹﾞｰﾑ実況", "tags": ["ゲーム実況"]},
+        {"name": "Nike", "description": "", "tags": ["雑談"]},
+    ]
+
+
+def candidates(index, query):
+    """検索側と同じく、クエリの2-gramのポスティングの積集合を取る"""
+    ordinals = None
+    for gram in text_grams(fold(query)):
+        postings = set(index["grams"].get(gram, []))
+        ordinals = postings if ordinals is None else ordinals & postings
+    return sorted(ordinals or [])
+
+
+class FoldTest(unittest.TestCase):
+    def test_folds_width_case_and_katakana(self):
+        self.assertEqual(fold("ＡＩ Tuber"), "ai tuber")
+        self.assertEqual(fold("ｹﾞｰﾑ"), "げーむ")
+        self.assertEqual(fold("ニケ"), "にけ")
+
+    def test_romanizes_digraphs_sokuon_and_long_vowels(self):
+        self.assertEqual(romanize(fold("ニケちゃん")), "nikechan")
+        self.assertEqual(romanize(fold("キャッチー")), "kyacchi")
+        self.assertEqual(romanize(fold("がっこう")), "gakkou")
+
+    def test_grams_stop_at_word_boundaries(self):
+        self.assertEqual(text_grams("ab cd"), {"ab", "cd"})
+        self.assertEqual(text_grams("【a】"), set())
+
+
+class SharedNormalizationTest(unittest.TestCase):
+    def setUp(self):
+        self.fixture = json.loads(NORMALIZATION_FIXTURE.read_text(encoding="utf-8"))
+
+    def test_python_matches_the_shared_fixture(self):
+        self.assertEqual(self.fixture["gramSize"], GRAM_SIZE)
+        self.assertEqual(self.fixture["romaji"], ROMAJI)
+        for case in self.fixture["cases"]:
+            with self.subTest(text=case["input"]):
+                folded = fold(case["input"])
+                self.assertEqual(folded, case["folded"])
+                self.assertEqual(romanize(folded), case["romanized"])
+                self.assertEqual(text_grams(folded), set(case["grams"]))
+
+    def test_typescript_matches_the_shared_fixture(self):
+        if not shutil.which("node") or not (ROOT / "node_modules" / "typescript").exists():
+            self.skipTest("node and the typescript package are needed to run lib/search.ts")
+        result = subprocess.run(
+            ["node", "scripts/check-search-normalization.mjs"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class BuildSearchIndexTest(unittest.TestCase):
+    def test_postings_point_to_entry_ordinals(self):
+        index, reused = build_search_index(roster())
+
+        self.assertEqual(reused, 0)
+        self.assertEqual(index["docs"][0], build_search_index(roster()[:1])[0]["docs"][0])
+        self.assertEqual(index["tags"], {"雑談": [0, 2], "ASMR": [0], "ゲーム実況": [1]})
+        self.assertEqual(candidates(index, "nike"), [0, 2])
+        self.assertEqual(candidates(index, "にけ"), [0])
+        self.assertEqual(candidates(index, "ゲーム"), [1])
+        self.assertEqual(candidates(index, "aituber"), [])
+        self.assertEqual(candidates(index, "AI"), [0, 1])
+
+    def test_unchanged_entries_are_reused_after_reordering(self):
+        previous, _ = build_search_index(roster())
+        aitubers = list(reversed(roster()))
+        aitubers[0]["description"] = "歌枠"
+
+        index, reused = build_search_index(aitubers, previous)
+        self.assertEqual(reused, 2)
+        self.assertEqual(index, build_search_index(aitubers)[0])
+
+    def test_index_from_another_version_is_not_reused(self):
+        previous, _ = build_search_index(roster())
+        previous["version"] = 0
+
+        self.assertEqual(build_search_index(roster(), previous)[1], 0)
+
+
+class BuildSearchTest(unittest.TestCase):
+    def test_rebuild_writes_only_when_the_index_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data" / "search-index.json"
+            data = {"lastUpdated": "", "aitubers": roster()}
+
+            self.assertEqual(build_search(data, path)["written"], 1)
+            stats = build_search(data, path)
+            self.assertEqual((stats["reused"], stats["written"]), (3, 0))
+
+            data["aitubers"][1]["tags"].append("歌唱あり")
+            stats = build_search(data, path)
+            self.assertEqual((stats["reused"], stats["written"]), (3, 1))
+            self.assertEqual(load_search_index(path)["tags"]["歌唱あり"], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
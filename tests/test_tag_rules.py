@@ -0,0 +1,99 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from tag_rules import TagMatcher, TagRule, apply_tags
+
+
+def titles(*names):
+    return [{"title": name} for name in names]
+
+
+class TagMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = TagMatcher.from_file()
+
+    def test_asmr_rule_keeps_the_previous_thresholds(self):
+        cases = [
+            ({"name": "耳かきボイスの子"}, titles(), True),
+            ({"name": "Plain"}, titles("ASMR 1", "ear cleaning 2"), True),
+            ({"name": "Plain"}, titles("ASMR 1"), False),
+            ({"name": "Plain", "description": "音フェチ配信"}, titles("ASMR 1"), True),
+            ({"name": "Plain", "description": "音フェチ配信"}, titles(), False),
+            ({"name": "Plain"}, titles("GASMRX", "asmrtist"), False),
+        ]
+        for aituber, contents, expected in cases:
+            with self.subTest(aituber=aituber, contents=contents):
+                self.assertEqual("ASMR" in self.matcher.evaluate(aituber, contents), expected)
+
+    def test_one_scan_reports_every_tag_with_evidence(self):
+        contents = titles("【歌枠】ASMR もやる", "歌ってみた / ASMR", "ゲーム実況 #1")
+
+        qualified = self.matcher.evaluate({"name": "Plain"}, contents)
+
+        self.assertEqual(qualified["ASMR"], ["【歌枠】ASMR もやる", "歌ってみた / ASMR"])
+        self.assertEqual(qualified["歌唱あり"], ["【歌枠】ASMR もやる", "歌ってみた / ASMR"])
+        self.assertNotIn("ゲーム実況", qualified)
+
+    def test_exclusions_void_the_text_for_that_tag_only(self):
+        contents = titles("歌ってみた リアクション ASMR", "歌枠に反応する ASMR")
+
+        qualified = self.matcher.evaluate({"name": "Plain"}, contents)
+
+        self.assertNotIn("歌唱あり", qualified)
+        self.assertEqual(len(qualified["ASMR"]), 2)
+
+    def test_patterns_of_different_tags_at_the_same_position_are_all_seen(self):
+        matcher = TagMatcher([TagRule("A", ["歌枠"]), TagRule("B", ["歌枠雑談"])])
+
+        self.assertEqual(matcher.scan("歌枠雑談"), {"A", "B"})
+        self.assertEqual(matcher.scan("【歌枠】雑談"), {"A"})
+
+    def test_patterns_of_different_tags_inside_another_match_are_seen(self):
+        matcher = TagMatcher([TagRule("A", ["歌枠雑談"]), TagRule("B", ["雑談"]), TagRule("C", [r"\bASMR\b"])])
+
+        self.assertEqual(matcher.scan("歌枠雑談"), {"A", "B"})
+        self.assertEqual(matcher.scan("雑談 asmr"), {"B", "C"})
+        self.assertEqual(matcher.scan("ASMRs"), set())
+
+    def test_one_tags_exclusion_does_not_hide_another_tags_match(self):
+        matcher = TagMatcher([
+            TagRule("Singing", ["歌"], exclude=["歌ってみたリアクション"]),
+            TagRule("Reaction", ["リアクション"]),
+        ])
+
+        self.assertEqual(matcher.scan("歌ってみたリアクション"), {"Reaction"})
+        self.assertEqual(matcher.scan("リアクション 歌ってみた"), {"Singing", "Reaction"})
+
+    def test_existing_tags_are_not_added_again(self):
+        aituber = {"name": "ASMR Girl", "tags": ["ASMR"]}
+
+        self.assertEqual(apply_tags(aituber, self.matcher, titles()), {})
+        self.assertEqual(aituber["tags"], ["ASMR"])
+
+
+class TagRuleConfigTest(unittest.TestCase):
+    def test_rules_load_from_a_file_and_can_be_filtered(self):
+        config = {
+            "Cooking": {"patterns": ["料理", "\\bcooking\\b"], "minTitleHits": 1, "nameQualifies": False},
+            "ASMR": {"patterns": ["ASMR"]},
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "rules.json"
+            path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+            matcher = TagMatcher.from_file(path, {"Cooking"})
+            with self.assertRaises(ValueError):
+                TagMatcher.from_file(path, {"Unknown"})
+
+        aituber = {"name": "料理とASMR"}
+        self.assertEqual(apply_tags(aituber, matcher, titles("Cooking stream")), {"Cooking": ["Cooking stream"]})
+        self.assertEqual(aituber["tags"], ["Cooking"])
+
+    def test_named_groups_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TagMatcher([TagRule("Bad", ["(?P<x>a)"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+from update_aitubers import (
+    TwitchAppToken,
+    apply_twitch_info,
+    prefetch_twitch_data,
+    twitch_api_get,
+)
+
+
+def fake_helix(calls, live_ids=()):
+    def twitch_api_get(path, params, client_id, access_token, rate_limiter=None):
+        calls.append((path, params))
+        if path == "users":
+            return {
+                "data": [
+                    {"id": f"id-{login}", "login": login, "display_name": login}
+                    for login in params["login"]
+                ]
+            }
+        if path == "streams":
+            return {
+                "data": [
+                    {"user_id": user_id, "title": "live", "started_at": "2026-08-12T00:00:00Z"}
+                    for user_id in params["user_id"]
+                    if user_id in live_ids
+                ]
+            }
+        return {"data": [{"title": "vod", "url": "https://www.twitch.tv/videos/1"}]}
+
+    return twitch_api_get
+
+
+class PrefetchTwitchDataTest(unittest.TestCase):
+    def test_users_and_streams_are_batched(self):
+        aitubers = [{"twitchLogin": f"User{i}"} for i in range(150)]
+        calls = []
+        with mock.patch(
+            "update_aitubers.twitch_api_get",
+            side_effect=fake_helix(calls, live_ids={f"id-user{i}" for i in range(148)}),
+        ):
+            checked = set()
+            users, streams, videos = prefetch_twitch_data(
+                aitubers, "client", "token", checked_logins=checked
+            )
+
+        paths = [path for path, _ in calls]
+        self.assertEqual(paths.count("users"), 2)
+        self.assertEqual(paths.count("streams"), 2)
+        self.assertEqual(paths.count("videos"), 2)
+        self.assertEqual(len(users), 150)
+        self.assertEqual(checked, {f"user{i}" for i in range(150)})
+        self.assertEqual(set(videos), {"id-user148", "id-user149"})
+
+    def test_apply_marks_offline_users_and_uses_latest_vod(self):
+        aituber = {"twitchLogin": "nike", "name": "", "imageUrl": "", "description": ""}
+        calls = []
+        with mock.patch(
+            "update_aitubers.twitch_api_get", side_effect=fake_helix(calls)
+        ):
+            data = prefetch_twitch_data([aituber], "client", "token")
+
+        apply_twitch_info(aituber, *data)
+
+        self.assertFalse(aituber["twitchIsLive"])
+        self.assertEqual(aituber["twitchUserID"], "id-nike")
+        self.assertEqual(aituber["twitchContentUrl"], "https://www.twitch.tv/videos/1")
+
+    def test_unknown_stream_status_keeps_previous_state(self):
+        aituber = {"twitchLogin": "nike", "name": "Nike", "twitchIsLive": True}
+        users = {"nike": {"id": "id-nike", "login": "nike"}}
+
+        apply_twitch_info(aituber, users, {}, {})
+
+        self.assertTrue(aituber["twitchIsLive"])
+
+
+class TwitchAppTokenTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict("os.environ", {"TWITCH_TOKEN_DIR": self.tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def issue(self, *tokens, expires_in=3600):
+        responses = [{"access_token": token, "expires_in": expires_in} for token in tokens]
+        return mock.patch(
+            "update_aitubers.request_twitch_app_access_token",
+            side_effect=responses,
+        )
+
+    def test_token_is_reused_across_runs_from_a_private_file(self):
+        with self.issue("first", "second") as issue:
+            token = TwitchAppToken("client", "secret")
+            self.assertEqual(token.get(), "first")
+            self.assertEqual(token.get(), "first")
+            self.assertEqual(TwitchAppToken("client", "secret").get(), "first")
+
+        self.assertEqual(issue.call_count, 1)
+        [path] = Path(self.tmp.name).iterdir()
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+        self.assertNotIn("client", path.name)
+
+    def test_tokens_are_kept_per_client_id(self):
+        with self.issue("first", "second") as issue:
+            self.assertEqual(TwitchAppToken("client", "secret").get(), "first")
+            self.assertEqual(TwitchAppToken("other", "secret").get(), "second")
+
+        self.assertEqual(issue.call_count, 2)
+
+    def test_token_is_refreshed_before_expiry(self):
+        with self.issue("first", "second", expires_in=60) as issue:
+            token = TwitchAppToken("client", "secret")
+            token.get()
+            self.assertEqual(token.get(), "second")
+
+        self.assertEqual(issue.call_count, 2)
+        self.assertGreater(token.expires_at, time.time())
+
+    def test_unauthorized_response_reissues_token_once(self):
+        seen = []
+
+        def request_json(url, headers, params):
+            seen.append(headers["Authorization"])
+            if len(seen) == 1:
+                request = httpx.Request("GET", url)
+                raise httpx.HTTPStatusError(
+                    "Unauthorized", request=request, response=httpx.Response(401, request=request)
+                )
+            return {"data": []}
+
+        with self.issue("stale", "fresh"), mock.patch(
+            "update_aitubers.request_json", side_effect=request_json
+        ):
+            token = TwitchAppToken("client", "secret")
+            twitch_api_get("users", {"login": "nike"}, "client", token)
+
+        self.assertEqual(seen, ["Bearer stale", "Bearer fresh"])
+        self.assertEqual(TwitchAppToken("client", "secret").access_token, "fresh")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+import pytz
+
+import refresh_youtube_rss
+from http_client import close_http_client, set_client_defaults
+from update_aitubers import has_fetched_api_data
+from update_pipeline import (
+    recent_youtube_videos,
+    run_pipeline,
+    select_api_candidates,
+    should_update_recent_videos,
+)
+
+
+def feed_entry(video_id, date="2024-03-01T00:00:00+00:00"):
+    return {
+        "title": f"title {video_id}",
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "thumbnail": f"https://i1.ytimg.com/vi/{video_id}/hqdefault.jpg",
+        "date": date,
+    }
+
+
+class SelectApiCandidatesTest(unittest.TestCase):
+    def test_feeds_choose_which_channels_need_video_details(self):
+        known = {"latestVideoUrl": "https://www.youtube.com/watch?v=old"}
+        targets = [
+            {**known, "youtubeChannelID": "UCnew"},
+            {**known, "youtubeChannelID": "UCsame"},
+            {**known, "youtubeChannelID": "UCfailed"},
+            {**known, "youtubeChannelID": ""},
+        ]
+        feeds = {
+            "UCnew": [feed_entry("new"), feed_entry("old"), feed_entry("older")],
+            "UCsame": [feed_entry("old")],
+        }
+
+        changed, candidates = select_api_candidates(targets, feeds)
+
+        self.assertEqual(changed, {"UCnew", "UCfailed"})
+        self.assertEqual(list(candidates), ["UCnew"])
+        self.assertEqual(
+            [item["snippet"]["resourceId"]["videoId"] for item in candidates["UCnew"]],
+            ["new", "old"],
+        )
+
+
+class RecentYouTubeVideosTest(unittest.TestCase):
+    def test_api_times_replace_feed_publish_dates(self):
+        jst = pytz.timezone("Asia/Tokyo")
+        aituber = {
+            "latestVideoUrl": "https://www.youtube.com/watch?v=stream",
+            "latestVideoTitle": "API title",
+            "latestVideoThumbnail": "https://i.ytimg.com/vi/stream/hqdefault.jpg",
+            "latestVideoDate": "2024-03-05T21:00:00+09:00",
+        }
+        videos = {
+            "fresh": {
+                "snippet": {"publishedAt": "2024-03-02T00:00:00Z"},
+                "liveStreamingDetails": {"actualStartTime": "2024-03-06T12:00:00Z"},
+            }
+        }
+        contents = [feed_entry("fresh"), feed_entry("stream"), feed_entry("plain"), feed_entry("extra")]
+
+        recent = recent_youtube_videos(aituber, contents, videos, jst)
+
+        self.assertEqual(len(recent), 3)
+        self.assertEqual(recent[0]["date"], "2024-03-06T21:00:00+09:00")
+        self.assertEqual(recent[1]["title"], "API title")
+        self.assertEqual(recent[1]["date"], "2024-03-05T21:00:00+09:00")
+        self.assertEqual(recent[2], feed_entry("plain"))
+        self.assertEqual(contents[0]["date"], "2024-03-01T00:00:00+00:00")
+
+
+class ShouldUpdateRecentVideosTest(unittest.TestCase):
+    def test_new_uploads_wait_until_the_api_has_enriched_the_channel(self):
+        aituber = {
+            "youtubeChannelID": "UCa",
+            "latestVideoUrl": "https://www.youtube.com/watch?v=old",
+            "recentYoutubeVideos": [feed_entry("old")],
+        }
+        contents = [feed_entry("new"), feed_entry("old")]
+
+        # API失敗・後回し・更新対象外では書き換えず、次回も新着ありと判定させる
+        self.assertFalse(should_update_recent_videos(aituber, contents, set()))
+        self.assertTrue(should_update_recent_videos(aituber, contents, {"UCa"}))
+        # 新着がなければAPIの結果に関係なく書き換えてよい
+        self.assertTrue(should_update_recent_videos(aituber, [feed_entry("old")], set()))
+
+
+class HasFetchedApiDataTest(unittest.TestCase):
+    def test_missing_channel_candidates_or_twitch_data_keep_the_entry_due(self):
+        aituber = {"youtubeChannelID": "UC1", "twitchLogin": "Nike"}
+        users = {"nike": {"id": "42"}}
+        fetched = dict(
+            channels={"UC1": {}},
+            candidates={"UC1": []},
+            changed_channels={"UC1"},
+            twitch_users=users,
+            twitch_streams={"42": None},
+        )
+        self.assertTrue(has_fetched_api_data(aituber, **fetched))
+
+        for name, value in [
+            ("channels", {}),
+            ("candidates", {}),
+            ("twitch_users", {}),
+            ("twitch_streams", {}),
+        ]:
+            with self.subTest(missing=name):
+                self.assertFalse(has_fetched_api_data(aituber, **{**fetched, name: value}))
+
+        # 新着がないチャンネルは統計情報だけでよい
+        self.assertTrue(
+            has_fetched_api_data(aituber, **{**fetched, "candidates": {}, "changed_channels": set()})
+        )
+
+    def test_channels_and_logins_missing_from_a_successful_batch_count_as_fetched(self):
+        aituber = {"youtubeChannelID": "UC1", "twitchLogin": "Nike"}
+        fetched = dict(
+            channels={},
+            candidates={},
+            changed_channels={"UC1"},
+            twitch_users={},
+            twitch_streams={},
+            checked_channels={"UC1"},
+            checked_logins={"nike"},
+        )
+        self.assertTrue(has_fetched_api_data(aituber, **fetched))
+
+        for name in ["checked_channels", "checked_logins"]:
+            with self.subTest(failed=name):
+                self.assertFalse(has_fetched_api_data(aituber, **{**fetched, name: set()}))
+
+
+class RunPipelineScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        Path("app/data").mkdir(parents=True)
+        roster = {
+            "lastUpdated": "",
+            "aitubers": [
+                {"name": f"A{i}", "youtubeChannelID": f"UC{i:022d}", "youtubeURL": "", "imageUrl": "",
+                 "youtubeSubscribers": 0, "latestVideoUrl": ""}
+                for i in range(3)
+            ],
+        }
+        Path("app/data/aitubers.json").write_text(json.dumps(roster), encoding="utf-8")
+
+    def tearDown(self):
+        set_client_defaults()
+        close_http_client()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_failed_api_calls_do_not_advance_the_schedule(self):
+        unavailable = lambda request: httpx.Response(503)
+        set_client_defaults(
+            transport=httpx.MockTransport(unavailable),
+            async_transport_factory=lambda limits: httpx.MockTransport(unavailable),
+        )
+        with mock.patch.dict(os.environ, {"YOUTUBE_API_KEY": "key"}), mock.patch.object(
+            refresh_youtube_rss, "retry_delay", return_value=0
+        ):
+            run_pipeline(schedule=True)
+
+        schedule = json.loads(Path(".cache/refresh-schedule.json").read_text(encoding="utf-8"))
+        self.assertEqual(schedule, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
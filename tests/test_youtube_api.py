@@ -0,0 +1,65 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import httpx
+
+from http_client import close_http_client, configure_http_client
+from youtube_api import YouTubeApiError, YouTubeClient
+from youtube_quota import YouTubeQuotaPool
+
+
+def error_response(status, reason, message="error"):
+    body = {"error": {"code": status, "message": message, "errors": [{"reason": reason}]}}
+    return httpx.Response(status, json=body)
+
+
+class YouTubeClientTest(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.responses = {}
+
+        def handler(request):
+            self.requests.append(request)
+            key = request.headers["X-Goog-Api-Key"]
+            return self.responses.get(key, httpx.Response(200, json={"items": [{"id": "UC1"}]}))
+
+        configure_http_client(transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        close_http_client()
+
+    def test_list_calls_use_the_rest_endpoint_and_header_key(self):
+        response = YouTubeClient("key-a").channels().list(part="id", forHandle="@nike", maxResults=1).execute()
+
+        request = self.requests[0]
+        self.assertEqual(response, {"items": [{"id": "UC1"}]})
+        self.assertEqual(request.url.path, "/youtube/v3/channels")
+        self.assertEqual(dict(request.url.params), {"part": "id", "forHandle": "@nike", "maxResults": "1"})
+        self.assertNotIn("key-a", str(request.url))
+
+    def test_errors_carry_status_and_reasons_without_the_key(self):
+        self.responses["key-a"] = error_response(404, "playlistNotFound", "not found")
+
+        with self.assertRaises(YouTubeApiError) as raised:
+            YouTubeClient("key-a").playlistItems().list(part="snippet", playlistId="UU1").execute()
+
+        self.assertEqual((raised.exception.status, raised.exception.reasons), (404, ["playlistNotFound"]))
+        self.assertNotIn("key-a", str(raised.exception))
+
+    def test_quota_pool_fails_over_on_quota_exceeded(self):
+        self.responses["key-a"] = error_response(403, "quotaExceeded")
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = YouTubeQuotaPool(["key-a", "key-b"], path=Path(tmp) / "quota.json")
+            response = pool.videos().list(part="snippet", id="v1").execute()
+            pool.save()
+            saved = json.loads((Path(tmp) / "quota.json").read_text())
+
+        self.assertEqual(response["items"], [{"id": "UC1"}])
+        self.assertEqual([r.headers["X-Goog-Api-Key"] for r in self.requests], ["key-a", "key-b"])
+        self.assertEqual(sorted(saved["usage"].values()), [1, 10000])
+
+
+if __name__ == "__main__":
+    unittest.main()
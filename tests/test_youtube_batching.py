@@ -0,0 +1,189 @@
+import contextlib
+import io
+import time
+import unittest
+from unittest import mock
+
+from conftest import FakeYouTube, make_channel
+from update_aitubers import (
+    apply_youtube_info,
+    fetch_youtube_channels,
+    has_new_youtube_content,
+    map_concurrently,
+    prefetch_youtube_data,
+)
+
+
+def make_playlist_item(video_id):
+    return {
+        "snippet": {
+            "title": f"title {video_id}",
+            "resourceId": {"videoId": video_id},
+            "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+        }
+    }
+
+
+def make_video(video_id, published_at, privacy="public"):
+    return {
+        "id": video_id,
+        "snippet": {"publishedAt": published_at},
+        "status": {"privacyStatus": privacy},
+    }
+
+
+class FetchYouTubeChannelsTest(unittest.TestCase):
+    def test_channels_are_requested_in_batches_of_fifty(self):
+        channel_ids = [f"UC{i:04d}" for i in range(120)]
+        youtube = FakeYouTube({cid: {"id": cid} for cid in channel_ids})
+
+        channels = fetch_youtube_channels(youtube, channel_ids + ["", channel_ids[0]])
+
+        self.assertEqual(len(channels), 120)
+        self.assertEqual(
+            [len(call["id"].split(",")) for call in youtube.calls["channels"]],
+            [50, 50, 20],
+        )
+
+    def test_missing_channels_are_omitted(self):
+        youtube = FakeYouTube({"UCfound": {"id": "UCfound"}})
+
+        checked = set()
+        channels = fetch_youtube_channels(youtube, ["UCfound", "UCgone"], checked=checked)
+
+        self.assertEqual(list(channels), ["UCfound"])
+        self.assertEqual(checked, {"UCfound", "UCgone"})
+
+    def test_channels_of_failed_batches_are_not_checked(self):
+        youtube = FakeYouTube()
+        youtube.channels = mock.Mock(side_effect=RuntimeError("boom"))
+
+        checked = set()
+        with contextlib.redirect_stdout(io.StringIO()):
+            channels = fetch_youtube_channels(youtube, ["UCfound"], checked=checked)
+
+        self.assertEqual((channels, checked), ({}, set()))
+
+
+class PrefetchYouTubeDataTest(unittest.TestCase):
+    def test_video_details_are_batched_across_channels(self):
+        channel_ids = [f"UC{i:04d}" for i in range(30)]
+        playlists = {
+            f"UU{cid}": [make_playlist_item(f"{cid}a"), make_playlist_item(f"{cid}b")]
+            for cid in channel_ids
+        }
+        videos = {
+            item["snippet"]["resourceId"]["videoId"]: make_video(
+                item["snippet"]["resourceId"]["videoId"], "2024-01-01T00:00:00Z"
+            )
+            for items in playlists.values()
+            for item in items
+        }
+        youtube = FakeYouTube(
+            {cid: make_channel(cid) for cid in channel_ids}, playlists, videos
+        )
+
+        _, candidates, fetched = prefetch_youtube_data(
+            youtube, [{"youtubeChannelID": cid} for cid in channel_ids]
+        )
+
+        self.assertEqual(len(candidates), 30)
+        self.assertEqual(len(fetched), 60)
+        self.assertEqual(len(youtube.calls["videos"]), 2)
+
+    def test_unchanged_channels_only_get_channel_statistics(self):
+        youtube = FakeYouTube(
+            {"UC1": make_channel("UC1"), "UC2": make_channel("UC2")},
+            {"UUUC1": [make_playlist_item("v1")]},
+            {"v1": make_video("v1", "2024-01-01T00:00:00Z")},
+        )
+
+        channels, candidates, _ = prefetch_youtube_data(
+            youtube,
+            [{"youtubeChannelID": "UC1"}, {"youtubeChannelID": "UC2"}],
+            changed_channels={"UC1"},
+        )
+        aituber = {"youtubeURL": "x", "imageUrl": "x.png", "youtubeSubscribers": 1}
+        apply_youtube_info(aituber, channels["UC2"], candidates.get("UC2", []), {})
+
+        self.assertEqual(list(candidates), ["UC1"])
+        self.assertEqual(len(youtube.calls["playlistItems"]), 1)
+        self.assertEqual(aituber["youtubeSubscribers"], 1000)
+        self.assertNotIn("latestVideoUrl", aituber)
+
+    def test_feed_candidates_replace_playlist_items(self):
+        youtube = FakeYouTube(
+            {"UC1": make_channel("UC1"), "UC2": make_channel("UC2")},
+            {"UUUC2": [make_playlist_item("v2")]},
+            {
+                "v1": make_video("v1", "2024-01-01T00:00:00Z"),
+                "v2": make_video("v2", "2024-01-01T00:00:00Z"),
+            },
+        )
+
+        _, candidates, videos = prefetch_youtube_data(
+            youtube,
+            [{"youtubeChannelID": "UC1"}, {"youtubeChannelID": "UC2"}],
+            changed_channels={"UC1", "UC2"},
+            feed_candidates={"UC1": [make_playlist_item("v1")]},
+        )
+
+        self.assertEqual(sorted(candidates), ["UC1", "UC2"])
+        self.assertEqual([call["playlistId"] for call in youtube.calls["playlistItems"]], ["UUUC2"])
+        self.assertEqual(sorted(videos), ["v1", "v2"])
+
+
+class RssChangeDetectionTest(unittest.TestCase):
+    def setUp(self):
+        self.aituber = {
+            "latestVideoUrl": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "recentYoutubeVideos": [
+                {"url": "https://www.youtube.com/watch?v=aaaaaaaaaaa"},
+                {"url": "https://www.youtube.com/shorts/bbbbbbbbbbb"},
+            ],
+        }
+
+    def test_known_videos_are_unchanged(self):
+        contents = [
+            {"url": "https://www.youtube.com/watch?v=aaaaaaaaaaa"},
+            {"url": "https://www.youtube.com/shorts/bbbbbbbbbbb"},
+            {"url": "https://www.youtube.com/watch?v=ccccccccccc"},
+        ]
+
+        self.assertFalse(has_new_youtube_content(self.aituber, contents))
+
+    def test_new_video_or_upcoming_stream_is_changed(self):
+        contents = [{"url": "https://www.youtube.com/watch?v=ddddddddddd"}]
+
+        self.assertTrue(has_new_youtube_content(self.aituber, contents))
+        self.assertTrue(has_new_youtube_content({**self.aituber, "isUpcoming": True}, []))
+
+
+class ApplyYouTubeInfoTest(unittest.TestCase):
+    def test_latest_public_video_is_selected_from_shared_lookup(self):
+        aituber = {"youtubeURL": "", "imageUrl": "", "youtubeChannelID": "UC1"}
+        candidates = [make_playlist_item("new"), make_playlist_item("old")]
+        videos = {
+            "new": make_video("new", "2024-02-01T00:00:00Z", privacy="private"),
+            "old": make_video("old", "2024-01-01T00:00:00Z"),
+        }
+
+        apply_youtube_info(aituber, make_channel("UC1"), candidates, videos)
+
+        self.assertEqual(aituber["latestVideoUrl"], "https://www.youtube.com/watch?v=old")
+        self.assertEqual(aituber["latestVideoDate"], "2024-01-01T09:00:00+09:00")
+        self.assertEqual(aituber["youtubeSubscribers"], 1000)
+        self.assertFalse(aituber["isUpcoming"])
+
+
+class MapConcurrentlyTest(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        def slow_identity(value):
+            time.sleep(0.01 * (5 - value))
+            return value
+
+        self.assertEqual(map_concurrently(slow_identity, range(5), workers=5), [0, 1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
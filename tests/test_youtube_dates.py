@@ -2,8 +2,8 @@ import unittest
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from scripts.update_aitubers import get_youtube_content_time
-from scripts.refresh_youtube_rss import apply_canonical_latest
+from update_aitubers import get_youtube_content_time
+from refresh_youtube_rss import apply_canonical_latest
 
 
 class YouTubeContentTimeTest(unittest.TestCase):
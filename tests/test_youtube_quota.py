@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from youtube_api import YouTubeApiError
+from youtube_quota import (
+    PRIORITY_LOW,
+    QuotaDeferred,
+    QuotaExceeded,
+    YouTubeQuotaPool,
+    youtube_api_keys,
+)
+
+
+def quota_error(resource_name):
+    return YouTubeApiError(resource_name, 403, ["quotaExceeded"])
+
+
+class FakeService:
+    """resource().list(**params).execute() の呼び出しをキーごとに記録する"""
+
+    def __init__(self, api_key, calls, failing_keys):
+        self.api_key = api_key
+        self.calls = calls
+        self.failing_keys = failing_keys
+
+    def __getattr__(self, resource_name):
+        service = self
+
+        class Resource:
+            def list(self, **params):
+                return SimpleNamespace(execute=lambda: service.execute(resource_name))
+
+        return Resource
+
+    def execute(self, resource_name):
+        self.calls.append((self.api_key, resource_name))
+        if self.api_key in self.failing_keys:
+            raise quota_error(resource_name)
+        return {"items": []}
+
+
+class YouTubeQuotaPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "youtube-quota.json"
+        self.calls = []
+        self.failing_keys = set()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_pool(self, keys=("key-a", "key-b"), daily_quota=1000):
+        return YouTubeQuotaPool(
+            keys,
+            path=self.path,
+            daily_quota=daily_quota,
+            service_factory=lambda api_key: FakeService(api_key, self.calls, self.failing_keys),
+        )
+
+    def test_calls_are_charged_and_routed_to_the_fullest_key(self):
+        pool = self.make_pool()
+
+        pool.search().list(q="x").execute()
+        pool.channels().list(id="UC1").execute()
+        pool.channels().list(id="UC2").execute()
+
+        self.assertEqual(
+            self.calls,
+            [("key-a", "search"), ("key-b", "channels"), ("key-b", "channels")],
+        )
+        self.assertEqual((pool.used("key-a"), pool.used("key-b")), (100, 2))
+
+    def test_usage_persists_for_the_same_day(self):
+        pool = self.make_pool()
+        pool.search().list(q="x").execute()
+        pool.save()
+
+        reloaded = self.make_pool()
+
+        self.assertEqual(reloaded.remaining(), 1900)
+        self.assertNotIn("key-a", self.path.read_text())
+
+    def test_quota_error_fails_over_to_the_next_key(self):
+        self.failing_keys.add("key-a")
+        pool = self.make_pool()
+
+        pool.channels().list(id="UC1").execute()
+
+        self.assertEqual(self.calls, [("key-a", "channels"), ("key-b", "channels")])
+        self.assertEqual(pool.remaining("key-a"), 0)
+
+    def test_low_priority_calls_are_deferred_near_the_limit(self):
+        pool = self.make_pool(keys=["key-a"], daily_quota=210)
+        pool.search().list(q="x").execute()
+
+        with self.assertRaises(QuotaDeferred):
+            pool.search().list(q="y").execute(priority=PRIORITY_LOW)
+        pool.search().list(q="z").execute()
+        with self.assertRaises(QuotaExceeded):
+            pool.search().list(q="w").execute()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_keys_are_read_in_numeric_order(self):
+        environ = {"YOUTUBE_API_KEY10": "j", "YOUTUBE_API_KEY2": "b", "YOUTUBE_API_KEY": "a", "OTHER": "x"}
+
+        self.assertEqual(youtube_api_keys(environ), ["a", "b", "j"])
+
+
+if __name__ == "__main__":
+    unittest.main()